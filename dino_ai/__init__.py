@@ -0,0 +1,14 @@
+"""谷歌小恐龙遗传算法AI
+
+按用途拆分为轻量入口，重依赖只在对应后端真正使用时才加载:
+
+- dino_ai.config       配置与模板（标准库）
+- dino_ai.simulator    模拟游戏（标准库）
+- dino_ai.genome       个体与决策（numpy）
+- dino_ai.ga           遗传算法核心（numpy）
+- dino_ai.checkpoints  检查点工具（标准库）
+- dino_ai.browser      Chrome浏览器后端（selenium）
+- dino_ai.backend      按配置创建游戏后端
+
+本文件不导入任何子模块，导入包本身几乎没有开销。
+"""
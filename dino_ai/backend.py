@@ -0,0 +1,16 @@
+"""游戏后端选择（按需导入对应实现）"""
+
+
+def create_game(config):
+    """根据配置创建游戏后端，模拟模式不会加载selenium"""
+    if config["game"].get("simulation_mode", False):
+        from .simulator import SimulatedDinoGame
+        print("使用模拟游戏模式")
+        return SimulatedDinoGame(config)
+
+    from .browser import DinoGame
+    if config.get("supervisor", {}).get("enabled", True):
+        # 检测崩溃或卡住的浏览器会话并自动重启
+        from .supervisor import SupervisedGame
+        return SupervisedGame(config, DinoGame)
+    return DinoGame(config)
@@ -0,0 +1,683 @@
+"""性能基准测试
+
+用法:
+    python -m dino_ai.benchmark startup [--repeat N]
+    python -m dino_ai.benchmark logging [--iterations N]
+    python -m dino_ai.benchmark run [--output 结果.json] [--quick]
+    python -m dino_ai.benchmark compare 基线.json 结果.json [--threshold 0.1]
+
+run的结果是带环境信息的JSON，compare对比两份结果，
+任何指标变差超过阈值即视为性能回退（退出码为1）。
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from .config import PROJECT_ROOT
+
+# 各轻量入口需要导入的模块
+STARTUP_ENTRY_POINTS = {
+    "simulator": ["dino_ai.simulator"],
+    "ga_core": ["dino_ai.ga"],
+    "checkpoint_tools": ["dino_ai.checkpoints"],
+    "browser_backend": ["dino_ai.browser"],
+    # 拆分前的脚本在启动时导入的全部依赖，作为对照
+    "legacy_all_imports": ["numpy", "selenium.webdriver", "webdriver_manager.chrome", "cv2", "PIL.Image"],
+}
+
+
+def _time_cold_import(modules):
+    """在新的解释器进程中导入模块，返回(进程总耗时, 导入耗时)，导入失败返回None"""
+    code = (
+        "import time\n"
+        "t = time.perf_counter()\n"
+        + "".join(f"import {name}\n" for name in modules)
+        + "print(time.perf_counter() - t)\n"
+    )
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        return None
+    return wall, float(result.stdout.strip().splitlines()[-1])
+
+
+def bench_startup(repeat=5):
+    """测量各入口的冷启动时间（毫秒，取中位数）"""
+    results = {}
+    for name, modules in STARTUP_ENTRY_POINTS.items():
+        samples = [_time_cold_import(modules) for _ in range(repeat)]
+        if any(sample is None for sample in samples):
+            results[name] = {"available": False}
+            continue
+        results[name] = {
+            "available": True,
+            "process_ms": statistics.median(s[0] for s in samples) * 1000,
+            "import_ms": statistics.median(s[1] for s in samples) * 1000,
+        }
+    return results
+
+
+def print_startup(results):
+    """打印冷启动测试结果"""
+    print(f"{'入口':<22}{'进程总耗时(ms)':>16}{'导入耗时(ms)':>14}")
+    for name, result in results.items():
+        if not result["available"]:
+            print(f"{name:<22}{'依赖未安装':>16}")
+            continue
+        print(f"{name:<22}{result['process_ms']:>16.1f}{result['import_ms']:>14.1f}")
+
+
+def bench_logging(iterations=1000000):
+    """测量热路径日志的开销（纳秒/次）：空循环、禁用时的判断、启用并限流时的调用"""
+    from .eventlog import DEBUG, EventLog
+
+    results = {}
+
+    disabled = EventLog()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        pass
+    baseline = time.perf_counter() - start
+    results["empty_loop_ns"] = baseline / iterations * 1e9
+
+    start = time.perf_counter()
+    for i in range(iterations):
+        if disabled.debug_on:
+            disabled.debug("bench", i=i)
+    results["disabled_check_ns"] = (time.perf_counter() - start - baseline) / iterations * 1e9
+
+    enabled = EventLog(level=DEBUG, rate_limit=5)
+    with _quiet():
+        start = time.perf_counter()
+        for i in range(iterations):
+            if enabled.debug_on:
+                enabled.debug("bench", i=i)
+        results["enabled_rate_limited_ns"] = (time.perf_counter() - start - baseline) / iterations * 1e9
+    return results
+
+
+def _quiet():
+    """屏蔽被测代码的print输出"""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def _metric(value, unit, higher_is_better):
+    return {"value": value, "unit": unit, "higher_is_better": higher_is_better}
+
+
+def _bench_config(population_size, checkpoint_dir):
+    """基准测试使用的最小配置"""
+    return {
+        "training": {
+            "population_size": population_size,
+            "generations": 1,
+            "runs_per_individual": 1,
+            "save_file": os.path.join(checkpoint_dir, "population.json"),
+            "checkpoint_interval": 10 ** 9,
+            "checkpoint_dir": checkpoint_dir,
+            "max_checkpoints": 10 ** 9
+        },
+        "genetic": {
+            "mutation_rate": 0.1,
+            "mutation_scale": 0.2,
+            "tournament_size": 3,
+            "elite_count": 3,
+            "elite_diversity_threshold": 0.1
+        },
+        "game": {
+            "window_width": 800,
+            "window_height": 600,
+            "delay": 0.01,
+            "simulation_mode": True
+        }
+    }
+
+
+def _sample_states(count):
+    """从模拟器中采集带障碍物的游戏状态"""
+    from .simulator import SimulatedDinoGame
+    game = SimulatedDinoGame(_bench_config(5, ""))
+    states = []
+    with _quiet():
+        game.start_game()
+        while len(states) < count:
+            state = game.get_game_state()
+            if game.is_game_over():
+                game.restart()
+            if state["obstacles"]:
+                states.append(json.loads(json.dumps(state)))
+    return states
+
+
+def bench_simulator(steps=50000):
+    """SimulatedDinoGame每秒步数"""
+    from .simulator import SimulatedDinoGame
+    game = SimulatedDinoGame(_bench_config(5, ""))
+    with _quiet():
+        game.start_game()
+        start = time.perf_counter()
+        for _ in range(steps):
+            game.get_game_state()
+            if game.game_over:
+                game.restart()
+        elapsed = time.perf_counter() - start
+    return {"simulator_steps_per_sec": _metric(steps / elapsed, "steps/s", True)}
+
+
+def bench_predict(calls=50000):
+    """DinosaurAI.predict每秒调用次数"""
+    from .genome import DinosaurAI
+    states = _sample_states(1000)
+    individual = DinosaurAI()
+    with _quiet():
+        start = time.perf_counter()
+        for i in range(calls):
+            individual.predict(states[i % len(states)])
+        elapsed = time.perf_counter() - start
+    return {"predict_calls_per_sec": _metric(calls / elapsed, "calls/s", True)}
+
+
+def bench_policy_table(calls=50000):
+    """编译后的决策查找表每秒调用次数、编译耗时，以及在模拟器状态上与predict的一致率"""
+    from .genome import DinosaurAI
+    from .policy_table import DecisionTable, compile_table, verify
+    states = _sample_states(1000)
+    individual = DinosaurAI()
+    start = time.perf_counter()
+    table = DecisionTable(compile_table(individual))
+    compile_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    for i in range(calls):
+        table.predict(states[i % len(states)])
+    elapsed = time.perf_counter() - start
+    return {
+        "policy_table_calls_per_sec": _metric(calls / elapsed, "calls/s", True),
+        "policy_table_compile_ms": _metric(compile_seconds * 1000, "ms", False),
+        "policy_table_agreement": _metric(verify(individual, table, states), "ratio", True)
+    }
+
+
+def bench_genome_memory(count=100000):
+    """每个个体的内存占用和pickle序列化大小（字节）"""
+    import pickle
+    import tracemalloc
+    from .genome import DinosaurAI, genome_matrix, population_from_matrix
+
+    params = _bench_config(count, "")["genetic"]
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        population = [DinosaurAI(config=params) for _ in range(count)]
+        standalone = (tracemalloc.get_traced_memory()[0] - before) / count
+
+        matrix = genome_matrix(population)
+        del population
+        before = tracemalloc.get_traced_memory()[0]
+        population = population_from_matrix(matrix, params)
+        # 种群只保存基因矩阵和截断局数数组，个体视图按需创建
+        views = (tracemalloc.get_traced_memory()[0] - before) / count
+    finally:
+        tracemalloc.stop()
+
+    pickled = len(pickle.dumps(population, protocol=pickle.HIGHEST_PROTOCOL)) / count
+    return {
+        "genome_bytes_per_individual": _metric(standalone, "B", False),
+        "genome_view_bytes_per_individual": _metric(views + matrix.itemsize * matrix.shape[1], "B", False),
+        "genome_pickle_bytes_per_individual": _metric(pickled, "B", False),
+    }
+
+
+def bench_replay(episodes=5, genomes=1000):
+    """录制赛道离线评估：每秒评估的 个体×赛道 数"""
+    import numpy as np
+    from .evaluation import run_episode
+    from .genome import DinosaurAI
+    from .replay import ReplayEvaluator, extract_courses
+    from .simulator import SimulatedDinoGame
+    from .trace import TraceRecorder
+
+    trace_dir = tempfile.mkdtemp(prefix="dino_bench_")
+    try:
+        trace_path = os.path.join(trace_dir, "bench.trace")
+        recorder = TraceRecorder(trace_path)
+        game = SimulatedDinoGame(_bench_config(5, trace_dir))
+        with _quiet():
+            for _ in range(episodes):
+                run_episode(game, DinosaurAI(), realtime=False, recorder=recorder)
+        recorder.close()
+
+        courses = extract_courses(trace_path, min_frames=1)
+        genes = np.random.uniform(-1, 1, (genomes, 7))
+        evaluator = ReplayEvaluator(courses)
+        start = time.perf_counter()
+        evaluator.evaluate(genes)
+        elapsed = time.perf_counter() - start
+    finally:
+        shutil.rmtree(trace_dir, ignore_errors=True)
+    return {"replay_genome_courses_per_sec": _metric(genomes * len(courses) / elapsed, "evals/s", True)}
+
+
+def bench_evolution(population_sizes=(20, 100, 500), repeat=3):
+    """GeneticAlgorithm.tell（遗传算法和CMA-ES引擎）与select_diverse_elites随种群大小的耗时"""
+    import random
+    from .ga import GeneticAlgorithm
+
+    results = {}
+    checkpoint_dir = tempfile.mkdtemp(prefix="dino_bench_")
+    try:
+        for size in population_sizes:
+            ga = GeneticAlgorithm(_bench_config(size, checkpoint_dir))
+            fitness_scores = [random.uniform(0, 500) for _ in range(size)]
+
+            samples = []
+            with _quiet():
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    ga.tell(fitness_scores)
+                    samples.append(time.perf_counter() - start)
+            results[f"evolve_ms_pop{size}"] = _metric(statistics.median(samples) * 1000, "ms", False)
+
+            config = _bench_config(size, checkpoint_dir)
+            config["optimizer"] = {"engine": "cmaes"}
+            cmaes = GeneticAlgorithm(config)
+            samples = []
+            with _quiet():
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    cmaes.tell(fitness_scores)
+                    samples.append(time.perf_counter() - start)
+            results[f"cmaes_tell_ms_pop{size}"] = _metric(statistics.median(samples) * 1000, "ms", False)
+
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                ga.engine.select_diverse_elites(fitness_scores)
+                samples.append(time.perf_counter() - start)
+            results[f"select_diverse_elites_ms_pop{size}"] = _metric(statistics.median(samples) * 1000, "ms", False)
+    finally:
+        shutil.rmtree(checkpoint_dir, ignore_errors=True)
+    return results
+
+
+def bench_checkpoints(population_sizes=(20, 500), history_sizes=(10, 1000), checkpoint_count=20):
+    """检查点保存/加载/列出耗时随种群和历史长度的变化"""
+    from . import checkpoints
+    from .ga import GeneticAlgorithm
+
+    results = {}
+    for size in population_sizes:
+        for history in history_sizes:
+            checkpoint_dir = tempfile.mkdtemp(prefix="dino_bench_")
+            try:
+                ga = GeneticAlgorithm(_bench_config(size, checkpoint_dir))
+                ga.training_history = [
+                    {"generation": g + 1, "best_fitness": 100.0, "avg_fitness": 50.0, "generation_time": 60.0,
+                     "improved": False, "fitness_distribution": {"max": 100.0, "min": 0.0, "std": 20.0}}
+                    for g in range(history)
+                ]
+                suffix = f"pop{size}_hist{history}"
+
+                with _quiet():
+                    start = time.perf_counter()
+                    for g in range(checkpoint_count):
+                        ga.generation = g
+                        ga.save_checkpoint()
+                    save_time = (time.perf_counter() - start) / checkpoint_count
+
+                    start = time.perf_counter()
+                    ga.load_latest_checkpoint()
+                    load_time = time.perf_counter() - start
+
+                start = time.perf_counter()
+                checkpoints.list_checkpoints(checkpoint_dir)
+                list_time = time.perf_counter() - start
+
+                results[f"checkpoint_save_ms_{suffix}"] = _metric(save_time * 1000, "ms", False)
+                results[f"checkpoint_load_ms_{suffix}"] = _metric(load_time * 1000, "ms", False)
+                results[f"checkpoint_list_ms_{suffix}"] = _metric(list_time * 1000, "ms", False)
+            finally:
+                shutil.rmtree(checkpoint_dir, ignore_errors=True)
+    return results
+
+
+class _StandInElement:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def send_keys(self, *keys):
+        self.driver.round_trips += 1
+
+
+class _StandInDriver:
+    """本地替身浏览器：按Runner接口返回固定结果，用于测量DinoGame自身的开销
+
+    has_runner为False时模拟没有Runner实例的页面（脚本控制失败，只能用键盘）。
+    """
+
+    def __init__(self, has_runner=True):
+        self.has_runner = has_runner
+        self.round_trips = 0
+
+    def execute_script(self, script):
+        self.round_trips += 1
+        if "typeof Runner" in script:
+            return "runner" if self.has_runner else None
+        if not self.has_runner and "Runner" in script:
+            raise RuntimeError("Runner is not defined")
+        if "activated" in script:
+            return True
+        if "crashed" in script:
+            return False
+        return 0
+
+    def find_element(self, by, value):
+        self.round_trips += 1
+        return _StandInElement(self)
+
+    def find_elements(self, by, value):
+        self.round_trips += 1
+        return []
+
+
+def _stand_in_game(browser, has_runner=True):
+    """不启动浏览器，创建连接替身浏览器的DinoGame"""
+    game = browser.DinoGame.__new__(browser.DinoGame)
+    game.driver = _StandInDriver(has_runner)
+    game.is_playing = True
+    game.current_speed = 6
+    game.delay = 0
+    game.init_controls()
+    return game
+
+
+def bench_restart(repeat=200):
+    """DinoGame.restart的自身开销（替身浏览器，不含固定等待时间）"""
+    from . import browser
+
+    game = _stand_in_game(browser)
+
+    original_sleep = browser.time.sleep
+    waited = []
+    browser.time.sleep = waited.append
+    try:
+        with _quiet():
+            start = time.perf_counter()
+            for _ in range(repeat):
+                game.restart()
+            elapsed = time.perf_counter() - start
+    finally:
+        browser.time.sleep = original_sleep
+    return {
+        "restart_overhead_ms": _metric(elapsed / repeat * 1000, "ms", False),
+        "restart_fixed_wait_s": _metric(sum(waited) / repeat, "s", False),
+    }
+
+
+def bench_controls(repeat=1000):
+    """DinoGame每个动作的WebDriver往返次数和自身开销（替身浏览器，分别测试有/无Runner实例的页面）"""
+    from . import browser
+
+    results = {}
+    for label, has_runner in (("runner", True), ("keyboard", False)):
+        with _quiet():
+            game = _stand_in_game(browser, has_runner)
+        game.driver.round_trips = 0
+        start = time.perf_counter()
+        for _ in range(repeat):
+            game.jump()
+            game.duck()
+            game.is_game_over()
+        elapsed = time.perf_counter() - start
+        actions = repeat * 3
+        results[f"control_round_trips_{label}"] = _metric(game.driver.round_trips / actions, "trips", False)
+        results[f"control_overhead_us_{label}"] = _metric(elapsed / actions * 1e6, "us", False)
+    return results
+
+
+def _synthetic_frame(perception):
+    """按Chrome游戏的尺寸画一帧降采样后的深色程度矩阵：恐龙、两组仙人掌、一只翼龙和地平线"""
+    import numpy as np
+
+    x0, y0, width, height = perception.roi
+    step = perception.downsample
+    frame = np.zeros((int(height) // step, int(width) // step), dtype=np.uint8)
+
+    def draw(x, y, w, h):
+        frame[int(y - y0) // step:int(y + h - y0) // step, int(x - x0) // step:int(x + w - x0) // step] = 200
+
+    draw(50, 93, 44, 47)
+    draw(300, 105, 17, 35)
+    draw(320, 105, 17, 35)
+    draw(420, 90, 25, 50)
+    draw(520, 80, 46, 30)
+    frame[(137 - int(y0)) // step, :] = 200
+    return frame
+
+
+def bench_perception(frames=2000):
+    """像素感知每帧的处理耗时（合成画面，不含浏览器截图往返）"""
+    from .perception import PixelPerception
+
+    perception = PixelPerception({})
+    frame = _synthetic_frame(perception)
+    dino, obstacles = perception.detect(frame)
+    start = time.perf_counter()
+    for _ in range(frames):
+        perception.detect(frame)
+    elapsed = time.perf_counter() - start
+    return {
+        "perception_detect_ms": _metric(elapsed / frames * 1000, "ms", False),
+        "perception_objects": _metric(len(obstacles) + (dino is not None), "objects", True),
+    }
+
+
+def bench_metrics(episodes=1000000, scrapes=200):
+    """训练循环中累加指标的开销，以及HTTP线程渲染一次指标文本的耗时"""
+    from .metrics import TrainingMetrics
+
+    metrics = TrainingMetrics()
+    start = time.perf_counter()
+    for _ in range(episodes):
+        metrics.add_episode(100)
+    counter_ns = (time.perf_counter() - start) / episodes * 1e9
+
+    start = time.perf_counter()
+    for _ in range(scrapes):
+        metrics.render()
+    render_ms = (time.perf_counter() - start) / scrapes * 1000
+    return {
+        "metrics_counter_ns": _metric(counter_ns, "ns", False),
+        "metrics_render_ms": _metric(render_ms, "ms", False),
+    }
+
+
+def bench_novelty(archive_size=100000, population=100, repeat=5):
+    """存档规模下每代计算新颖性的耗时（随机描述子）"""
+    import numpy as np
+
+    from .novelty import DESCRIPTOR_SIZE, NoveltySearch
+
+    rng = np.random.default_rng(0)
+    search = NoveltySearch({"novelty": {"archive_size": archive_size}})
+    search.archive.add(rng.random((archive_size, DESCRIPTOR_SIZE)))
+    descriptors = rng.random((population, DESCRIPTOR_SIZE))
+    start = time.perf_counter()
+    for _ in range(repeat):
+        search.novelty(descriptors)
+    elapsed = time.perf_counter() - start
+    return {"novelty_generation_ms": _metric(elapsed / repeat * 1000, "ms", False)}
+
+
+def bench_inference(clients=16, requests=2000):
+    """推理服务本机回环压测：吞吐量、客户端观测的p99延迟和平均批大小"""
+    from .inference import load_test
+    result = load_test(clients, requests)
+    return {
+        "inference_requests_per_sec": _metric(result["throughput"], "requests/s", True),
+        "inference_p99_ms": _metric(result["p99_ms"], "ms", False),
+        "inference_mean_batch": _metric(result["mean_batch"], "requests", True)
+    }
+
+
+def bench_startup_metrics(repeat=3):
+    """把冷启动结果转换为指标"""
+    results = {}
+    for name, result in bench_startup(repeat).items():
+        if result["available"]:
+            results[f"startup_import_ms_{name}"] = _metric(result["import_ms"], "ms", False)
+    return results
+
+
+def bench_logging_metrics(iterations=1000000):
+    """把日志开销结果转换为指标"""
+    results = bench_logging(iterations)
+    return {
+        "log_disabled_check_ns": _metric(results["disabled_check_ns"], "ns", False),
+        "log_enabled_rate_limited_ns": _metric(results["enabled_rate_limited_ns"], "ns", False),
+    }
+
+
+# 完整测试套件：名称 -> (测试函数, 完整规模参数, 快速规模参数)
+SUITE = {
+    "simulator": (bench_simulator, {}, {"steps": 5000}),
+    "predict": (bench_predict, {}, {"calls": 5000}),
+    "policy_table": (bench_policy_table, {}, {"calls": 5000}),
+    "genome_memory": (bench_genome_memory, {}, {"count": 10000}),
+    "replay": (bench_replay, {}, {"episodes": 2, "genomes": 100}),
+    "evolution": (bench_evolution, {}, {"population_sizes": (20, 100), "repeat": 1}),
+    "checkpoints": (bench_checkpoints, {}, {"population_sizes": (20,), "history_sizes": (10, 100), "checkpoint_count": 3}),
+    "restart": (bench_restart, {}, {"repeat": 20}),
+    "controls": (bench_controls, {}, {"repeat": 100}),
+    "perception": (bench_perception, {}, {"frames": 200}),
+    "novelty": (bench_novelty, {}, {"archive_size": 10000, "repeat": 2}),
+    "metrics": (bench_metrics, {}, {"episodes": 100000, "scrapes": 20}),
+    "inference": (bench_inference, {}, {"clients": 4, "requests": 500}),
+    "startup": (bench_startup_metrics, {}, {"repeat": 1}),
+    "logging": (bench_logging_metrics, {}, {"iterations": 100000}),
+}
+
+
+def collect_metadata():
+    """收集运行环境信息"""
+    metadata = {
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+    try:
+        import numpy
+        metadata["numpy"] = numpy.__version__
+    except ImportError:
+        metadata["numpy"] = None
+    try:
+        metadata["git_commit"] = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=PROJECT_ROOT, capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        metadata["git_commit"] = None
+    return metadata
+
+
+def run_suite(names=None, quick=False):
+    """运行测试套件，依赖缺失的项目记录为skipped"""
+    report = {"metadata": collect_metadata(), "results": {}, "skipped": {}}
+    for name, (func, full_kwargs, quick_kwargs) in SUITE.items():
+        if names and name not in names:
+            continue
+        print(f"运行基准测试: {name} ...")
+        try:
+            report["results"].update(func(**(quick_kwargs if quick else full_kwargs)))
+        except ImportError as e:
+            report["skipped"][name] = str(e)
+            print(f"   跳过（缺少依赖）: {e}")
+    return report
+
+
+def compare_reports(baseline, current, threshold=0.1):
+    """对比两份结果，返回[(指标, 基线值, 当前值, 相对变化, 是否回退)]"""
+    rows = []
+    for name, base in baseline["results"].items():
+        if name not in current["results"]:
+            continue
+        value = current["results"][name]["value"]
+        if base["value"] == 0:
+            continue
+        change = (value - base["value"]) / base["value"]
+        worse = -change if base["higher_is_better"] else change
+        rows.append((name, base["value"], value, change, worse > threshold))
+    return rows
+
+
+def print_suite(report):
+    """打印测试套件结果"""
+    for name, metric in report["results"].items():
+        print(f"{name:<45}{metric['value']:>14.3f} {metric['unit']}")
+    for name, reason in report["skipped"].items():
+        print(f"{name:<45}{'跳过':>14} ({reason})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="谷歌小恐龙AI性能基准测试")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    startup_parser = subparsers.add_parser("startup", help="测量各入口的冷启动时间")
+    startup_parser.add_argument("--repeat", type=int, default=5, help="每个入口重复次数")
+
+    logging_parser = subparsers.add_parser("logging", help="测量热路径日志开销")
+    logging_parser.add_argument("--iterations", type=int, default=1000000, help="循环次数")
+
+    run_parser = subparsers.add_parser("run", help="运行完整测试套件")
+    run_parser.add_argument("--output", default=None, help="结果JSON文件路径")
+    run_parser.add_argument("--only", nargs="*", choices=list(SUITE), help="只运行指定项目")
+    run_parser.add_argument("--quick", action="store_true", help="使用较小的规模快速运行")
+
+    compare_parser = subparsers.add_parser("compare", help="与基线结果对比，检测性能回退")
+    compare_parser.add_argument("baseline", help="基线结果JSON")
+    compare_parser.add_argument("current", help="当前结果JSON")
+    compare_parser.add_argument("--threshold", type=float, default=0.1, help="允许的相对变差比例")
+
+    args = parser.parse_args(argv)
+    if args.command == "startup":
+        print_startup(bench_startup(args.repeat))
+    elif args.command == "logging":
+        for name, value in bench_logging(args.iterations).items():
+            print(f"{name:<26}{value:>10.1f} ns")
+    elif args.command == "run":
+        report = run_suite(args.only, args.quick)
+        print_suite(report)
+        output = args.output or f"benchmark_{time.strftime('%Y%m%d_%H%M%S')}.json"
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📄 基准测试结果已保存到: {output}")
+    elif args.command == "compare":
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        with open(args.current, "r") as f:
+            current = json.load(f)
+        rows = compare_reports(baseline, current, args.threshold)
+        regressions = 0
+        for name, base, value, change, regressed in rows:
+            flag = "⚠️ 回退" if regressed else ""
+            regressions += regressed
+            print(f"{name:<45}{base:>14.3f}{value:>14.3f}{change:>+9.1%} {flag}")
+        print(f"\n共对比 {len(rows)} 项指标，{regressions} 项回退（阈值 {args.threshold:.0%}）")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""预热浏览器池：预先启动已加载游戏页面的Chrome，评估会话通过远程调试端口直接连接（仅依赖标准库）
+
+用法:
+    python -m dino_ai.browser_pool start [--size N]   启动N个浏览器并打开游戏
+    python -m dino_ai.browser_pool status             查看浏览器池状态和启动耗时
+    python -m dino_ai.browser_pool stop               关闭浏览器池
+
+每个浏览器使用固定的配置目录（<pool_dir>/profiles/slot-i），重新启动时复用页面缓存。
+进程之间通过锁文件（<pool_dir>/slot-i.lock）租用浏览器，持有进程退出后锁自动失效。
+DinoGame启动时优先租用空闲的浏览器，没有时照常冷启动。
+
+配置（config["browser"]，均为可选）:
+    pool_dir    浏览器池目录，默认 .browser_pool
+    pool_size   start命令默认启动的浏览器数量，默认2
+    use_pool    是否优先连接浏览器池，默认True
+"""
+import json
+import os
+import signal
+import socket
+import subprocess
+import time
+import urllib.request
+from time import perf_counter
+
+from .chrome import CHROME_ARGUMENTS, GAME_URL, resolve_chrome_binary
+
+DEFAULT_POOL_DIR = ".browser_pool"
+STATE_FILE = "pool.json"
+
+# 等待浏览器调试端口可用的最长时间（秒）
+LAUNCH_TIMEOUT = 30
+
+
+def pool_dir(config):
+    return config.get("browser", {}).get("pool_dir", DEFAULT_POOL_DIR)
+
+
+def _state_path(directory):
+    return os.path.join(directory, STATE_FILE)
+
+
+def _lock_path(directory, slot):
+    return os.path.join(directory, f"slot-{slot['slot']}.lock")
+
+
+def load_state(directory):
+    """读取浏览器池状态，不存在时返回空列表"""
+    try:
+        with open(_state_path(directory), "r") as f:
+            return json.load(f)["slots"]
+    except (FileNotFoundError, ValueError, KeyError):
+        return []
+
+
+def _save_state(directory, slots):
+    tmp = _state_path(directory) + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"slots": slots}, f, indent=2)
+    os.replace(tmp, _state_path(directory))
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _debugger_ready(port, timeout=0.5):
+    """调试端口上已经打开了游戏页面"""
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/json/list", timeout=timeout) as response:
+            targets = json.load(response)
+    except (OSError, ValueError):
+        return False
+    return any(t.get("type") == "page" and "dino" in t.get("url", "") for t in targets)
+
+
+def start_pool(config, size=None):
+    """启动浏览器池（同时启动所有浏览器，再逐个等待页面就绪），返回槽位列表"""
+    browser_config = config.get("browser", {})
+    size = size or browser_config.get("pool_size", 2)
+    directory = pool_dir(config)
+    chrome = resolve_chrome_binary(browser_config)
+    if not chrome:
+        raise RuntimeError("找不到Chrome可执行文件，请在config['browser']['chrome_binary']中指定")
+
+    existing = [slot for slot in load_state(directory) if _pid_alive(slot["pid"])]
+    used = {slot["slot"] for slot in existing}
+    width = config["game"].get("window_width", 800)
+    height = config["game"].get("window_height", 600)
+
+    launching = []
+    slot_id = 0
+    while len(launching) < size - len(existing):
+        if slot_id not in used:
+            port = _free_port()
+            profile = os.path.abspath(os.path.join(directory, "profiles", f"slot-{slot_id}"))
+            os.makedirs(profile, exist_ok=True)
+            command = [chrome, *CHROME_ARGUMENTS, f"--window-size={width},{height}",
+                       f"--remote-debugging-port={port}", f"--user-data-dir={profile}", GAME_URL]
+            process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                       start_new_session=True)
+            launching.append(({"slot": slot_id, "port": port, "pid": process.pid, "profile": profile}, perf_counter()))
+        slot_id += 1
+
+    slots = list(existing)
+    for slot, started in launching:
+        deadline = started + LAUNCH_TIMEOUT
+        while not _debugger_ready(slot["port"]) and perf_counter() < deadline:
+            time.sleep(0.1)
+        if not _debugger_ready(slot["port"]):
+            print(f"❌ 槽位 {slot['slot']} 的浏览器在 {LAUNCH_TIMEOUT} 秒内未就绪，已放弃")
+            _terminate(slot["pid"])
+            continue
+        slot["launch_ms"] = (perf_counter() - started) * 1000
+        slot["launched_at"] = time.strftime("%Y%m%d_%H%M%S")
+        slots.append(slot)
+        print(f"🚀 槽位 {slot['slot']} 就绪（端口 {slot['port']}），启动并加载游戏用时 {slot['launch_ms']:.0f} 毫秒")
+
+    _save_state(directory, slots)
+    return slots
+
+
+def _terminate(pid):
+    try:
+        os.killpg(pid, signal.SIGTERM)
+    except (ProcessLookupError, PermissionError, AttributeError):
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+
+def stop_pool(config):
+    """关闭浏览器池中的所有浏览器（保留配置目录以便下次复用）"""
+    directory = pool_dir(config)
+    slots = load_state(directory)
+    for slot in slots:
+        _terminate(slot["pid"])
+        try:
+            os.remove(_lock_path(directory, slot))
+        except FileNotFoundError:
+            pass
+    if slots:
+        _save_state(directory, [])
+    return len(slots)
+
+
+def _lock_holder(path):
+    try:
+        with open(path, "r") as f:
+            return int(f.read().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def _try_lock(path):
+    """创建内容为本进程PID的锁文件，已存在时返回False
+
+    先写好临时文件再用os.link放到锁的位置（与O_CREAT|O_EXCL一样，目标已存在时失败），
+    其他进程看到的锁文件总是带有持有进程的PID，不会把刚创建、还没写入PID的锁当作失效的锁。
+    """
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(str(os.getpid()))
+    try:
+        os.link(tmp, path)
+        return True
+    except FileExistsError:
+        return False
+    finally:
+        os.remove(tmp)
+
+
+def _break_stale_lock(path, holder):
+    """原子地移走持有进程holder已退出的锁：先改名为本进程独有的文件名，确认确实是那把失效的锁后再删除
+
+    两个进程同时发现锁失效时只有一个能改名成功，另一个改名失败（FileNotFoundError）后直接重试加锁；
+    改名时锁已经被换成其他进程新取得的锁时，把它放回原处。
+    """
+    stale = f"{path}.stale-{os.getpid()}"
+    try:
+        os.rename(path, stale)
+    except FileNotFoundError:
+        return
+    if _lock_holder(stale) != holder:
+        try:
+            os.link(stale, path)
+        except FileExistsError:
+            pass
+    os.remove(stale)
+
+
+def lease_slot(config):
+    """租用一个空闲且仍在运行的浏览器，没有时返回None"""
+    directory = pool_dir(config)
+    for slot in load_state(directory):
+        if not _pid_alive(slot["pid"]):
+            continue
+        path = _lock_path(directory, slot)
+        for _ in range(2):
+            if _try_lock(path):
+                return slot
+            # 持有进程已退出的锁视为失效
+            holder = _lock_holder(path)
+            if holder and _pid_alive(holder):
+                break
+            _break_stale_lock(path, holder)
+    return None
+
+
+def release_slot(config, slot):
+    """归还租用的浏览器"""
+    try:
+        os.remove(_lock_path(pool_dir(config), slot))
+    except FileNotFoundError:
+        pass
+
+
+def status(config):
+    """浏览器池中各槽位的状态"""
+    directory = pool_dir(config)
+    rows = []
+    for slot in load_state(directory):
+        holder = _lock_holder(_lock_path(directory, slot))
+        rows.append({
+            **slot,
+            "alive": _pid_alive(slot["pid"]),
+            "leased_by": holder if holder and _pid_alive(holder) else None
+        })
+    return rows
+
+
+def main():
+    import argparse
+
+    from .config import load_config_templates
+
+    parser = argparse.ArgumentParser(description="预热浏览器池")
+    parser.add_argument("command", choices=["start", "status", "stop"])
+    parser.add_argument("--size", type=int, default=None, help="浏览器数量")
+    parser.add_argument("--template", default=None, help="使用配置模板中的game/browser设置")
+    args = parser.parse_args()
+
+    config = {"game": {}, "browser": {}}
+    if args.template:
+        config.update(load_config_templates()[args.template]["config"])
+
+    if args.command == "start":
+        slots = start_pool(config, args.size)
+        print(f"✅ 浏览器池共 {len(slots)} 个浏览器，状态文件: {_state_path(pool_dir(config))}")
+    elif args.command == "stop":
+        print(f"🛑 已关闭 {stop_pool(config)} 个浏览器")
+    else:
+        rows = status(config)
+        if not rows:
+            print("浏览器池为空")
+        for row in rows:
+            state = "运行中" if row["alive"] else "已退出"
+            lease = f"被进程 {row['leased_by']} 占用" if row["leased_by"] else "空闲"
+            print(f"槽位 {row['slot']} - 端口 {row['port']} - {state} - {lease} - 启动用时 {row.get('launch_ms', 0):.0f} 毫秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""自适应单局预算：按上一代的适应度分布设定单局得分上限，一代的评估时间有界且可预估
+
+强的个体每局能跑很久，一代的大部分时间花在对排名帮助不大的长对局上。启用后:
+    第一代不设上限（或使用initial_score），之后每代结束时
+    目标上限 = headroom × 本代适应度的quantile百分位数
+    达到上限的个体比例超过max_capped_fraction（选择开始分不出优劣）时，上限至少提高到 当前上限 × growth
+    上限只升不降，且不低于min_score
+得分达到上限的一局立即结束，得分记为上限本身：被截断的对局得分相同，不会因为截断时多跑的几帧分出高下。
+每个个体被截断的局数由各评估器返回，记在个体（capped_runs）、评估日志和代记录episode_budget中；
+上限保存在 检查点目录/episode_budget.json，继续训练时沿用。
+
+配置（config["budget"]，均为可选）:
+    enabled              是否启用，默认False
+    initial_score        第一代的得分上限，默认None（不设上限）
+    quantile             计算上限所用的适应度百分位数（0-100），默认75
+    headroom             上限相对该百分位数的倍数，默认2.0
+    growth               截断过多时上限的最小提高倍数，默认1.5
+    max_capped_fraction  允许达到上限的个体比例，默认0.25
+    min_score            上限的下限，默认100
+"""
+import json
+import os
+
+import numpy as np
+
+DEFAULT_BUDGET = {
+    "initial_score": None,
+    "quantile": 75,
+    "headroom": 2.0,
+    "growth": 1.5,
+    "max_capped_fraction": 0.25,
+    "min_score": 100,
+}
+
+BUDGET_FILE = "episode_budget.json"
+
+
+class EpisodeBudget:
+    """按适应度分布调整的单局得分上限"""
+
+    def __init__(self, config):
+        settings = dict(DEFAULT_BUDGET)
+        settings.update(config.get("budget", {}))
+        self.settings = settings
+        self.max_score = settings["initial_score"]
+        self.path = os.path.join(config["training"].get("checkpoint_dir", "checkpoints"), BUDGET_FILE)
+        self.last_summary = None
+
+    def load(self):
+        """沿用上次训练保存的上限，没有保存过时返回False"""
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, "r") as f:
+            self.max_score = json.load(f)["max_score"]
+        return True
+
+    def save(self):
+        with open(self.path, "w") as f:
+            json.dump({"max_score": self.max_score}, f)
+
+    def is_capped(self, score):
+        """该局得分是否达到了上限"""
+        return self.max_score is not None and score >= self.max_score
+
+    def end_generation(self, fitness_scores, capped_runs):
+        """根据本代的适应度和每个个体被截断的局数确定下一代的上限，返回本代的预算摘要
+
+        只要有一局达到上限就算作达到上限的个体（平均得分可能低于上限，但排名已经受截断影响）。
+        """
+        settings = self.settings
+        current = self.max_score
+        capped = sum(1 for count in capped_runs if count)
+        capped_fraction = capped / len(fitness_scores)
+
+        target = settings["headroom"] * float(np.percentile(fitness_scores, settings["quantile"]))
+        if current is not None and capped_fraction > settings["max_capped_fraction"]:
+            target = max(target, current * settings["growth"])
+        self.max_score = int(round(max(current or 0, target, settings["min_score"])))
+        self.save()
+
+        self.last_summary = {
+            "max_score": current,
+            "capped_individuals": capped,
+            "capped_fraction": capped_fraction,
+            "capped_runs": sum(capped_runs),
+            "capped_per_individual": list(capped_runs),
+            "next_max_score": self.max_score,
+        }
+        return self.last_summary
+
+
+def create_budget(config):
+    """配置启用时创建EpisodeBudget，否则返回None"""
+    if not config.get("budget", {}).get("enabled", False):
+        return None
+    return EpisodeBudget(config)
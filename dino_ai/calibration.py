@@ -0,0 +1,406 @@
+"""模拟器物理校准：用Chrome录制拟合SimulatedDinoGame的物理参数，输出带版本号的物理配置
+
+拟合的内容:
+    跳跃      起跳高度jump_velocity、重力gravity、跳跃中下蹲的重力duck_gravity（按跳跃轨迹网格搜索）
+    速度      initial_speed、acceleration、max_speed（速度曲线 min(初速度 + 加速度×t, 最大速度)）
+    得分      score_scale（得分 ≈ 速度对时间的积分 × 倍数）
+    障碍物    obstacle_step_scale、spawn_x、spawn_gap、翼龙比例、各类障碍物尺寸和高度
+    恐龙      地面高度、碰撞盒尺寸，录制中能观测到下蹲尺寸时还包括下蹲碰撞盒比例
+
+模拟器每步代表step_seconds秒（默认取录制的中位帧间隔，即一次决策的时长），
+使用物理配置时game.delay应设为同样的值。
+
+保真度: 每个分量的R²（跳跃轨迹、速度曲线、得分曲线）和1-KS距离（障碍物间隔分布），
+总分为各分量的平均值，同时给出默认物理参数的得分作为对照。
+
+用法:
+    python -m dino_ai.calibration <录制文件> [--step-seconds 秒] [--output-dir 目录]
+然后在配置中设置 "game": {"physics_profile": "physics_profiles/physics_v1.json"}
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import time
+
+import numpy as np
+
+from .replay import PTERODACTYL_CODES, extract_courses
+from .simulator import DEFAULT_PHYSICS
+from .trace import FLAG_DUCKED_IN_JUMP, FLAG_DUCKING, FLAG_JUMPING, episode_frames, load_trace, read_index
+
+PROFILE_FORMAT_VERSION = 1
+DEFAULT_PROFILE_DIR = "physics_profiles"
+
+# 网格搜索: 每轮每个参数的取值个数和细化轮数
+GRID_POINTS = 25
+GRID_ROUNDS = 4
+
+# 参与拟合的最多样本数（超出时均匀抽样，限制网格搜索的内存）
+MAX_SAMPLES = 4000
+
+
+def grid_search(loss, bounds, points=GRID_POINTS, rounds=GRID_ROUNDS):
+    """由粗到细的向量化网格搜索
+
+    loss接收与bounds同序的参数网格数组（形状相同），返回同形状的损失；
+    每轮在上一轮最优点附近一个格距内重新划分网格。返回(最优参数字典, 最小损失)。
+    """
+    names = list(bounds)
+    ranges = [tuple(bounds[name]) for name in names]
+    best_params, best_loss = None, np.inf
+    for _ in range(rounds):
+        axes = [np.linspace(low, high, points) for low, high in ranges]
+        mesh = np.meshgrid(*axes, indexing="ij")
+        losses = loss(*mesh)
+        index = np.unravel_index(np.nanargmin(losses), losses.shape)
+        if losses[index] <= best_loss:
+            best_loss = float(losses[index])
+            best_params = [float(axis[i]) for axis, i in zip(axes, index)]
+        ranges = []
+        for (low, high), value in zip([(a[0], a[-1]) for a in axes], best_params):
+            cell = (high - low) / (points - 1)
+            ranges.append((max(low, value - cell), min(high, value + cell)))
+    return dict(zip(names, best_params)), best_loss
+
+
+def _subsample(*arrays):
+    """样本过多时均匀抽样"""
+    count = len(arrays[0])
+    if count <= MAX_SAMPLES:
+        return arrays
+    index = np.linspace(0, count - 1, MAX_SAMPLES).astype(np.int64)
+    return tuple(a[index] for a in arrays)
+
+
+def _r_squared(observed, predicted):
+    observed = np.asarray(observed, dtype=np.float64)
+    variance = np.sum((observed - observed.mean()) ** 2)
+    if len(observed) < 2 or variance == 0:
+        return None
+    return float(1 - np.sum((observed - predicted) ** 2) / variance)
+
+
+def _uniform_ks(samples, low, high):
+    """样本与均匀分布U(low, high)的KS距离，low/high可以是网格数组"""
+    samples = np.sort(samples)
+    n = len(samples)
+    low = np.asarray(low, dtype=np.float64)[..., None]
+    high = np.asarray(high, dtype=np.float64)[..., None]
+    cdf = np.clip((samples - low) / np.maximum(high - low, 1e-9), 0, 1)
+    upper = np.arange(1, n + 1) / n - cdf
+    lower = cdf - np.arange(0, n) / n
+    return np.maximum(upper, lower).max(axis=-1)
+
+
+class TraceSamples:
+    """从录制中提取的校准样本（跳跃轨迹、速度/得分曲线、障碍物出现记录、恐龙几何）"""
+
+    def __init__(self, trace_path, min_frames=50):
+        frames = load_trace(trace_path)
+        entries = [e for e in read_index(trace_path) if e["frames"] >= min_frames]
+        self.courses = extract_courses(trace_path, min_frames)
+        self.episodes = len(entries)
+        self.frames = sum(e["frames"] for e in entries)
+
+        intervals = [course.frame_interval for course in self.courses if course.frame_interval > 0]
+        self.frame_interval = float(np.median(intervals)) if intervals else 0.0
+
+        jump_t, jump_h = [], []
+        duck_t, duck_h, duck_onset = [], [], []
+        times, speeds, scores, distances = [], [], [], []
+        standing, ducking = [], []
+        for entry, course in zip(entries, self.courses):
+            episode_data = np.array(episode_frames(frames, entry))
+            t = episode_data["time"].astype(np.float64)
+            height = course.dino_ground_y - episode_data["dino_y"].astype(np.float64)
+            flags = episode_data["dino_flags"]
+            jumping = (flags & FLAG_JUMPING) != 0
+
+            # 速度积分（单位: 速度×秒），用于拟合得分倍数
+            speed = episode_data["speed"].astype(np.float64)
+            integral = np.concatenate(([0.0], np.cumsum(np.diff(t) * (speed[1:] + speed[:-1]) / 2)))
+            times.append(t)
+            speeds.append(speed)
+            scores.append(episode_data["score"].astype(np.float64))
+            distances.append(integral)
+
+            # 逐段提取跳跃轨迹（从起跳帧开始到落地为止）
+            edges = np.diff(np.concatenate(([0], jumping.astype(np.int8), [0])))
+            for start, stop in zip(np.nonzero(edges == 1)[0], np.nonzero(edges == -1)[0]):
+                if stop - start < 3:
+                    continue
+                elapsed = t[start:stop] - t[start]
+                arc_height = height[start:stop]
+                # Chrome只报告ducking，模拟器还会报告has_ducked_in_jump
+                ducked = np.nonzero(flags[start:stop] & (FLAG_DUCKING | FLAG_DUCKED_IN_JUMP))[0]
+                if len(ducked):
+                    duck_t.append(elapsed)
+                    duck_h.append(arc_height)
+                    duck_onset.append(np.full(stop - start, elapsed[ducked[0]]))
+                else:
+                    jump_t.append(elapsed)
+                    jump_h.append(arc_height)
+
+            grounded = ~jumping
+            ducking_frames = grounded & ((flags & FLAG_DUCKING) != 0)
+            standing_frames = grounded & ((flags & FLAG_DUCKING) == 0)
+            if ducking_frames.any():
+                ducking.append(np.stack([episode_data["dino_width"][ducking_frames],
+                                         episode_data["dino_height"][ducking_frames]], axis=1))
+            if standing_frames.any():
+                standing.append(np.stack([episode_data["dino_width"][standing_frames],
+                                          episode_data["dino_height"][standing_frames]], axis=1))
+
+        def join(parts):
+            return np.concatenate(parts).astype(np.float64) if parts else np.zeros(0)
+
+        self.jump_time, self.jump_height = join(jump_t), join(jump_h)
+        self.duck_time, self.duck_height, self.duck_onset = join(duck_t), join(duck_h), join(duck_onset)
+        self.time, self.speed, self.score, self.speed_integral = join(times), join(speeds), join(scores), join(distances)
+        self.standing_size = np.concatenate(standing) if standing else np.zeros((0, 2))
+        self.ducking_size = np.concatenate(ducking) if ducking else np.zeros((0, 2))
+
+        # 障碍物出现记录
+        gaps = [np.diff(course.spawn_time) for course in self.courses if course.obstacle_count > 1]
+        self.spawn_gaps = join(gaps)
+        self.spawn_x = join([course.spawn_x for course in self.courses])
+        self.obstacle_type = np.concatenate([course.obstacle_type for course in self.courses]) if self.courses else np.zeros(0, dtype=np.int64)
+        self.obstacle_y = join([course.obstacle_y for course in self.courses])
+        self.obstacle_width = join([course.obstacle_width for course in self.courses])
+        self.obstacle_height = join([course.obstacle_height for course in self.courses])
+        self.pixels_per_speed_second = [course.pixels_per_speed_second for course in self.courses]
+
+
+def _jump_heights(physics, elapsed, step_seconds, velocity=None, gravity=None):
+    """模拟器跳跃的离地高度（像素）: 第k步为 scale×(v - g×k)"""
+    velocity = physics["jump_velocity"] if velocity is None else velocity
+    gravity = physics["gravity"] if gravity is None else gravity
+    steps = elapsed / step_seconds
+    return physics["jump_pixel_scale"] * np.clip(np.asarray(velocity)[..., None] - np.asarray(gravity)[..., None] * steps, 0, None)
+
+
+def _ducked_jump_heights(physics, elapsed, onset, step_seconds, duck_gravity=None):
+    """跳跃中下蹲的离地高度：下蹲前按gravity下降，之后按duck_gravity下降"""
+    duck_gravity = physics["duck_gravity"] if duck_gravity is None else duck_gravity
+    before = np.minimum(elapsed, onset) / step_seconds
+    after = np.maximum(elapsed - onset, 0) / step_seconds
+    remaining = physics["jump_velocity"] - physics["gravity"] * before - np.asarray(duck_gravity)[..., None] * after
+    return physics["jump_pixel_scale"] * np.clip(remaining, 0, None)
+
+
+def _speed_curve(physics, elapsed, step_seconds):
+    """模拟器速度随时间的变化"""
+    if physics["acceleration"] is not None:
+        return np.minimum(physics["initial_speed"] + physics["acceleration"] * elapsed, physics["max_speed"])
+
+    # 旧规则依赖逐步的得分，直接按步模拟
+    steps = int(np.max(elapsed, initial=0) / step_seconds) + 2
+    speed_by_step = np.empty(steps)
+    speed, score = physics["initial_speed"], 0.0
+    for k in range(steps):
+        score += speed * step_seconds * physics["score_scale"]
+        if int(score) % physics["speed_increment_interval"] == 0 and int(score) > 0:
+            speed = min(speed + physics["speed_increment"], physics["max_speed"])
+        speed_by_step[k] = speed
+    return speed_by_step[np.minimum((elapsed / step_seconds).astype(np.int64), steps - 1)]
+
+
+def _value_range(values, default, integer=True):
+    """取5%~95%分位数作为取值范围，没有样本时使用默认值"""
+    if len(values) == 0:
+        return list(default)
+    low, high = np.percentile(values, [5, 95])
+    if integer:
+        return [int(round(low)), int(round(high))]
+    return [float(low), float(high)]
+
+
+def fit_physics(samples, step_seconds, base=None):
+    """拟合物理参数，返回(物理参数, 拟合过的参数名列表)"""
+    physics = dict(base or DEFAULT_PHYSICS)
+    fitted = []
+
+    if len(samples.jump_time):
+        elapsed, observed = _subsample(samples.jump_time, samples.jump_height)
+        params, _ = grid_search(
+            lambda v, g: np.mean((_jump_heights(physics, elapsed, step_seconds, v, g) - observed) ** 2, axis=-1),
+            {"jump_velocity": (1.0, 60.0), "gravity": (0.01, 10.0)})
+        physics.update(params)
+        fitted += list(params)
+
+    if len(samples.duck_time):
+        elapsed, observed, onset = _subsample(samples.duck_time, samples.duck_height, samples.duck_onset)
+        params, _ = grid_search(
+            lambda gd: np.mean((_ducked_jump_heights(physics, elapsed, onset, step_seconds, gd) - observed) ** 2, axis=-1),
+            {"duck_gravity": (physics["gravity"], physics["gravity"] * 10)})
+        physics.update(params)
+        fitted += list(params)
+
+    if len(samples.time) and samples.speed.max() > 0:
+        elapsed, observed = _subsample(samples.time, samples.speed)
+        max_speed = float(np.percentile(samples.speed, 99))
+        span = max(float(elapsed.max()), 1e-3)
+        params, _ = grid_search(
+            lambda s0, a: np.mean((np.minimum(s0[..., None] + a[..., None] * elapsed, max_speed) - observed) ** 2, axis=-1),
+            {"initial_speed": (float(observed.min()) * 0.5, max_speed),
+             "acceleration": (0.0, 2 * (max_speed - float(observed.min())) / span + 1e-6)})
+        physics.update(params)
+        physics["max_speed"] = max_speed
+        fitted += list(params) + ["max_speed"]
+
+        # 得分 ≈ score_scale × ∫速度dt（最小二乘闭式解）
+        denominator = float(np.sum(samples.speed_integral ** 2))
+        if denominator > 0:
+            physics["score_scale"] = float(np.sum(samples.speed_integral * samples.score) / denominator)
+            fitted.append("score_scale")
+
+    if samples.pixels_per_speed_second:
+        # 每步移动 速度×(像素/速度秒)×步长 像素
+        physics["obstacle_step_scale"] = float(np.median(samples.pixels_per_speed_second)) * step_seconds
+        fitted.append("obstacle_step_scale")
+
+    if len(samples.spawn_gaps) >= 5:
+        gaps = samples.spawn_gaps
+        upper = float(gaps.max()) * 1.5
+        params, _ = grid_search(
+            lambda low, width: _uniform_ks(gaps, low, low + width),
+            {"low": (0.0, float(gaps.min())), "width": (1e-3, upper)})
+        physics["spawn_gap"] = [params["low"], params["low"] + params["width"]]
+        fitted.append("spawn_gap")
+
+    if len(samples.spawn_x):
+        physics["spawn_x"] = float(np.median(samples.spawn_x))
+        is_pterodactyl = np.isin(samples.obstacle_type, PTERODACTYL_CODES)
+        physics["pterodactyl_probability"] = float(is_pterodactyl.mean())
+        cactus = ~is_pterodactyl
+        physics["cactus_width"] = _value_range(samples.obstacle_width[cactus], physics["cactus_width"])
+        physics["cactus_height"] = _value_range(samples.obstacle_height[cactus], physics["cactus_height"])
+        physics["pterodactyl_width"] = _value_range(samples.obstacle_width[is_pterodactyl], physics["pterodactyl_width"])
+        physics["pterodactyl_height"] = _value_range(samples.obstacle_height[is_pterodactyl], physics["pterodactyl_height"])
+        if is_pterodactyl.any():
+            # 翼龙高度通常只有几档，取出现比例不低于10%的取整高度
+            heights, counts = np.unique(np.round(samples.obstacle_y[is_pterodactyl]), return_counts=True)
+            common = heights[counts >= 0.1 * counts.sum()]
+            physics["pterodactyl_y"] = [int(h) for h in (common if len(common) else heights[[np.argmax(counts)]])]
+        fitted += ["spawn_x", "pterodactyl_probability", "cactus_width", "cactus_height",
+                   "pterodactyl_width", "pterodactyl_height", "pterodactyl_y"]
+
+    if samples.courses:
+        physics["ground_y"] = float(np.median([c.dino_ground_y for c in samples.courses]))
+        physics["dino_x"] = float(np.median([c.dino_x for c in samples.courses]))
+        physics["dino_width"] = float(np.median([c.dino_width for c in samples.courses]))
+        physics["dino_height"] = float(np.median([c.dino_height for c in samples.courses]))
+        fitted += ["ground_y", "dino_x", "dino_width", "dino_height"]
+
+    # 只有录制中下蹲时的尺寸确实变化才能观测到下蹲碰撞盒
+    if len(samples.ducking_size) and len(samples.standing_size):
+        standing = np.median(samples.standing_size, axis=0)
+        ducking = np.median(samples.ducking_size, axis=0)
+        if np.all(standing > 0) and np.any(np.abs(ducking - standing) > 1):
+            physics["duck_width_scale"] = float(ducking[0] / standing[0])
+            physics["duck_height_scale"] = float(ducking[1] / standing[1])
+            fitted += ["duck_width_scale", "duck_height_scale"]
+
+    return physics, fitted
+
+
+def fidelity(samples, physics, step_seconds):
+    """各分量的保真度和总分（总分为可计算分量的平均值，各分量截断到[0, 1]）"""
+    components = {}
+    if len(samples.jump_time):
+        components["jump"] = _r_squared(samples.jump_height, _jump_heights(physics, samples.jump_time, step_seconds))
+    if len(samples.duck_time):
+        components["duck_jump"] = _r_squared(
+            samples.duck_height, _ducked_jump_heights(physics, samples.duck_time, samples.duck_onset, step_seconds))
+    if len(samples.time):
+        components["speed"] = _r_squared(samples.speed, _speed_curve(physics, samples.time, step_seconds))
+        components["score"] = _r_squared(samples.score, samples.speed_integral * physics["score_scale"])
+    if len(samples.spawn_gaps) >= 5:
+        low, high = physics["spawn_gap"]
+        components["spawn_gap"] = float(1 - _uniform_ks(samples.spawn_gaps, low, high))
+
+    values = [min(max(v, 0.0), 1.0) for v in components.values() if v is not None]
+    return {
+        "overall": float(np.mean(values)) if values else None,
+        "components": components
+    }
+
+
+def next_profile_path(output_dir):
+    """按已有文件决定下一个版本号: physics_v{N}.json"""
+    versions = [0]
+    for path in glob.glob(os.path.join(output_dir, "physics_v*.json")):
+        match = re.search(r"physics_v(\d+)\.json$", path)
+        if match:
+            versions.append(int(match.group(1)))
+    version = max(versions) + 1
+    return os.path.join(output_dir, f"physics_v{version}.json"), version
+
+
+def calibrate(trace_path, step_seconds=None, output_dir=DEFAULT_PROFILE_DIR, min_frames=50):
+    """拟合物理参数并写出新版本的物理配置，返回(配置路径, 配置内容)"""
+    samples = TraceSamples(trace_path, min_frames)
+    if not samples.courses:
+        raise ValueError(f"录制文件中没有帧数不少于 {min_frames} 的对局")
+    step_seconds = step_seconds or samples.frame_interval or 0.01
+
+    physics, fitted = fit_physics(samples, step_seconds)
+    os.makedirs(output_dir, exist_ok=True)
+    path, version = next_profile_path(output_dir)
+    profile = {
+        "format_version": PROFILE_FORMAT_VERSION,
+        "version": version,
+        "created": time.strftime("%Y%m%d_%H%M%S"),
+        "step_seconds": step_seconds,
+        "source": {
+            "trace": os.path.abspath(trace_path),
+            "episodes": samples.episodes,
+            "frames": samples.frames,
+            "jump_frames": int(len(samples.jump_time)),
+            "obstacles": int(len(samples.spawn_x))
+        },
+        "fitted": fitted,
+        "physics": physics,
+        "fidelity": {
+            "calibrated": fidelity(samples, physics, step_seconds),
+            "default": fidelity(samples, DEFAULT_PHYSICS, step_seconds)
+        }
+    }
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(profile, f, indent=2)
+    os.replace(tmp, path)
+    return path, profile
+
+
+def _format_score(value):
+    return "-" if value is None else f"{value:.3f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="用Chrome录制校准模拟器物理参数")
+    parser.add_argument("trace", help="录制文件路径")
+    parser.add_argument("--step-seconds", type=float, default=None, help="模拟器每步代表的秒数，默认取录制的中位帧间隔")
+    parser.add_argument("--output-dir", default=DEFAULT_PROFILE_DIR, help="物理配置输出目录")
+    parser.add_argument("--min-frames", type=int, default=50, help="参与校准的对局最少帧数")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    path, profile = calibrate(args.trace, args.step_seconds, args.output_dir, args.min_frames)
+    source = profile["source"]
+    print(f"📐 使用 {source['episodes']} 局 / {source['frames']} 帧完成校准，用时 {time.perf_counter() - start:.2f} 秒")
+    print(f"💾 物理配置已保存: {path}（每步 {profile['step_seconds']:.4f} 秒）")
+
+    calibrated, default = profile["fidelity"]["calibrated"], profile["fidelity"]["default"]
+    print(f"{'分量':<12} {'校准后':>8} {'默认':>8}")
+    for name in calibrated["components"]:
+        print(f"{name:<12} {_format_score(calibrated['components'][name]):>8} "
+              f"{_format_score(default['components'].get(name)):>8}")
+    print(f"{'总分':<12} {_format_score(calibrated['overall']):>8} {_format_score(default['overall']):>8}")
+    print(f"在配置中设置 \"game\": {{\"physics_profile\": \"{path}\", \"delay\": {profile['step_seconds']:.4f}}} 即可使用")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""检查点工具（仅依赖标准库，查看检查点时无需加载numpy或浏览器）"""
+import json
+import os
+import time
+
+
+def find_checkpoint_files(checkpoint_dir):
+    """返回检查点目录中的所有检查点文件名"""
+    return [f for f in os.listdir(checkpoint_dir) if f.startswith("checkpoint_") and f.endswith(".json")]
+
+
+def write_checkpoint(checkpoint_dir, checkpoint_data):
+    """写入检查点文件，返回文件路径"""
+    timestamp = checkpoint_data.get("timestamp") or time.strftime("%Y%m%d_%H%M%S")
+    checkpoint_data["timestamp"] = timestamp
+    checkpoint_file = os.path.join(checkpoint_dir, f"checkpoint_gen_{checkpoint_data['generation']}_{timestamp}.json")
+
+    with open(checkpoint_file, "w") as f:
+        json.dump(checkpoint_data, f)
+
+    return checkpoint_file
+
+
+def read_checkpoint(checkpoint_path):
+    """读取检查点文件内容"""
+    with open(checkpoint_path, "r") as f:
+        return json.load(f)
+
+
+def latest_checkpoint_file(checkpoint_dir):
+    """按创建时间返回最新的检查点文件名，没有时返回None"""
+    checkpoint_files = find_checkpoint_files(checkpoint_dir)
+    if not checkpoint_files:
+        return None
+    return max(checkpoint_files, key=lambda x: os.path.getctime(os.path.join(checkpoint_dir, x)))
+
+
+def cleanup_old_checkpoints(checkpoint_dir, max_checkpoints):
+    """清理旧的检查点文件，只保留最新的N个，返回被删除的文件名"""
+    checkpoint_files = find_checkpoint_files(checkpoint_dir)
+    checkpoint_files.sort(key=lambda x: os.path.getctime(os.path.join(checkpoint_dir, x)), reverse=True)
+
+    removed = []
+    for old_file in checkpoint_files[max_checkpoints:]:
+        os.remove(os.path.join(checkpoint_dir, old_file))
+        removed.append(old_file)
+    return removed
+
+
+def list_checkpoints(checkpoint_dir):
+    """列出检查点摘要（代数、最佳适应度、时间），按代数从新到旧排序"""
+    checkpoints = []
+    for file in find_checkpoint_files(checkpoint_dir):
+        file_path = os.path.join(checkpoint_dir, file)
+        try:
+            data = read_checkpoint(file_path)
+            checkpoints.append({
+                "file": file,
+                "generation": data["generation"],
+                "best_fitness": data["best_fitness"],
+                "timestamp": data.get("timestamp", "未知")
+            })
+        except:
+            continue
+
+    checkpoints.sort(key=lambda x: x["generation"], reverse=True)
+    return checkpoints
+
+
+def main():
+    """命令行查看检查点: python -m dino_ai.checkpoints [检查点目录]"""
+    import sys
+    checkpoint_dir = sys.argv[1] if len(sys.argv) > 1 else "checkpoints"
+    if not os.path.isdir(checkpoint_dir):
+        print(f"检查点目录不存在: {checkpoint_dir}")
+        return
+
+    checkpoints = list_checkpoints(checkpoint_dir)
+    if not checkpoints:
+        print("没有找到检查点文件")
+        return
+
+    for cp in checkpoints:
+        print(f"第{cp['generation']}代 - 最佳适应度: {cp['best_fitness']:.2f} - 时间: {cp['timestamp']} - {cp['file']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Chrome启动参数与可执行文件/ChromeDriver路径解析，解析结果缓存在本地文件中（仅依赖标准库）
+
+配置（config["browser"]，均为可选）:
+    driver_path     直接指定ChromeDriver路径，跳过解析
+    chrome_binary   直接指定Chrome可执行文件路径（浏览器池直接启动Chrome时使用）
+    cache_file      路径解析缓存文件，默认 ~/.cache/dino_ai/drivers.json
+    cache_days      缓存有效天数，默认7
+"""
+import json
+import os
+import shutil
+import time
+
+from .metrics import training_metrics
+
+GAME_URL = "https://chromedino.com/"
+FALLBACK_GAME_URL = "chrome://dino"
+
+# 原先写死的本地ChromeDriver路径，仍作为候选之一
+LEGACY_LOCAL_DRIVER = "/Users/zhangyunjian/felixspace/rat/python/遗传/谷歌小恐龙AI/chromedriver-mac-arm64/chromedriver"
+
+CHROME_CANDIDATES = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome")
+MAC_CHROME = "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
+
+DEFAULT_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "dino_ai", "drivers.json")
+
+USER_AGENT = ("Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/139.0.0.0 Safari/537.36")
+
+# Chrome启动参数（不含调试端口和配置目录）
+# 不使用--headless，因为chrome://dino在headless模式下无法访问
+CHROME_ARGUMENTS = [
+    "--mute-audio",
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--disable-web-security",
+    "--allow-running-insecure-content",
+    "--disable-extensions",
+    "--disable-plugins",
+    "--disable-images",
+    "--disable-background-timer-throttling",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-renderer-backgrounding",
+    "--disable-features=TranslateUI",
+    "--disable-ipc-flooding-protection",
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--disable-default-apps",
+    "--disable-popup-blocking",  # 多标签页评估需要用window.open打开游戏窗口
+    "--disable-blink-features=AutomationControlled",
+    "--disable-features=VizDisplayCompositor",
+    f"--user-agent={USER_AGENT}",
+]
+
+
+def _is_executable(path):
+    return bool(path) and os.path.isfile(path) and os.access(path, os.X_OK)
+
+
+def _cache_file(browser_config):
+    return browser_config.get("cache_file", DEFAULT_CACHE_FILE)
+
+
+def _load_cache(browser_config):
+    try:
+        with open(_cache_file(browser_config), "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _save_cache(browser_config, cache):
+    path = _cache_file(browser_config)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(cache, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _cached(browser_config, key):
+    """读取未过期且文件仍然存在的缓存路径"""
+    entry = _load_cache(browser_config).get(key)
+    if not entry:
+        return None
+    max_age = browser_config.get("cache_days", 7) * 86400
+    if time.time() - entry.get("resolved_at", 0) > max_age or not _is_executable(entry.get("path")):
+        return None
+    return entry["path"]
+
+
+def _remember(browser_config, key, path, source):
+    cache = _load_cache(browser_config)
+    cache[key] = {"path": path, "source": source, "resolved_at": time.time()}
+    try:
+        _save_cache(browser_config, cache)
+    except OSError as e:
+        print(f"⚠️ 无法写入路径缓存: {e}")
+
+
+def forget(browser_config, key):
+    """缓存的路径不可用时删除对应条目"""
+    cache = _load_cache(browser_config)
+    if cache.pop(key, None) is not None:
+        _save_cache(browser_config, cache)
+
+
+def resolve_driver_path(browser_config, refresh=False):
+    """返回(ChromeDriver路径, 来源)
+
+    依次使用: 配置指定的路径、本地缓存、原先的本地路径、webdriver-manager（只在前面都不可用时联网解析）。
+    refresh为True时跳过缓存重新解析。
+    """
+    configured = browser_config.get("driver_path")
+    if configured:
+        return configured, "config"
+
+    cached = None if refresh else _cached(browser_config, "chromedriver")
+    training_metrics.cache_lookup("driver_path", bool(cached))
+    if cached:
+        return cached, "cache"
+
+    if _is_executable(LEGACY_LOCAL_DRIVER):
+        _remember(browser_config, "chromedriver", LEGACY_LOCAL_DRIVER, "local")
+        return LEGACY_LOCAL_DRIVER, "local"
+
+    # webdriver-manager每次调用都会检查版本，结果缓存后下次启动不再调用
+    from webdriver_manager.chrome import ChromeDriverManager
+    path = ChromeDriverManager().install()
+    _remember(browser_config, "chromedriver", path, "webdriver-manager")
+    return path, "webdriver-manager"
+
+
+def resolve_chrome_binary(browser_config):
+    """返回Chrome可执行文件路径，找不到时返回None"""
+    configured = browser_config.get("chrome_binary")
+    if configured:
+        return configured
+
+    cached = _cached(browser_config, "chrome")
+    if cached:
+        return cached
+
+    for name in CHROME_CANDIDATES:
+        path = shutil.which(name)
+        if path:
+            _remember(browser_config, "chrome", path, "which")
+            return path
+    if _is_executable(MAC_CHROME):
+        _remember(browser_config, "chrome", MAC_CHROME, "default")
+        return MAC_CHROME
+    return None
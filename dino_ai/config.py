@@ -0,0 +1,727 @@
+"""配置加载、模板管理与交互式配置选择（仅依赖标准库）"""
+import json
+import os
+
+# 配置模板文件位于项目根目录（包目录的上一级）
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATES_PATH = os.path.join(PROJECT_ROOT, 'config_templates.json')
+
+# 加载配置文件
+def validate_config(config):
+    """验证配置参数的有效性"""
+    errors = []
+    
+    # 验证训练参数
+    training = config.get("training", {})
+    if training.get("population_size", 0) < 5:
+        errors.append("种群大小至少为5")
+    if training.get("generations", 0) < 1:
+        errors.append("训练代数至少为1")
+    if training.get("runs_per_individual", 0) < 1:
+        errors.append("每个个体运行次数至少为1")
+    
+    # 验证遗传算法参数
+    genetic = config.get("genetic", {})
+    if not (0 <= genetic.get("mutation_rate", 0) <= 1):
+        errors.append("变异率必须在0-1之间")
+    if genetic.get("mutation_scale", 0) <= 0:
+        errors.append("变异幅度必须大于0")
+    if genetic.get("tournament_size", 0) < 2:
+        errors.append("锦标赛大小至少为2")
+    if genetic.get("elite_count", 0) < 1:
+        errors.append("精英个体数量至少为1")
+    
+    # 验证游戏参数
+    game = config.get("game", {})
+    if game.get("delay", 0) < 0:
+        errors.append("游戏延迟不能为负数")
+    if game.get("decision_hz") is not None and game["decision_hz"] <= 0:
+        errors.append("决策频率必须大于0")
+    if game.get("physics_profile") and not os.path.exists(game["physics_profile"]):
+        errors.append(f"物理配置文件不存在: {game['physics_profile']}")
+    
+    # 验证并行评估参数
+    if config.get("parallel", {}).get("workers", 0) < 0:
+        errors.append("并行工作进程数不能为负数")
+    
+    # 验证浏览器参数
+    if config.get("browser", {}).get("tabs", 1) < 1:
+        errors.append("游戏窗口数至少为1")
+    
+    # 验证感知参数
+    perception = config.get("perception", {})
+    if perception.get("backend", "js") not in ("js", "pixels"):
+        errors.append("感知后端必须是js或pixels")
+    if perception.get("downsample", 2) < 1:
+        errors.append("降采样倍数至少为1")
+    if len(perception.get("roi", [0, 0, 1, 1])) != 4:
+        errors.append("感知区域roi必须是[x, y, 宽, 高]")
+    
+    # 验证优化引擎参数
+    optimizer = config.get("optimizer", {})
+    if optimizer.get("engine", "ga") not in ("ga", "cmaes"):
+        errors.append("优化引擎必须是ga或cmaes")
+    if optimizer.get("sigma", 0.5) <= 0:
+        errors.append("CMA-ES初始步长必须大于0")
+    
+    # 验证代理模型参数
+    surrogate = config.get("surrogate", {})
+    if surrogate.get("oversample", 3) < 1:
+        errors.append("代理模型候选倍数至少为1")
+    if not (0 < surrogate.get("evaluate_fraction", 0.5) <= 1):
+        errors.append("代理模型评估比例必须在0-1之间")
+    if not (0 <= surrogate.get("explore_fraction", 0.25) <= 1):
+        errors.append("代理模型探索比例必须在0-1之间")
+    
+    # 验证性能剖析参数
+    profiling = config.get("profiling", {})
+    if profiling.get("interval", 1) < 1 or profiling.get("max_profiles", 10) < 0:
+        errors.append("剖析间隔至少为1，保留的剖析代数不能为负")
+    
+    # 验证录制赛道预筛选参数
+    replay = config.get("replay", {})
+    if replay.get("oversample", 2) < 1:
+        errors.append("录制赛道预筛选候选倍数至少为1")
+    if not (0 < replay.get("evaluate_fraction", 0.5) <= 1):
+        errors.append("录制赛道预筛选评估比例必须在0-1之间")
+    if replay.get("min_frames", 50) < 2:
+        errors.append("录制赛道最少帧数至少为2")
+    
+    # 验证新颖性搜索参数
+    novelty = config.get("novelty", {})
+    if not (0 <= novelty.get("weight", 0.3) <= 1) or not (0 <= novelty.get("stagnation_weight", 0.6) <= 1):
+        errors.append("新颖性权重必须在0-1之间")
+    if novelty.get("k", 15) < 1:
+        errors.append("新颖性最近邻数量至少为1")
+    if novelty.get("archive_size", 100000) < 1:
+        errors.append("新颖性存档容量至少为1")
+    
+    # 验证指标服务参数
+    if not (0 <= config.get("metrics", {}).get("port", 9109) <= 65535):
+        errors.append("指标服务端口必须在0-65535之间")
+    
+    # 验证决策查找表参数
+    policy_table = config.get("policy", {}).get("table")
+    if policy_table is not None and not os.path.isfile(policy_table):
+        errors.append(f"决策查找表文件不存在: {policy_table}")
+    
+    # 验证推理服务参数
+    inference = config.get("inference", {})
+    if inference.get("max_batch", 256) < 1:
+        errors.append("推理服务每批请求数至少为1")
+    if inference.get("max_wait_ms", 1.0) < 0:
+        errors.append("推理服务凑批等待时间不能为负数")
+    
+    # 验证分布式评估参数
+    distributed = config.get("distributed", {})
+    if distributed.get("prefetch", 2) < 1:
+        errors.append("分布式评估每个工作进程的预取任务数至少为1")
+    if distributed.get("heartbeat_timeout", 10.0) <= distributed.get("heartbeat_interval", 1.0):
+        errors.append("分布式评估的失联判定时间必须大于心跳间隔")
+    if not (0 <= distributed.get("port", 9120) <= 65535):
+        errors.append("分布式评估协调器端口必须在0-65535之间")
+    
+    # 验证浏览器监护参数
+    supervisor = config.get("supervisor", {})
+    if supervisor.get("call_timeout", 20.0) <= 4:
+        errors.append("浏览器监护的调用超时必须大于4秒（游戏重启本身需要等待约4秒）")
+    if supervisor.get("script_timeout", 5.0) <= 0 or supervisor.get("health_interval", 2.0) <= 0:
+        errors.append("浏览器监护的脚本超时和健康检查间隔必须大于0")
+    if supervisor.get("max_episode_retries", 3) < 0:
+        errors.append("浏览器监护的每局重试次数不能为负数")
+    
+    # 验证评估日志参数
+    journal_path = config.get("journal", {}).get("path")
+    if journal_path and os.path.isdir(journal_path):
+        errors.append("评估日志路径必须是文件，不能是目录")
+    
+    # 验证单局预算参数
+    budget = config.get("budget", {})
+    if not (0 <= budget.get("quantile", 75) <= 100):
+        errors.append("单局预算的适应度百分位数必须在0-100之间")
+    if budget.get("headroom", 2.0) <= 0 or budget.get("growth", 1.5) < 1:
+        errors.append("单局预算的上限倍数必须大于0，提高倍数不能小于1")
+    if not (0 <= budget.get("max_capped_fraction", 0.25) <= 1):
+        errors.append("单局预算允许达到上限的个体比例必须在0-1之间")
+    if budget.get("min_score", 100) <= 0:
+        errors.append("单局预算的最低上限必须大于0")
+    
+    # 验证日志参数
+    logging_config = config.get("logging", {})
+    if str(logging_config.get("level", "WARNING")).upper() not in ("DEBUG", "INFO", "WARNING", "ERROR"):
+        errors.append("日志级别必须是DEBUG/INFO/WARNING/ERROR之一")
+    if logging_config.get("rate_limit", 5) < 0:
+        errors.append("日志限流次数不能为负数")
+    
+    return errors
+
+def load_config_templates():
+    """加载配置模板"""
+    try:
+        templates_path = TEMPLATES_PATH
+        with open(templates_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        print("配置模板文件不存在")
+        return {}
+    except Exception as e:
+        print(f"加载配置模板时出错: {e}")
+        return {}
+
+def save_custom_config(config_name, config, description=None):
+    """保存自定义配置到模板文件"""
+    try:
+        templates = load_config_templates()
+        
+        # 添加新的自定义配置
+        templates[config_name] = {
+            "description": description if description else "用户自定义配置",
+            "config": config
+        }
+        
+        # 保存到文件
+        templates_path = TEMPLATES_PATH
+        with open(templates_path, 'w', encoding='utf-8') as f:
+            json.dump(templates, f, indent=4, ensure_ascii=False)
+        
+        print(f"✅ 配置 '{config_name}' 已保存到模板文件")
+        return True
+    except Exception as e:
+        print(f"❌ 保存配置失败: {e}")
+        return False
+
+def delete_config_template(config_name):
+    """删除配置模板"""
+    try:
+        templates = load_config_templates()
+        
+        if config_name not in templates:
+            print(f"❌ 配置 '{config_name}' 不存在")
+            return False
+        
+        # 删除配置
+        del templates[config_name]
+        
+        # 保存到文件
+        templates_path = TEMPLATES_PATH
+        with open(templates_path, 'w', encoding='utf-8') as f:
+            json.dump(templates, f, indent=4, ensure_ascii=False)
+        
+        print(f"✅ 配置 '{config_name}' 已删除")
+        return True
+    except Exception as e:
+        print(f"❌ 删除配置失败: {e}")
+        return False
+
+def get_user_input_config():
+    """让用户手动输入自定义配置参数"""
+    print("\n=== 自定义配置输入 ===")
+    print("请输入训练参数（直接回车使用默认值）:")
+    
+    # 从配置模板中获取标准配置作为默认值
+    try:
+        with open('config_templates.json', 'r', encoding='utf-8') as f:
+            templates = json.load(f)
+            standard_config = templates["标准训练"]["config"]
+    except (FileNotFoundError, KeyError):
+        # 如果无法加载配置文件，使用硬编码的标准配置
+        standard_config = {
+            "training": {
+                "population_size": 20,
+                "generations": 20,
+                "runs_per_individual": 3,
+                "save_file": "dino_population.json",
+                "checkpoint_interval": 5,
+                "checkpoint_dir": "checkpoints",
+                "max_checkpoints": 10
+            },
+            "genetic": {
+                "mutation_rate": 0.1,
+                "mutation_scale": 0.2,
+                "tournament_size": 3,
+                "elite_count": 3,
+                "elite_diversity_threshold": 0.1
+            },
+            "game": {
+                "window_width": 800,
+                "window_height": 600,
+                "delay": 0.01,
+                "simulation_mode": False
+            }
+        }
+    
+    config = {
+        "training": {},
+        "genetic": {},
+        "game": {}
+    }
+    
+    # 训练参数
+    print("\n--- 训练参数 ---")
+    try:
+        default_pop_size = standard_config["training"]["population_size"]
+        pop_size = input(f"种群大小 (默认: {default_pop_size}): ").strip()
+        config["training"]["population_size"] = int(pop_size) if pop_size else default_pop_size
+        
+        default_generations = standard_config["training"]["generations"]
+        generations = input(f"训练代数 (默认: {default_generations}): ").strip()
+        config["training"]["generations"] = int(generations) if generations else default_generations
+        
+        default_runs = standard_config["training"]["runs_per_individual"]
+        runs = input(f"每个个体运行次数 (默认: {default_runs}): ").strip()
+        config["training"]["runs_per_individual"] = int(runs) if runs else default_runs
+        
+        default_save_file = standard_config["training"]["save_file"]
+        save_file = input(f"保存文件名 (默认: {default_save_file}): ").strip()
+        config["training"]["save_file"] = save_file if save_file else default_save_file
+        
+        default_checkpoint_interval = standard_config["training"]["checkpoint_interval"]
+        checkpoint_interval = input(f"检查点保存间隔 (默认: {default_checkpoint_interval}): ").strip()
+        config["training"]["checkpoint_interval"] = int(checkpoint_interval) if checkpoint_interval else default_checkpoint_interval
+        
+        config["training"]["checkpoint_dir"] = standard_config["training"]["checkpoint_dir"]
+        config["training"]["max_checkpoints"] = standard_config["training"]["max_checkpoints"]
+        
+    except ValueError:
+        print("输入格式错误，使用默认训练参数")
+        config["training"] = standard_config["training"].copy()
+    
+    # 遗传算法参数
+    print("\n--- 遗传算法参数 ---")
+    try:
+        default_mutation_rate = standard_config["genetic"]["mutation_rate"]
+        mutation_rate = input(f"变异率 (0.0-1.0, 默认: {default_mutation_rate}): ").strip()
+        config["genetic"]["mutation_rate"] = float(mutation_rate) if mutation_rate else default_mutation_rate
+        
+        default_mutation_scale = standard_config["genetic"]["mutation_scale"]
+        mutation_scale = input(f"变异幅度 (0.0-1.0, 默认: {default_mutation_scale}): ").strip()
+        config["genetic"]["mutation_scale"] = float(mutation_scale) if mutation_scale else default_mutation_scale
+        
+        default_tournament_size = standard_config["genetic"]["tournament_size"]
+        tournament_size = input(f"锦标赛大小 (默认: {default_tournament_size}): ").strip()
+        config["genetic"]["tournament_size"] = int(tournament_size) if tournament_size else default_tournament_size
+        
+        default_elite_count = standard_config["genetic"]["elite_count"]
+        elite_count = input(f"精英个体数量 (默认: {default_elite_count}): ").strip()
+        config["genetic"]["elite_count"] = int(elite_count) if elite_count else default_elite_count
+        
+        default_elite_diversity = standard_config["genetic"]["elite_diversity_threshold"]
+        elite_diversity = input(f"精英多样性阈值 (0.0-1.0, 默认: {default_elite_diversity}): ").strip()
+        config["genetic"]["elite_diversity_threshold"] = float(elite_diversity) if elite_diversity else default_elite_diversity
+        
+    except ValueError:
+        print("输入格式错误，使用默认遗传算法参数")
+        config["genetic"] = standard_config["genetic"].copy()
+    
+    # 游戏参数
+    print("\n--- 游戏参数 ---")
+    try:
+        default_delay = standard_config["game"]["delay"]
+        delay = input(f"游戏延迟 (秒, 默认: {default_delay}): ").strip()
+        config["game"]["delay"] = float(delay) if delay else default_delay
+        
+        config["game"]["window_width"] = standard_config["game"]["window_width"]
+        config["game"]["window_height"] = standard_config["game"]["window_height"]
+        config["game"]["simulation_mode"] = standard_config["game"]["simulation_mode"]
+        
+    except ValueError:
+        print("输入格式错误，使用默认游戏参数")
+        config["game"] = standard_config["game"].copy()
+    
+    print("\n✅ 自定义配置设置完成！")
+    
+    # 询问是否保存配置
+    save_choice = input("\n是否保存此配置为模板？(y/n, 默认: n): ").strip().lower()
+    if save_choice in ['y', 'yes', '是']:
+        config_name = input("请输入配置名称: ").strip()
+        if config_name:
+            description = input("请输入配置描述 (可选): ").strip()
+            save_custom_config(config_name, config, description if description else "用户自定义配置")
+        else:
+            print("配置名称不能为空，跳过保存")
+    
+    return config
+
+def edit_config_template(config_name):
+    """编辑已保存的配置模板"""
+    templates = load_config_templates()
+    if config_name not in templates:
+        print(f"❌ 配置 '{config_name}' 不存在")
+        return False
+    
+    # 显示当前配置
+    print("\n当前配置:")
+    print(json.dumps(templates[config_name], indent=4, ensure_ascii=False))
+    
+    # 让用户编辑
+    print("\n请输入新的配置参数（直接回车保持当前值）:")
+    new_config = get_user_input_config()
+    
+    # 合并新配置
+    templates[config_name].update(new_config)
+    
+    # 保存更新
+    templates_path = TEMPLATES_PATH
+    with open(templates_path, 'w', encoding='utf-8') as f:
+        json.dump(templates, f, indent=4, ensure_ascii=False)
+
+def edit_config_template():
+    """编辑现有配置模板"""
+    templates = load_config_templates()
+    if not templates:
+        print("没有可编辑的配置模板")
+        return None
+    
+    print("\n可编辑的配置:")
+    template_names = list(templates.keys())
+    editable_configs = []
+    system_configs = ["快速测试", "标准训练", "高强度训练", "探索性训练"]
+    
+    # 显示可编辑的配置（包括系统预设和用户自定义）
+    for name in template_names:
+        editable_configs.append(name)
+        desc = templates[name].get("description", "无描述")
+        config_type = "[系统预设]" if name in system_configs else "[用户自定义]"
+        print(f"{len(editable_configs)}. {name} - {desc} {config_type}")
+    
+    try:
+        edit_choice = input("\n选择要编辑的配置 (输入数字，回车返回): ").strip()
+        if not edit_choice:
+            return None
+        
+        edit_idx = int(edit_choice) - 1
+        if 0 <= edit_idx < len(editable_configs):
+            config_to_edit = editable_configs[edit_idx]
+            current_config = templates[config_to_edit]["config"]
+            
+            print(f"\n=== 编辑配置: {config_to_edit} ===")
+            
+            # 编辑描述
+            current_description = templates[config_to_edit].get("description", "无描述")
+            print(f"\n--- 配置描述 ---")
+            new_description = input(f"配置描述 (当前: {current_description}): ").strip()
+            if not new_description:
+                new_description = current_description
+            
+            print("\n当前配置值（直接回车保持不变）:")
+            
+            # 创建新配置对象
+            new_config = {
+                "training": {},
+                "genetic": {},
+                "game": {}
+            }
+            
+            # 编辑训练参数
+            print("\n--- 训练参数 ---")
+            try:
+                current_pop = current_config["training"]["population_size"]
+                pop_size = input(f"种群大小 (当前: {current_pop}): ").strip()
+                new_config["training"]["population_size"] = int(pop_size) if pop_size else current_pop
+                
+                current_gen = current_config["training"]["generations"]
+                generations = input(f"训练代数 (当前: {current_gen}): ").strip()
+                new_config["training"]["generations"] = int(generations) if generations else current_gen
+                
+                current_runs = current_config["training"]["runs_per_individual"]
+                runs = input(f"每个个体运行次数 (当前: {current_runs}): ").strip()
+                new_config["training"]["runs_per_individual"] = int(runs) if runs else current_runs
+                
+                current_save = current_config["training"]["save_file"]
+                save_file = input(f"保存文件名 (当前: {current_save}): ").strip()
+                new_config["training"]["save_file"] = save_file if save_file else current_save
+                
+                current_checkpoint = current_config["training"]["checkpoint_interval"]
+                checkpoint_interval = input(f"检查点保存间隔 (当前: {current_checkpoint}): ").strip()
+                new_config["training"]["checkpoint_interval"] = int(checkpoint_interval) if checkpoint_interval else current_checkpoint
+                
+                new_config["training"]["checkpoint_dir"] = current_config["training"].get("checkpoint_dir", "checkpoints")
+                new_config["training"]["max_checkpoints"] = current_config["training"].get("max_checkpoints", 10)
+                
+            except (ValueError, KeyError):
+                print("输入格式错误，保持原有训练参数")
+                new_config["training"] = current_config["training"]
+            
+            # 编辑遗传算法参数
+            print("\n--- 遗传算法参数 ---")
+            try:
+                current_mut_rate = current_config["genetic"]["mutation_rate"]
+                mutation_rate = input(f"变异率 (当前: {current_mut_rate}): ").strip()
+                new_config["genetic"]["mutation_rate"] = float(mutation_rate) if mutation_rate else current_mut_rate
+                
+                current_mut_scale = current_config["genetic"]["mutation_scale"]
+                mutation_scale = input(f"变异幅度 (当前: {current_mut_scale}): ").strip()
+                new_config["genetic"]["mutation_scale"] = float(mutation_scale) if mutation_scale else current_mut_scale
+                
+                current_tournament = current_config["genetic"]["tournament_size"]
+                tournament_size = input(f"锦标赛大小 (当前: {current_tournament}): ").strip()
+                new_config["genetic"]["tournament_size"] = int(tournament_size) if tournament_size else current_tournament
+                
+                current_elite = current_config["genetic"]["elite_count"]
+                elite_count = input(f"精英个体数量 (当前: {current_elite}): ").strip()
+                new_config["genetic"]["elite_count"] = int(elite_count) if elite_count else current_elite
+                
+                current_diversity = current_config["genetic"]["elite_diversity_threshold"]
+                elite_diversity = input(f"精英多样性阈值 (当前: {current_diversity}): ").strip()
+                new_config["genetic"]["elite_diversity_threshold"] = float(elite_diversity) if elite_diversity else current_diversity
+                
+            except (ValueError, KeyError):
+                print("输入格式错误，保持原有遗传算法参数")
+                new_config["genetic"] = current_config["genetic"]
+            
+            # 编辑游戏参数
+            print("\n--- 游戏参数 ---")
+            try:
+                current_delay = current_config["game"]["delay"]
+                delay = input(f"游戏延迟 (当前: {current_delay}): ").strip()
+                new_config["game"]["delay"] = float(delay) if delay else current_delay
+                
+                new_config["game"]["window_width"] = current_config["game"].get("window_width", 800)
+                new_config["game"]["window_height"] = current_config["game"].get("window_height", 600)
+                new_config["game"]["simulation_mode"] = current_config["game"].get("simulation_mode", False)
+                
+            except (ValueError, KeyError):
+                print("输入格式错误，保持原有游戏参数")
+                new_config["game"] = current_config["game"]
+            
+            # 询问保存选项
+            print("\n=== 保存选项 ===")
+            print("1. 覆盖原配置")
+            print("2. 另存为新配置")
+            print("3. 不保存，直接使用")
+            
+            save_option = input("选择保存方式 (1/2/3): ").strip()
+            
+            if save_option == "1":
+                # 覆盖原配置
+                save_custom_config(config_to_edit, new_config, new_description)
+                print(f"✅ 配置 '{config_to_edit}' 已更新")
+            elif save_option == "2":
+                # 另存为新配置
+                new_name = input("请输入新配置名称: ").strip()
+                if new_name:
+                    save_as_description = input("请输入新配置描述 (可选): ").strip()
+                    save_custom_config(new_name, new_config, save_as_description if save_as_description else "用户自定义配置")
+                else:
+                    print("配置名称不能为空，跳过保存")
+            elif save_option == "3":
+                print("✅ 配置编辑完成，将直接使用此配置")
+            else:
+                print("无效选择，跳过保存")
+            
+            return new_config
+        else:
+            print("无效选择")
+            return None
+    except ValueError:
+        print("无效输入")
+        return None
+
+def select_config_template():
+    """选择配置模板和运行模式"""
+    while True:
+        templates = load_config_templates()
+        if not templates:
+            return None, None
+        
+        print("\n=== 配置和模式选择 ===")
+        print("\n📋 可用的配置模板:")
+        template_names = list(templates.keys())
+        for i, name in enumerate(template_names, 1):
+            desc = templates[name].get("description", "无描述")
+            tag = templates[name].get("tag", "未知")
+            print(f"{i}. {name} - {desc} [{tag}]")
+        
+        # 添加功能选项
+        print(f"\n🔧 配置管理选项:")
+        print(f"{len(template_names) + 1}. 自定义输入 - 手动输入所有配置参数")
+        print(f"{len(template_names) + 2}. 编辑配置 - 编辑现有配置模板")
+        print(f"{len(template_names) + 3}. 删除配置 - 删除已保存的配置模板")
+        
+        # 添加运行模式选项
+        print(f"\n🎮 运行模式选项:")
+        print(f"{len(template_names) + 4}. 训练模式 - 使用遗传算法训练AI")
+        print(f"{len(template_names) + 5}. 展示模式 - 使用历史最佳个体进行演示")
+        
+        try:
+            choice = input("\n请选择配置模板或操作 (输入数字，回车使用默认配置): ").strip()
+            if not choice:
+                return None, None
+            
+            choice_idx = int(choice) - 1
+            if choice_idx == len(template_names):  # 选择了自定义输入
+                config = get_user_input_config()
+                if config:
+                    # 询问运行模式
+                    mode = ask_run_mode()
+                    return config, mode
+                continue
+            elif choice_idx == len(template_names) + 1:  # 选择了编辑配置
+                config = edit_config_template()
+                if config:
+                    # 询问运行模式
+                    mode = ask_run_mode()
+                    return config, mode
+                continue
+            elif choice_idx == len(template_names) + 2:  # 选择了删除配置
+                print("\n可删除的配置:")
+                # 显示可删除的配置（排除系统预设配置）
+                deletable_configs = []
+                system_configs = ["快速测试", "标准训练", "高强度训练", "探索性训练"]
+                
+                for i, name in enumerate(template_names, 1):
+                    if name not in system_configs:
+                        deletable_configs.append(name)
+                        print(f"{len(deletable_configs)}. {name}")
+                
+                if not deletable_configs:
+                    print("没有可删除的自定义配置")
+                    continue
+                
+                try:
+                    del_choice = input("\n选择要删除的配置 (输入数字，回车返回): ").strip()
+                    if not del_choice:
+                        continue
+                    
+                    del_idx = int(del_choice) - 1
+                    if 0 <= del_idx < len(deletable_configs):
+                        config_to_delete = deletable_configs[del_idx]
+                        confirm = input(f"确认删除配置 '{config_to_delete}'？(y/n): ").strip().lower()
+                        if confirm in ['y', 'yes', '是']:
+                            delete_config_template(config_to_delete)
+                        continue
+                    else:
+                        print("无效选择")
+                        continue
+                except ValueError:
+                    print("无效输入")
+                    continue
+            elif choice_idx == len(template_names) + 3:  # 选择了训练模式
+                # 先选择配置
+                print("\n请先选择训练配置:")
+                for i, name in enumerate(template_names, 1):
+                    desc = templates[name].get("description", "无描述")
+                    tag = templates[name].get("tag", "未知")
+                    print(f"{i}. {name} - {desc} [{tag}]")
+                
+                config_choice = input("\n选择配置 (输入数字): ").strip()
+                try:
+                    config_idx = int(config_choice) - 1
+                    if 0 <= config_idx < len(template_names):
+                        selected_name = template_names[config_idx]
+                        print(f"已选择配置: {selected_name}")
+                        return templates[selected_name]["config"], "train"
+                    else:
+                        print("无效选择")
+                        continue
+                except ValueError:
+                    print("无效输入")
+                    continue
+            elif choice_idx == len(template_names) + 4:  # 选择了展示模式
+                # 展示模式直接使用标准训练配置
+                if "标准训练" in templates:
+                    print("\n展示模式使用标准训练配置")
+                    return templates["标准训练"]["config"], "demo"
+                else:
+                    # 如果没有标准训练配置，使用第一个可用配置
+                    first_config = list(templates.keys())[0]
+                    print(f"\n展示模式使用 {first_config} 配置")
+                    return templates[first_config]["config"], "demo"
+            elif 0 <= choice_idx < len(template_names):
+                selected_name = template_names[choice_idx]
+                print(f"已选择配置模板: {selected_name}")
+                # 询问运行模式
+                mode = ask_run_mode()
+                return templates[selected_name]["config"], mode
+            else:
+                print("无效选择，使用默认配置")
+                return None, None
+        except ValueError:
+            print("无效输入，使用默认配置")
+            return None, None
+
+def get_score_emoji(score):
+    """根据分数返回相应的表情包"""
+    if score >= 2000:
+        return "🏆👑🎉"  # 超级高分
+    elif score >= 1500:
+        return "🥇🔥💪"  # 很高分
+    elif score >= 1000:
+        return "🥈⭐😎"  # 高分
+    elif score >= 500:
+        return "🥉👍😊"  # 中等分数
+    elif score >= 200:
+        return "👌😐📈"  # 一般分数
+    elif score >= 100:
+        return "😅💦🤔"  # 较低分数
+    elif score >= 50:
+        return "😰😵💀"  # 很低分数
+    else:
+        return "💀👻😭"  # 极低分数
+
+def ask_run_mode():
+    """询问运行模式"""
+    print("\n🎮 请选择运行模式:")
+    print("1. 训练模式 - 使用遗传算法训练AI")
+    print("2. 展示模式 - 使用历史最佳个体进行演示")
+    
+    while True:
+        try:
+            mode_choice = input("\n请选择模式 (1 或 2): ").strip()
+            if mode_choice == '1':
+                return "train"
+            elif mode_choice == '2':
+                return "demo"
+            else:
+                print("请输入有效选择 (1 或 2)")
+        except KeyboardInterrupt:
+            print("\n程序退出")
+            return None
+
+def load_config():
+    """加载配置文件和运行模式"""
+    # 首先尝试选择配置模板和运行模式
+    template_config, run_mode = select_config_template()
+    if template_config:
+        config = template_config
+    else:
+        # 使用默认配置（标准训练配置）
+        print("使用默认配置（标准训练）")
+        config = {
+            "training": {
+                "population_size": 20,
+                "generations": 20,
+                "runs_per_individual": 3,
+                "save_file": "dino_population.json",
+                "checkpoint_interval": 5,
+                "checkpoint_dir": "checkpoints",
+                "max_checkpoints": 10
+            },
+            "genetic": {
+                "mutation_rate": 0.1,
+                "mutation_scale": 0.2,
+                "tournament_size": 3,
+                "elite_count": 3,
+                "elite_diversity_threshold": 0.1
+            },
+            "game": {
+                "window_width": 800,
+                "window_height": 600,
+                "delay": 0.01,
+                "simulation_mode": False
+            }
+        }
+        # 询问运行模式
+        run_mode = ask_run_mode()
+    
+    # 验证配置
+    errors = validate_config(config)
+    if errors:
+        print("\n⚠️  配置验证失败:")
+        for error in errors:
+            print(f"   - {error}")
+        print("\n请修正配置后重新运行程序")
+        exit(1)
+    
+    print("\n✅ 配置验证通过")
+    return config, run_mode
@@ -0,0 +1,677 @@
+"""分布式评估：训练进程中的协调器通过TCP把(基因, 赛道种子, 后端)任务分发给远程工作进程
+
+消息格式：4字节小端长度 + UTF-8 JSON。
+    工作进程 -> 协调器  hello{name, backends}、heartbeat、result{generation, id, fitness, capped, runs, ...}、cancelled{keys}
+    协调器 -> 工作进程  welcome{config, heartbeat_interval}、job{generation, id, genes, seed, backend, runs, max_score, completed}、
+                        cancel{keys}、shutdown
+
+调度:
+    背压      每个工作进程最多有prefetch个未完成的任务，完成一个才补发一个，任务不会堆积在慢的工作进程上
+    心跳      工作进程的后台线程每heartbeat_interval秒发送一次心跳，超过heartbeat_timeout没有任何消息视为失联
+    重新排队  连接断开或失联的工作进程上未完成的任务放回队首
+    任务窃取  队列已空而某个工作进程空闲时，从未完成任务最多的工作进程取走最后下发的任务并通知对方取消；
+              对方只剩正在运行的任务时作为备份任务重复执行，先返回的结果有效
+赛道种子：同一代所有个体使用相同的种子，模拟器每局开始前按 种子+局序号 重置random，重复执行的任务结果一致；
+Chrome后端无法控制障碍物，忽略种子。
+评估日志：任务的completed为评估日志中该个体已完成的局 [局序号, 得分, 是否截断, 描述子]，工作进程跳过这些局；
+结果的runs为新完成的各局 [局序号, 得分, 步数, 是否截断, 描述子]，协调器接受结果时逐局交给on_run写入日志。
+
+用法:
+    python -m dino_ai.distributed worker --coordinator 主机:9120 [--backend simulator] [--backend chrome] [--name 名称]
+    python -m dino_ai.distributed selftest [--workers 3] [--population 30]   本机多工作进程自检（含中途杀死一个工作进程）
+
+配置（config["distributed"]，均为可选）:
+    enabled             是否使用分布式评估，默认False
+    host / port         协调器监听地址，默认127.0.0.1:9120（端口0表示随机端口）
+    prefetch            每个工作进程最多未完成的任务数，默认2
+    heartbeat_interval  心跳间隔（秒），默认1
+    heartbeat_timeout   失联判定时间（秒），默认10
+    wait_timeout        没有可用工作进程时最多等待的秒数，默认60
+    local_workers       在本机自动启动的工作进程数，默认0
+    seed                赛道种子的基数，默认随机
+"""
+import collections
+import json
+import multiprocessing
+import os
+import queue
+import random
+import socket
+import struct
+import threading
+import time
+
+import numpy as np
+
+from .genome import DinosaurAI
+from .instrumentation import stage_timings
+from .metrics import training_metrics
+from .novelty import DESCRIPTOR_SIZE, BehaviorTracker, average_descriptors
+from .scheduler import create_scheduler, deadline_stats
+
+DEFAULT_PORT = 9120
+
+DEFAULT_DISTRIBUTED = {
+    "host": "127.0.0.1",
+    "port": DEFAULT_PORT,
+    "prefetch": 2,
+    "heartbeat_interval": 1.0,
+    "heartbeat_timeout": 10.0,
+    "wait_timeout": 60.0,
+    "local_workers": 0,
+    "seed": None,
+}
+
+HEADER = struct.Struct("<I")
+
+BACKENDS = ("simulator", "chrome")
+
+
+def send_message(sock, message):
+    payload = json.dumps(message).encode("utf-8")
+    sock.sendall(HEADER.pack(len(payload)) + payload)
+
+
+def recv_message(sock):
+    """读取一条消息，连接关闭时返回None"""
+    header = _recv_exact(sock, HEADER.size)
+    if header is None:
+        return None
+    payload = _recv_exact(sock, HEADER.unpack(header)[0])
+    return None if payload is None else json.loads(payload.decode("utf-8"))
+
+
+def _recv_exact(sock, size):
+    chunks = []
+    received = 0
+    while received < size:
+        chunk = sock.recv(min(size - received, 65536))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        received += len(chunk)
+    return b"".join(chunks)
+
+
+def parse_address(address):
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+class RemoteWorker:
+    """协调器一侧的工作进程连接"""
+
+    def __init__(self, conn, address, hello):
+        self.conn = conn
+        self.name = hello.get("name") or f"{address[0]}:{address[1]}"
+        self.backends = set(hello.get("backends", ["simulator"]))
+        self.outstanding = {}  # 已下发未完成的 (代数, 任务编号)，按下发顺序
+        self.last_seen = time.monotonic()
+        self.completed = 0
+
+    def send(self, message):
+        send_message(self.conn, message)
+
+
+class _Round:
+    """一代评估的任务状态"""
+
+    def __init__(self, generation, jobs):
+        self.generation = generation
+        self.jobs = jobs
+        self.pending = collections.deque(range(len(jobs)))
+        self.fitness = [None] * len(jobs)
+        self.holders = {}  # 任务编号 -> 持有该任务的工作进程集合
+        self.remaining = len(jobs)
+
+
+class DistributedEvaluator:
+    """把种群评估分发给通过TCP连接的工作进程"""
+
+    def __init__(self, config):
+        settings = dict(DEFAULT_DISTRIBUTED)
+        settings.update(config.get("distributed", {}))
+        self.config = config
+        self.prefetch = max(1, settings["prefetch"])
+        self.heartbeat_interval = settings["heartbeat_interval"]
+        self.heartbeat_timeout = settings["heartbeat_timeout"]
+        self.wait_timeout = settings["wait_timeout"]
+        self.seed_base = settings["seed"] if settings["seed"] is not None else random.randrange(2 ** 30)
+        self.backend = "simulator" if config["game"].get("simulation_mode", False) else "chrome"
+        self.runs = config["training"]["runs_per_individual"]
+        self.novelty = config.get("novelty", {}).get("enabled", False)
+        self.generation = 0
+        self.descriptors = None  # 启用新颖性搜索时为每个个体的行为描述子
+        self.max_score = None  # 单局得分上限（budget.EpisodeBudget），None表示不设上限
+        self.capped = None  # 每个个体达到得分上限的局数
+        self.completed_runs = None  # 评估日志中每个个体已完成的局 {局序号: 记录}，这些局不再运行
+        self.on_run = None  # 每接受一局结果调用 on_run(下标, 局序号, 得分, 步数, 是否截断, 描述子)
+        self.remote = {}  # 连接 -> RemoteWorker，只在调用evaluate的线程中修改
+        self.events = queue.Queue()
+        self.closed = False
+        self.stats = {"requeued": 0, "stolen": 0, "duplicated": 0, "lost_workers": 0}
+
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind((settings["host"], settings["port"]))
+        self.listener.listen(64)
+        # 定期醒来检查是否已关闭
+        self.listener.settimeout(0.5)
+        host, port = self.listener.getsockname()[:2]
+        self.address = f"{host}:{port}"
+        threading.Thread(target=self._accept_loop, name="dino-coordinator", daemon=True).start()
+
+        # 本机工作进程用spawn启动，不继承协调器的监听套接字和线程
+        context = multiprocessing.get_context("spawn")
+        self.local_processes = [
+            context.Process(target=run_worker, args=(self.address, [self.backend], f"local-{i}", False),
+                            name=f"dino-worker-{i}", daemon=True)
+            for i in range(settings["local_workers"])
+        ]
+        for process in self.local_processes:
+            process.start()
+        self.label = f"分布式协调器 {self.address}"
+        print(f"🌐 分布式评估协调器: {self.address}（本机工作进程 {len(self.local_processes)} 个）")
+
+    @property
+    def workers(self):
+        return len(self.remote)
+
+    def course_seed(self, generation):
+        """第generation代所有个体共用的赛道种子"""
+        return (self.seed_base + generation * 7919) % 2 ** 31
+
+    def _accept_loop(self):
+        while not self.closed:
+            try:
+                conn, address = self.listener.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            conn.settimeout(None)
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self._read_loop, args=(conn, address), name="dino-coordinator-conn",
+                             daemon=True).start()
+
+    def _read_loop(self, conn, address):
+        """握手后把工作进程的消息转交给evaluate所在的线程处理"""
+        try:
+            hello = recv_message(conn)
+            if not hello or hello.get("type") != "hello":
+                conn.close()
+                return
+            send_message(conn, {"type": "welcome", "config": self.config, "heartbeat_interval": self.heartbeat_interval})
+            self.events.put(("join", conn, (address, hello)))
+            while True:
+                message = recv_message(conn)
+                if message is None:
+                    break
+                self.events.put(("message", conn, message))
+        except (OSError, ValueError):
+            pass
+        self.events.put(("lost", conn, None))
+
+    def evaluate(self, population):
+        """评估种群，返回与population对应的适应度列表"""
+        self.generation += 1
+        seed = self.course_seed(self.generation)
+        jobs = [{"type": "job", "generation": self.generation, "id": i, "genes": individual.genes.tolist(),
+                 "seed": seed, "backend": self.backend, "runs": self.runs, "max_score": self.max_score}
+                for i, individual in enumerate(population)]
+        if self.completed_runs:
+            for job, done in zip(jobs, self.completed_runs):
+                job["completed"] = [[run, record["score"], record.get("capped", False), record.get("descriptor")]
+                                    for run, record in sorted(done.items())]
+        current = _Round(self.generation, jobs)
+        self.descriptors = np.zeros((len(jobs), DESCRIPTOR_SIZE)) if self.novelty else None
+        self.capped = [0] * len(jobs)
+        before = dict(self.stats)
+
+        # 先处理两代之间积压的消息（心跳、新连接、断开），再判断失联
+        self._drain(current)
+        waiting_since = None
+        while current.remaining:
+            self._check_heartbeats(current)
+            capable = [worker for worker in self.remote.values() if self.backend in worker.backends]
+            if capable:
+                waiting_since = None
+                self._dispatch(current, capable)
+            else:
+                waiting_since = waiting_since or time.monotonic()
+                if time.monotonic() - waiting_since > self.wait_timeout:
+                    raise RuntimeError(f"{self.wait_timeout} 秒内没有可用的 {self.backend} 工作进程")
+            try:
+                self._handle(current, *self.events.get(timeout=self.heartbeat_interval))
+            except queue.Empty:
+                continue
+            self._drain(current)
+
+        self._cancel_leftovers(current)
+        changes = {key: self.stats[key] - before[key] for key in self.stats}
+        print(f"🌐 {len(self.remote)} 个工作进程完成评估（重新排队 {changes['requeued']}，窃取 {changes['stolen']}，"
+              f"备份执行 {changes['duplicated']}，失联 {changes['lost_workers']}）")
+        return current.fitness
+
+    def _drain(self, current):
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                return
+            self._handle(current, *event)
+
+    def _handle(self, current, kind, conn, payload):
+        if kind == "join":
+            address, hello = payload
+            if self.closed:
+                _close_quietly(conn)
+                return
+            worker = RemoteWorker(conn, address, hello)
+            self.remote[conn] = worker
+            print(f"🔗 工作进程 {worker.name} 已连接（{', '.join(sorted(worker.backends))}）")
+            return
+
+        worker = self.remote.get(conn)
+        if worker is None:
+            # 已判定失联的连接
+            return
+        if kind == "lost":
+            self._drop(current, worker, "连接断开")
+            return
+
+        worker.last_seen = time.monotonic()
+        message_type = payload.get("type")
+        if message_type == "result":
+            self._record_result(current, worker, payload)
+        elif message_type == "cancelled":
+            for key in payload["keys"]:
+                worker.outstanding.pop(tuple(key), None)
+
+    def _record_result(self, current, worker, result):
+        key = (result["generation"], result["id"])
+        worker.outstanding.pop(key, None)
+        worker.completed += 1
+        training_metrics.add_episodes(result["episodes"], result["steps"])
+        stage_timings.merge_summary(result["stages"])
+        deadline_stats.merge_summary(result["deadlines"])
+
+        # 上一代的结果或已被其他工作进程完成的重复任务
+        index = result["id"]
+        if current is None or result["generation"] != current.generation or current.fitness[index] is not None:
+            return
+        current.fitness[index] = result["fitness"]
+        current.remaining -= 1
+        self.capped[index] = result.get("capped", 0)
+        if self.descriptors is not None and result.get("descriptor") is not None:
+            self.descriptors[index] = result["descriptor"]
+        if self.on_run:
+            for run, score, steps, capped, descriptor in result.get("runs", ()):
+                self.on_run(index, run, score, steps, capped, descriptor)
+        for holder in current.holders.pop(index, ()):
+            if holder is not worker:
+                self._cancel(holder, [key])
+
+    def _assign(self, current, worker, index):
+        """下发任务，发送失败时返回False（连接断开会由读线程报告）"""
+        try:
+            worker.send(current.jobs[index])
+        except OSError:
+            return False
+        worker.outstanding[(current.generation, index)] = None
+        current.holders.setdefault(index, set()).add(worker)
+        return True
+
+    def _cancel(self, worker, keys):
+        try:
+            worker.send({"type": "cancel", "keys": [list(key) for key in keys]})
+        except OSError:
+            pass
+
+    def _dispatch(self, current, capable):
+        """按背压限制补发任务，空闲且队列已空时窃取任务"""
+        for worker in sorted(capable, key=lambda w: len(w.outstanding)):
+            while len(worker.outstanding) < self.prefetch and current.pending:
+                index = current.pending.popleft()
+                if current.fitness[index] is not None:
+                    continue
+                if not self._assign(current, worker, index):
+                    current.pending.appendleft(index)
+                    break
+            if not worker.outstanding and not current.pending:
+                self._steal(current, worker, capable)
+
+    def _steal(self, current, thief, capable):
+        candidates = []
+        for victim in capable:
+            if victim is thief:
+                continue
+            own = [index for generation, index in victim.outstanding
+                   if generation == current.generation and current.fitness[index] is None
+                   and len(current.holders.get(index, ())) == 1]
+            if own:
+                candidates.append((len(own), victim, own))
+        if not candidates:
+            return
+        count, victim, own = max(candidates, key=lambda candidate: candidate[0])
+        # 最后下发的任务最可能还没开始运行
+        index = own[-1]
+        if not self._assign(current, thief, index):
+            return
+        if count > 1:
+            self._cancel(victim, [(current.generation, index)])
+            current.holders[index].discard(victim)
+            self.stats["stolen"] += 1
+        else:
+            self.stats["duplicated"] += 1
+
+    def _drop(self, current, worker, reason):
+        """移除失联的工作进程，把只由它持有的未完成任务放回队首"""
+        self.remote.pop(worker.conn, None)
+        _close_quietly(worker.conn)
+        self.stats["lost_workers"] += 1
+        requeued = 0
+        if current is not None:
+            for generation, index in reversed(list(worker.outstanding)):
+                if generation != current.generation or current.fitness[index] is not None:
+                    continue
+                holders = current.holders.get(index, set())
+                holders.discard(worker)
+                if not holders and index not in current.pending:
+                    current.pending.appendleft(index)
+                    requeued += 1
+        self.stats["requeued"] += requeued
+        print(f"⚠️ 工作进程 {worker.name} {reason}，{requeued} 个任务重新排队")
+
+    def _check_heartbeats(self, current):
+        now = time.monotonic()
+        for worker in list(self.remote.values()):
+            if now - worker.last_seen > self.heartbeat_timeout:
+                self._drop(current, worker, f"超过 {self.heartbeat_timeout} 秒没有消息")
+
+    def _cancel_leftovers(self, current):
+        """本代结束后取消仍在工作进程队列中的重复任务"""
+        for worker in self.remote.values():
+            keys = [key for key in worker.outstanding if key[0] == current.generation]
+            if keys:
+                self._cancel(worker, keys)
+
+    def close(self):
+        """通知工作进程退出并关闭监听"""
+        self._drain(None)
+        self.closed = True
+        for worker in list(self.remote.values()):
+            try:
+                worker.send({"type": "shutdown"})
+            except OSError:
+                pass
+            _close_quietly(worker.conn)
+        self.remote.clear()
+        self.listener.close()
+        for process in self.local_processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+
+
+def _close_quietly(conn):
+    try:
+        conn.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+    conn.close()
+
+
+class _WorkerSession:
+    """工作进程与协调器的一次连接：读线程收任务，心跳线程发心跳，主线程执行任务"""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.send_lock = threading.Lock()
+        self.condition = threading.Condition()
+        self.jobs = collections.deque()
+        self.stopped = False
+        self.shutdown = False
+
+    def send(self, message):
+        with self.send_lock:
+            send_message(self.sock, message)
+
+    def read_loop(self):
+        try:
+            while True:
+                message = recv_message(self.sock)
+                if message is None:
+                    break
+                message_type = message.get("type")
+                if message_type == "job":
+                    with self.condition:
+                        self.jobs.append(message)
+                        self.condition.notify()
+                elif message_type == "cancel":
+                    self._cancel({tuple(key) for key in message["keys"]})
+                elif message_type == "shutdown":
+                    self.shutdown = True
+                    break
+        except (OSError, ValueError):
+            pass
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+
+    def _cancel(self, keys):
+        """丢弃还没开始运行的任务，正在运行的任务照常完成"""
+        with self.condition:
+            dropped = [job for job in self.jobs if (job["generation"], job["id"]) in keys]
+            for job in dropped:
+                self.jobs.remove(job)
+        if dropped:
+            self.send({"type": "cancelled", "keys": [[job["generation"], job["id"]] for job in dropped]})
+
+    def heartbeat_loop(self, interval):
+        while not self.stopped:
+            time.sleep(interval)
+            try:
+                self.send({"type": "heartbeat"})
+            except OSError:
+                break
+
+    def next_job(self):
+        """等待下一个任务，连接结束时返回None"""
+        with self.condition:
+            while not self.jobs and not self.stopped:
+                self.condition.wait()
+            return None if self.stopped else self.jobs.popleft()
+
+
+def run_job(job, config, games):
+    """执行一个评估任务，返回result消息；games按后端缓存游戏实例"""
+    from .backend import create_game
+    from .evaluation import MAX_STEPS, run_episode
+
+    backend = job["backend"]
+    game = games.get(backend)
+    if game is None:
+        game_config = dict(config)
+        game_config["game"] = dict(config["game"], simulation_mode=backend == "simulator")
+        game = games[backend] = create_game(game_config)
+    realtime = backend != "simulator"
+    tracker = BehaviorTracker() if config.get("novelty", {}).get("enabled", False) else None
+    individual = DinosaurAI(genes=np.array(job["genes"], dtype=np.float64), config=config["genetic"])
+
+    stage_timings.reset()
+    deadline_stats.reset()
+    episodes, steps = training_metrics.counts()
+    scheduler = create_scheduler(config)
+    max_score = job.get("max_score")
+    completed = {entry[0]: entry[1:] for entry in job.get("completed", ())}
+    scores = []
+    behaviors = []
+    capped_runs = 0
+    runs = []
+    for run in range(job["runs"]):
+        if run in completed:
+            # 评估日志中已完成的局；其余各局仍按 种子+局序号 重置，结果与不中断时相同
+            score, capped, descriptor = completed[run]
+            scores.append(score)
+            capped_runs += capped
+            if tracker:
+                behaviors.append(np.array(descriptor))
+            continue
+        if not realtime:
+            random.seed(job["seed"] + run)
+        score, step_count = run_episode(game, individual, MAX_STEPS, realtime, scheduler=scheduler, behavior=tracker,
+                                        max_score=max_score)
+        scores.append(score)
+        capped = max_score is not None and score >= max_score
+        capped_runs += capped
+        descriptor = None
+        if tracker:
+            descriptor = tracker.descriptor(score, step_count < MAX_STEPS and not capped)
+            behaviors.append(descriptor)
+        runs.append([run, float(score), step_count, bool(capped), descriptor.tolist() if tracker else None])
+
+    return {
+        "type": "result",
+        "generation": job["generation"],
+        "id": job["id"],
+        "fitness": float(sum(scores) / len(scores)),
+        "capped": capped_runs,
+        "descriptor": average_descriptors(behaviors).tolist() if tracker else None,
+        "runs": runs,
+        "episodes": training_metrics.episodes - episodes,
+        "steps": training_metrics.steps - steps,
+        "stages": stage_timings.summary(),
+        "deadlines": deadline_stats.summary()
+    }
+
+
+def _serve_session(sock, name, backends, games):
+    """与协调器完成握手并处理任务直到连接结束，协调器要求退出时返回True"""
+    send_message(sock, {"type": "hello", "name": name, "backends": list(backends), "pid": os.getpid()})
+    welcome = recv_message(sock)
+    if not welcome or welcome.get("type") != "welcome":
+        return False
+    config = welcome["config"]
+    session = _WorkerSession(sock)
+    threading.Thread(target=session.read_loop, name="dino-worker-read", daemon=True).start()
+    threading.Thread(target=session.heartbeat_loop, args=(welcome["heartbeat_interval"],), name="dino-worker-heartbeat",
+                     daemon=True).start()
+    print(f"🔗 工作进程 {name} 已连接协调器")
+    while True:
+        job = session.next_job()
+        if job is None:
+            return session.shutdown
+        session.send(run_job(job, config, games))
+
+
+def run_worker(address, backends=("simulator",), name=None, reconnect=True, retry_interval=2.0):
+    """连接协调器并执行任务；reconnect为True时连接断开后自动重连"""
+    name = name or f"{socket.gethostname()}-{os.getpid()}"
+    games = {}
+    try:
+        while True:
+            try:
+                sock = socket.create_connection(parse_address(address), timeout=10)
+            except OSError:
+                if not reconnect:
+                    return
+                time.sleep(retry_interval)
+                continue
+            sock.settimeout(None)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            try:
+                shutdown = _serve_session(sock, name, backends, games)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ 与协调器的连接出错: {e}")
+                shutdown = False
+            finally:
+                sock.close()
+            if shutdown or not reconnect:
+                return
+            time.sleep(retry_interval)
+    finally:
+        for game in games.values():
+            game.close()
+
+
+def _selftest_config(population_size, workers):
+    return {
+        "training": {"population_size": population_size, "runs_per_individual": 2},
+        "genetic": {"mutation_rate": 0.1, "mutation_scale": 0.2},
+        "game": {"delay": 0.01, "simulation_mode": True},
+        "distributed": {"port": 0, "local_workers": workers, "seed": 1, "heartbeat_timeout": 5, "wait_timeout": 30}
+    }
+
+
+def _serial_fitness(config, population, seed):
+    """在本进程中按相同赛道种子串行评估，作为分布式结果的对照"""
+    import contextlib
+    import io
+
+    games = {}
+    result = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i, individual in enumerate(population):
+            job = {"generation": 0, "id": i, "genes": individual.genes.tolist(), "seed": seed, "backend": "simulator",
+                   "runs": config["training"]["runs_per_individual"]}
+            result.append(run_job(job, config, games)["fitness"])
+    for game in games.values():
+        game.close()
+    return result
+
+
+def self_test(workers=3, population_size=30, kill_after=0.05):
+    """本机自检：启动协调器和多个工作进程评估两代，第二代中途杀死一个工作进程，结果须与串行评估一致"""
+    config = _selftest_config(population_size, workers)
+    population = [DinosaurAI(config=config["genetic"]) for _ in range(population_size)]
+    evaluator = DistributedEvaluator(config)
+    try:
+        first = evaluator.evaluate(population)
+        if workers > 1:
+            threading.Timer(kill_after, evaluator.local_processes[0].terminate).start()
+        second = evaluator.evaluate(population)
+        stats = dict(evaluator.stats)
+    finally:
+        evaluator.close()
+
+    passed = True
+    for generation, fitness in ((1, first), (2, second)):
+        expected = _serial_fitness(config, population, evaluator.course_seed(generation))
+        mismatches = sum(abs(a - b) > 1e-9 for a, b in zip(fitness, expected))
+        print(f"   第{generation}代: {len(fitness)} 个结果，与串行评估不一致 {mismatches} 个")
+        passed = passed and mismatches == 0 and None not in fitness
+    print(f"   重新排队 {stats['requeued']}，窃取 {stats['stolen']}，备份执行 {stats['duplicated']}，"
+          f"失联 {stats['lost_workers']}")
+    print("✅ 自检通过" if passed else "❌ 自检失败")
+    return passed
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="分布式评估工作进程")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    worker_parser = subparsers.add_parser("worker", help="连接协调器并执行评估任务")
+    worker_parser.add_argument("--coordinator", default=f"127.0.0.1:{DEFAULT_PORT}", help="协调器地址 host:port")
+    worker_parser.add_argument("--backend", action="append", choices=BACKENDS,
+                               help="支持的游戏后端，可重复指定，默认simulator")
+    worker_parser.add_argument("--name", help="工作进程名称，默认 主机名-进程号")
+    selftest_parser = subparsers.add_parser("selftest", help="本机多工作进程自检")
+    selftest_parser.add_argument("--workers", type=int, default=3)
+    selftest_parser.add_argument("--population", type=int, default=30)
+    args = parser.parse_args()
+
+    if args.command == "selftest":
+        if not self_test(args.workers, args.population):
+            raise SystemExit(1)
+        return
+
+    try:
+        run_worker(args.coordinator, args.backend or ["simulator"], args.name)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
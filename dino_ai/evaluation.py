@@ -0,0 +1,118 @@
+"""单局游戏评估（训练循环与并行工作进程共用）"""
+import time
+from time import perf_counter
+
+from .eventlog import log
+from .instrumentation import stage_timings
+from .metrics import training_metrics
+from .scheduler import FixedRateScheduler, deadline_stats
+from .supervisor import SessionLost, retry_on_session_lost
+
+# 单局游戏的默认最大步数，防止无限循环
+MAX_STEPS = 10000
+
+
+def should_keep_ducking(game_state):
+    """附近还有高空翼龙时继续下蹲"""
+    dino = game_state['dino']
+    for obstacle in game_state.get('obstacles', []):
+        if obstacle.get('type') == 'PTERODACTYL_HIGH':
+            distance = obstacle.get('x', 0) - (dino.get('x', 0) + dino.get('width', 40))
+            if distance > -50 and distance < 150:  # 障碍物在附近
+                return True
+    return False
+
+
+def run_episode(game, individual, max_steps=MAX_STEPS, realtime=True, recorder=None, trace_metadata=None,
+                scheduler=None, behavior=None, max_score=None):
+    """重启游戏并让个体玩一局，返回(得分, 步数)
+
+    realtime为False时跳过等待（用于模拟器，模拟时间由game.delay推进）。
+    实时模式下由scheduler（FixedRateScheduler，默认按game.delay）按固定频率安排决策，
+    本局的迟到帧和错过的周期计入deadline_stats。
+    传入recorder（TraceRecorder）时逐帧录制状态和动作，trace_metadata写入录制索引。
+    传入behavior（novelty.BehaviorTracker）时累计本局的行为，由调用方取描述子。
+    传入max_score（budget.EpisodeBudget的得分上限）时，得分达到上限的一局立即结束，得分记为上限。
+    game为SupervisedGame时，浏览器会话失效的一局不计入结果，重启浏览器后从头重试。
+    """
+    return retry_on_session_lost(game, lambda: _play_episode(game, individual, max_steps, realtime, recorder,
+                                                             trace_metadata, scheduler, behavior, max_score))
+
+
+def _play_episode(game, individual, max_steps, realtime, recorder, trace_metadata, scheduler, behavior, max_score):
+    # 重启游戏
+    stage_start = perf_counter()
+    game.restart()
+    if realtime:
+        time.sleep(0.5)  # 等待游戏重启
+    stage_timings.record('restart', perf_counter() - stage_start)
+    
+    if realtime:
+        if scheduler is None:
+            scheduler = FixedRateScheduler(game.delay)
+        scheduler.start()
+
+    if behavior:
+        behavior.reset()
+    if recorder:
+        recorder.start_episode(genome=individual.genome_hash(), **(trace_metadata or {}))
+
+    # 游戏循环
+    step_count = 0
+    while not game.is_game_over() and step_count < max_steps:
+        try:
+            # 获取游戏状态
+            stage_start = perf_counter()
+            game_state = game.get_game_state()
+            stage_end = perf_counter()
+            stage_timings.record('state', stage_end - stage_start)
+            if max_score is not None and game_state.get('score', 0) >= max_score:
+                break
+
+            # 获取AI的决策
+            stage_start = stage_end
+            action = individual.predict(game_state)
+            stage_end = perf_counter()
+            stage_timings.record('predict', stage_end - stage_start)
+
+            if behavior:
+                behavior.record(game_state, action)
+            if recorder:
+                recorder.record(game_state, action)
+                stage_start, stage_end = stage_end, perf_counter()
+                stage_timings.record('trace', stage_end - stage_start)
+
+            # 执行动作 - 支持跳跃中下蹲的快速落地和持续下蹲
+            stage_start = stage_end
+            if action['jump']:
+                game.jump()
+
+            # 持续下蹲逻辑：开始下蹲后持续到障碍物通过
+            if action['duck']:
+                game.start_duck()  # 开始持续下蹲
+            elif not should_keep_ducking(game.get_game_state()):
+                game.stop_duck()  # 停止下蹲
+            stage_end = perf_counter()
+            stage_timings.record('action', stage_end - stage_start)
+
+            # 等待到下一个决策时刻（已扣除本帧的工作耗时）
+            if realtime:
+                scheduler.wait()
+                stage_timings.record('sleep', perf_counter() - stage_end)
+            step_count += 1
+
+        except SessionLost:
+            raise
+        except Exception as e:
+            log.error("game_loop_error", error=str(e))
+            break
+
+    if realtime:
+        deadline_stats.add(scheduler.episode_summary())
+    training_metrics.add_episode(step_count)
+    score = game.get_score()
+    if max_score is not None and score >= max_score:
+        score = max_score
+    if recorder:
+        recorder.end_episode(score, steps=step_count)
+    return score, step_count
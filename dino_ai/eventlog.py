@@ -0,0 +1,116 @@
+"""分级结构化日志（按消息限流，带最近事件环形缓冲，崩溃时落盘）
+
+热路径用法（禁用时只有一次属性判断）:
+
+    if log.debug_on:
+        log.debug("pterodactyl_high", distance=distance)
+"""
+import json
+import sys
+import time
+from collections import deque
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+LEVELS_BY_NAME = {name: level for level, name in LEVEL_NAMES.items()}
+
+
+class EventLog:
+    """结构化事件日志"""
+
+    def __init__(self, level=WARNING, rate_limit=5, ring_size=1000):
+        self.rate_limit = rate_limit  # 同一事件每秒最多输出的次数，0表示不限流
+        self.ring = deque(maxlen=ring_size)
+        self._windows = {}  # 事件名 -> [窗口开始时间, 窗口内输出次数, 被抑制次数]
+        self.set_level(level)
+
+    def set_level(self, level):
+        """设置日志级别，可传入数字或级别名称"""
+        if isinstance(level, str):
+            level = LEVELS_BY_NAME[level.upper()]
+        self.level = level
+        # 预先计算的开关，热路径只需判断这些属性
+        self.debug_on = level <= DEBUG
+        self.info_on = level <= INFO
+
+    def configure(self, log_config):
+        """从配置字典（config["logging"]）应用设置"""
+        if "level" in log_config:
+            self.set_level(log_config["level"])
+        self.rate_limit = log_config.get("rate_limit", self.rate_limit)
+        ring_size = log_config.get("ring_size")
+        if ring_size and ring_size != self.ring.maxlen:
+            self.ring = deque(self.ring, maxlen=ring_size)
+
+    def log(self, level, event, **fields):
+        """记录一条事件"""
+        if level < self.level:
+            return
+        now = time.time()
+        record = {"ts": now, "level": LEVEL_NAMES.get(level, level), "event": event}
+        record.update(fields)
+        self.ring.append(record)
+
+        suppressed = 0
+        if self.rate_limit:
+            window = self._windows.get(event)
+            if window is None or now - window[0] >= 1.0:
+                suppressed = window[2] if window else 0
+                window = self._windows[event] = [now, 0, 0]
+            if window[1] >= self.rate_limit:
+                window[2] += 1
+                return
+            window[1] += 1
+
+        detail = " ".join(f"{k}={_format_value(v)}" for k, v in fields.items())
+        line = f"[{record['level']}] {event} {detail}".rstrip()
+        if suppressed:
+            line += f" (前1秒内另有{suppressed}条被限流)"
+        print(line)
+
+    def debug(self, event, **fields):
+        self.log(DEBUG, event, **fields)
+
+    def info(self, event, **fields):
+        self.log(INFO, event, **fields)
+
+    def warning(self, event, **fields):
+        self.log(WARNING, event, **fields)
+
+    def error(self, event, **fields):
+        self.log(ERROR, event, **fields)
+
+    def dump(self, path):
+        """把环形缓冲中的最近事件写成JSON Lines文件"""
+        with open(path, "w", encoding="utf-8") as f:
+            for record in self.ring:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        return path
+
+    def install_crash_dump(self, path):
+        """在未捕获异常时把最近事件写入文件"""
+        previous_hook = sys.excepthook
+
+        def hook(exc_type, exc, tb):
+            self.error("crash", exception=f"{exc_type.__name__}: {exc}")
+            try:
+                print(f"最近事件已写入: {self.dump(path)}")
+            except Exception as e:
+                print(f"写入崩溃事件失败: {e}")
+            previous_hook(exc_type, exc, tb)
+
+        sys.excepthook = hook
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return f"{value:.3f}"
+    return value
+
+
+# 全局日志实例
+log = EventLog()
@@ -0,0 +1,393 @@
+"""遗传算法核心"""
+import json
+import os
+import time
+
+import numpy as np
+
+from . import checkpoints
+from .genome import DinosaurAI, Population, genome_matrix
+from .instrumentation import merge_stage_summaries
+from .metrics import training_metrics
+from .novelty import create_novelty
+from .optimizers import create_engine
+from .replay import create_replay_screen
+from .surrogate import create_surrogate
+from .scheduler import merge_deadline_summaries
+
+# 遗传算法类
+class GeneticAlgorithm:
+    def __init__(self, config):
+        self.config = config
+        self.population_size = config["training"]["population_size"]
+        self.save_file = config["training"]["save_file"]
+        
+        # 检查点保存配置
+        self.checkpoint_interval = config["training"].get("checkpoint_interval", 5)
+        self.checkpoint_dir = config["training"].get("checkpoint_dir", "checkpoints")
+        self.max_checkpoints = config["training"].get("max_checkpoints", 10)
+        
+        # 创建检查点目录
+        if not os.path.exists(self.checkpoint_dir):
+            os.makedirs(self.checkpoint_dir)
+        
+        # 优化引擎（遗传算法或CMA-ES）负责产生每代的种群
+        self.engine = create_engine(config)
+        self.generation = 0
+        self.best_fitness = 0
+        self.best_individual = None
+        self.training_history = []
+        
+        # 新颖性搜索（默认关闭）
+        self.novelty = create_novelty(config)
+        
+        # 代理适应度模型预筛选子代（默认关闭）
+        self.surrogate = create_surrogate(config)
+        # 录制赛道离线预筛选（默认关闭）
+        self.replay = create_replay_screen(config)
+        self._asked_generation = None
+
+    @property
+    def population(self):
+        """当前种群（由优化引擎持有）"""
+        return self.engine.population
+    
+    @population.setter
+    def population(self, value):
+        # 从文件加载的个体列表打包为种群矩阵
+        if not isinstance(value, Population):
+            value = Population.from_individuals(value, self.config["genetic"])
+        self.engine.population = value
+    
+    def ask(self):
+        """本代待评估的个体
+
+        启用代理模型且模型可信时，引擎额外产生oversample倍的候选子代，
+        只保留代理模型选出的个体（精英不参与筛选），本代真实评估的局数随之减少。
+        代理模型还不可用时，启用了录制赛道预筛选（config["replay"]）则按离线评估的结果同样筛选。
+        """
+        population = self.engine.ask()
+        if self._asked_generation == self.generation:
+            return population
+        if self.surrogate is not None and self.surrogate.ready:
+            screener = self.surrogate
+        elif self.replay is not None:
+            screener = self.replay
+        else:
+            return population
+        self._asked_generation = self.generation
+        
+        protected = self.engine.protected
+        offspring = population[protected:]
+        keep = int(round(self.population_size * screener.evaluate_fraction)) - protected
+        keep = max(keep, self.config["genetic"].get("tournament_size", 2) - protected, 2)
+        if keep >= len(offspring):
+            return population
+        pool = offspring + self.engine.propose(len(offspring) * (screener.oversample - 1))
+        screened = population[:protected] + screener.screen(pool, keep)
+        self.engine.population = screened
+        return screened
+    
+    def mark_asked(self):
+        """当前种群已经是本代筛选后的种群（从评估日志恢复中断的一代时），ask不再重新筛选"""
+        self._asked_generation = self.generation
+    
+    def tell(self, fitness_scores, descriptors=None):
+        """返回本代的适应度，由优化引擎产生下一代
+
+        启用新颖性搜索并传入每个个体的行为描述子时，引擎按适应度与新颖性的组合分数选择，
+        遗传算法的精英仍按适应度保留。
+        """
+        # 更新最佳个体
+        max_fitness_idx = np.argmax(fitness_scores)
+        improved = fitness_scores[max_fitness_idx] > self.best_fitness
+        if improved:
+            self.best_fitness = fitness_scores[max_fitness_idx]
+            # 复制出来，不引用种群矩阵（下一代替换种群后旧矩阵可以释放）
+            self.best_individual = self.population[max_fitness_idx].copy()
+        
+        if self.surrogate is not None:
+            self.surrogate.observe(genome_matrix(self.population), fitness_scores)
+        
+        selection_scores = None
+        if self.novelty is not None and descriptors is not None:
+            selection_scores = self.novelty.selection_scores(fitness_scores, descriptors, improved)
+        self.engine.tell(fitness_scores, selection_scores)
+        
+        summary = self.engine.summary()
+        if "elites" in summary:
+            print(f"保留了 {summary['elites']} 个精英个体")
+        if "sigma" in summary:
+            print(f"CMA-ES步长: {summary['sigma']:.4f}，协方差条件数: {summary['condition']:.1f}")
+        
+        self.generation += 1
+        
+        # 自动检查点保存
+        if self.generation % self.checkpoint_interval == 0:
+            self.save_checkpoint()
+    
+    evolve = tell
+
+    def save_population(self):
+        """保存种群到文件"""
+        start = time.perf_counter()
+        with open(self.save_file, "w") as f:
+            data = {
+                "generation": self.generation,
+                "best_fitness": self.best_fitness,
+                "best_individual": self.best_individual.to_dict() if self.best_individual else None,
+                "population": [individual.to_dict() for individual in self.population],
+                "engine": {"name": self.engine.name, "state": self.engine.state_dict()}
+            }
+            json.dump(data, f)
+        training_metrics.record_write("population", time.perf_counter() - start)
+        # print(f"种群保存到 {self.save_file}")
+
+    def load_population(self):
+        """从文件加载种群"""
+        try:
+            with open(self.save_file, "r") as f:
+                data = json.load(f)
+                self.generation = data["generation"]
+                self.best_fitness = data["best_fitness"]
+                if data["best_individual"]:
+                    self.best_individual = DinosaurAI.from_dict(data["best_individual"], config=self.config["genetic"])
+                self.population = [DinosaurAI.from_dict(ind, config=self.config["genetic"]) for ind in data["population"]]
+                self._load_engine_state(data.get("engine", {}))
+            print(f"种群从 {self.save_file} 加载成功，当前代数: {self.generation}，最佳适应度: {self.best_fitness}")
+            return True
+        except FileNotFoundError:
+            print(f"文件 {self.save_file} 不存在，初始化新种群")
+            return False
+    
+    def _load_engine_state(self, engine):
+        """恢复优化引擎的状态（如CMA-ES的分布），引擎不同时只恢复种群"""
+        if engine.get("name") == self.engine.name:
+            self.engine.load_state_dict(engine.get("state"))
+        elif engine:
+            print(f"保存的种群使用的优化引擎是 {engine.get('name')}，当前为 {self.engine.name}，只恢复种群")
+    
+    def save_checkpoint(self):
+        """保存训练检查点"""
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
+        
+        checkpoint_data = {
+            "generation": self.generation,
+            "best_fitness": self.best_fitness,
+            "best_individual": self.best_individual.to_dict() if self.best_individual else None,
+            "population": [individual.to_dict() for individual in self.population],
+            "training_history": self.training_history,
+            "engine": {"name": self.engine.name, "state": self.engine.state_dict()},
+            "config": self.config,
+            "timestamp": timestamp
+        }
+        
+        start = time.perf_counter()
+        checkpoint_file = checkpoints.write_checkpoint(self.checkpoint_dir, checkpoint_data)
+        training_metrics.record_write("checkpoint", time.perf_counter() - start)
+        print(f"检查点保存到: {checkpoint_file}")
+        
+        # 新颖性存档单独保存（只保留最新一份）
+        if self.novelty is not None:
+            self.novelty.archive.save(self.novelty.archive_path(self.checkpoint_dir))
+        if self.surrogate is not None:
+            self.surrogate.save(self.surrogate.data_path(self.checkpoint_dir))
+        
+        # 清理旧的检查点文件
+        self.cleanup_old_checkpoints()
+    
+    def cleanup_old_checkpoints(self):
+        """清理旧的检查点文件，只保留最新的N个"""
+        try:
+            for old_file in checkpoints.cleanup_old_checkpoints(self.checkpoint_dir, self.max_checkpoints):
+                print(f"删除旧检查点: {old_file}")
+        except Exception as e:
+            print(f"清理检查点文件时出错: {e}")
+    
+    def load_latest_checkpoint(self):
+        """加载最新的检查点"""
+        try:
+            latest_file = checkpoints.latest_checkpoint_file(self.checkpoint_dir)
+            if not latest_file:
+                print("没有找到检查点文件")
+                return False
+            
+            data = checkpoints.read_checkpoint(os.path.join(self.checkpoint_dir, latest_file))
+            
+            self.generation = data["generation"]
+            self.best_fitness = data["best_fitness"]
+            if data["best_individual"]:
+                self.best_individual = DinosaurAI.from_dict(data["best_individual"], config=self.config["genetic"])
+            self.population = [DinosaurAI.from_dict(ind, config=self.config["genetic"]) for ind in data["population"]]
+            self.training_history = data.get("training_history", [])
+            self._load_engine_state(data.get("engine", {}))
+            
+            archive_path = self.novelty.archive_path(self.checkpoint_dir) if self.novelty else None
+            if archive_path and not os.path.exists(archive_path):
+                # 旧版本保存的存档
+                archive_path = os.path.splitext(archive_path)[0] + ".npy"
+            if archive_path and os.path.exists(archive_path):
+                self.novelty.archive.load(archive_path)
+                print(f"新颖性存档已恢复: {self.novelty.archive.size} 个行为描述子")
+            data_path = self.surrogate.data_path(self.checkpoint_dir) if self.surrogate else None
+            if data_path and os.path.exists(data_path):
+                self.surrogate.load(data_path)
+                print(f"代理模型数据已恢复: {len(self.surrogate.fitness)} 个已评估个体")
+            
+            print(f"从检查点恢复: {latest_file}")
+            print(f"当前代数: {self.generation}，最佳适应度: {self.best_fitness}")
+            return True
+            
+        except Exception as e:
+            print(f"加载检查点时出错: {e}")
+            return False
+    
+    def list_checkpoints(self):
+        """列出所有可用的检查点"""
+        try:
+            found = checkpoints.list_checkpoints(self.checkpoint_dir)
+            if not found:
+                print("没有找到检查点文件")
+            return found
+            
+        except Exception as e:
+             print(f"列出检查点时出错: {e}")
+             return []
+    
+    def generate_training_report(self):
+        """生成详细的训练统计报告"""
+        if not self.training_history:
+            print("没有训练历史数据")
+            return
+        
+        print("\n" + "="*80)
+        print("🎯 训练统计报告")
+        print("="*80)
+        
+        # 基本统计信息
+        total_generations = len(self.training_history)
+        total_time = sum(record['generation_time'] for record in self.training_history)
+        avg_time_per_gen = total_time / total_generations if total_generations > 0 else 0
+        
+        print(f"📊 基本统计:")
+        print(f"   总训练代数: {total_generations}")
+        print(f"   总训练时间: {total_time:.2f} 秒 ({total_time/60:.1f} 分钟)")
+        print(f"   平均每代时间: {avg_time_per_gen:.2f} 秒")
+        print(f"   最终最佳适应度: {self.best_fitness:.2f}")
+        print(f"   优化引擎: {self.engine.name}")
+        episodes = self.episode_summary()
+        if episodes:
+            print(f"   评估局数: {episodes['total_episodes']}，达到最高适应度时已用 {episodes['episodes_to_best']} 局")
+        
+        # 改进统计
+        improvements = sum(1 for record in self.training_history if record['improved'])
+        improvement_rate = improvements / total_generations * 100 if total_generations > 0 else 0
+        
+        print(f"\n📈 改进统计:")
+        print(f"   改进次数: {improvements}/{total_generations}")
+        print(f"   改进率: {improvement_rate:.1f}%")
+        
+        # 适应度统计
+        best_fitnesses = [record['best_fitness'] for record in self.training_history]
+        avg_fitnesses = [record['avg_fitness'] for record in self.training_history]
+        
+        print(f"\n🏆 适应度统计:")
+        print(f"   最高适应度: {max(best_fitnesses):.2f}")
+        print(f"   最低适应度: {min(best_fitnesses):.2f}")
+        print(f"   平均适应度: {sum(avg_fitnesses)/len(avg_fitnesses):.2f}")
+        print(f"   适应度标准差: {np.std(best_fitnesses):.2f}")
+        
+        # 性能统计
+        generation_times = [record['generation_time'] for record in self.training_history]
+        print(f"\n⏱️  性能统计:")
+        print(f"   最快一代: {min(generation_times):.2f} 秒")
+        print(f"   最慢一代: {max(generation_times):.2f} 秒")
+        print(f"   时间标准差: {np.std(generation_times):.2f} 秒")
+        
+        # 各阶段延迟统计
+        stage_latency = self.stage_latency_summary()
+        if stage_latency:
+            print(f"\n🔬 各阶段延迟 (毫秒):")
+            print(f"   {'阶段':<20}{'次数':>10}{'平均':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'最大':>10}")
+            for stage, data in sorted(stage_latency.items()):
+                print(f"   {stage:<20}{data['count']:>10}{data['mean_ms']:>10.2f}{data['p50_ms']:>10.2f}"
+                      f"{data['p95_ms']:>10.2f}{data['p99_ms']:>10.2f}{data['max_ms']:>10.2f}")
+        
+        # 决策调度统计
+        deadlines = self.deadline_summary()
+        if deadlines:
+            print(f"\n⏰ 决策调度:")
+            print(f"   目标频率: {deadlines['target_hz']:.1f} Hz，实际频率: {deadlines['achieved_hz']:.1f} Hz")
+            print(f"   迟到帧: {deadlines['late_frames']}/{deadlines['frames']} ({deadlines['late_frame_ratio']*100:.1f}%)，"
+                  f"平均每局 {deadlines['late_frames_per_episode']:.1f}")
+            print(f"   错过周期: {deadlines['missed_deadlines']}，最大迟到: {deadlines['max_late_ms']:.1f} 毫秒")
+        
+        # 趋势分析
+        if total_generations >= 5:
+            recent_best = best_fitnesses[-5:]
+            early_best = best_fitnesses[:5]
+            recent_avg = sum(recent_best) / len(recent_best)
+            early_avg = sum(early_best) / len(early_best)
+            trend = recent_avg - early_avg
+            
+            print(f"\n📊 趋势分析 (最近5代 vs 前5代):")
+            print(f"   早期平均最佳适应度: {early_avg:.2f}")
+            print(f"   近期平均最佳适应度: {recent_avg:.2f}")
+            print(f"   趋势: {'上升' if trend > 0 else '下降' if trend < 0 else '平稳'} ({trend:+.2f})")
+        
+        # 保存报告到文件
+        self.save_training_report()
+        
+        print("\n" + "="*80)
+    
+    def stage_latency_summary(self):
+        """合并所有代的阶段延迟直方图"""
+        merged = merge_stage_summaries(record['stage_latency'] for record in self.training_history if 'stage_latency' in record)
+        return {stage: histogram.summary() for stage, histogram in merged.items()}
+    
+    def episode_summary(self):
+        """总评估局数，以及本次训练首次达到最高适应度时已评估的局数（比较优化引擎的样本效率）"""
+        records = [record for record in self.training_history if 'episodes' in record]
+        if not records:
+            return None
+        best_index = int(np.argmax([record['best_fitness'] for record in records]))
+        return {
+            "total_episodes": sum(record['episodes'] for record in records),
+            "episodes_to_best": sum(record['episodes'] for record in records[:best_index + 1])
+        }
+    
+    def deadline_summary(self):
+        """合并所有代的决策调度统计"""
+        return merge_deadline_summaries(record['deadlines'] for record in self.training_history if 'deadlines' in record)
+    
+    def save_training_report(self):
+        """保存训练报告到文件"""
+        try:
+            timestamp = time.strftime("%Y%m%d_%H%M%S")
+            report_file = f"training_report_{timestamp}.json"
+            
+            report_data = {
+                "timestamp": timestamp,
+                "generation": self.generation,
+                "best_fitness": self.best_fitness,
+                "training_history": self.training_history,
+                "summary": {
+                    "total_generations": len(self.training_history),
+                    "total_time": sum(record['generation_time'] for record in self.training_history),
+                    "improvements": sum(1 for record in self.training_history if record['improved']),
+                    "final_best_fitness": self.best_fitness,
+                    "stage_latency": self.stage_latency_summary(),
+                    "deadlines": self.deadline_summary(),
+                    "optimizer": self.engine.name,
+                    "episodes": self.episode_summary()
+                },
+                "config": self.config
+            }
+            
+            with open(report_file, "w") as f:
+                json.dump(report_data, f, indent=2)
+            
+            print(f"📄 训练报告已保存到: {report_file}")
+            
+        except Exception as e:
+            print(f"保存训练报告时出错: {e}")
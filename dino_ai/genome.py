@@ -0,0 +1,329 @@
+"""个体基因与决策网络
+
+种群（Population）把所有个体的基因存放在一个(N, GENOME_SIZE)的float64矩阵中，每个个体只占矩阵的一行
+和一个截断局数计数；按下标访问时才创建DinosaurAI视图，种群本身不保存个体对象。
+"""
+import hashlib
+import operator
+import random
+
+import numpy as np
+
+from .eventlog import log
+
+# 基因布局：5个权重 + 跳跃偏置 + 下蹲偏置，连续存放在一个float64数组中
+GENOME_SIZE = 7
+WEIGHTS = slice(0, 5)
+JUMP_BIAS = 5
+DUCK_BIAS = 6
+
+# 未指定种群级超参数时使用的默认值
+DEFAULT_GENETIC_PARAMS = {"mutation_rate": 0.1, "mutation_scale": 0.2}
+
+# 个体类（DinosaurAI）
+class DinosaurAI:
+    # 个体只保存基因数组、对种群共享超参数字典的引用和最近一次评估中达到单局得分上限的局数，不再有实例__dict__
+    __slots__ = ("genes", "params", "_capped")
+    
+    def __init__(self, weights=None, bias=None, config=None, genes=None, capped=None):
+        # 超参数由种群共享（同一个字典对象），个体不复制
+        self.params = config if config is not None else DEFAULT_GENETIC_PARAMS
+        # 适应度中有几局被单局预算截断（budget.EpisodeBudget），截断的得分只是下界。
+        # 独立的个体直接保存整数；种群视图传入capped（种群计数数组中长度为1的切片），读写直接落在种群中
+        self._capped = capped if capped is not None else 0
+        
+        # genes可以是外部共享缓冲区（如种群基因矩阵的一行）的视图
+        if genes is not None:
+            self.genes = genes
+            return
+        
+        # 初始化权重和偏置
+        # 输入特征：[距离下一个障碍物的距离, 障碍物宽度, 障碍物高度, 障碍物类型(0=仙人掌,1=翼龙), 游戏速度]
+        self.genes = np.empty(GENOME_SIZE)
+        if weights is None:
+            self.genes[WEIGHTS] = np.random.uniform(-1, 1, 5)
+        else:
+            self.genes[WEIGHTS] = weights
+            
+        # 跳跃和下蹲的偏置
+        if bias is None:
+            self.genes[JUMP_BIAS] = np.random.uniform(-1, 1)
+            self.genes[DUCK_BIAS] = np.random.uniform(-1, 1)
+        else:
+            self.genes[JUMP_BIAS] = bias[0]
+            self.genes[DUCK_BIAS] = bias[1]
+    
+    @property
+    def weights(self):
+        """权重（基因数组的视图，原地修改会直接写回基因）"""
+        return self.genes[WEIGHTS]
+    
+    @weights.setter
+    def weights(self, value):
+        self.genes[WEIGHTS] = value
+    
+    @property
+    def jump_bias(self):
+        return self.genes[JUMP_BIAS]
+    
+    @jump_bias.setter
+    def jump_bias(self, value):
+        self.genes[JUMP_BIAS] = value
+    
+    @property
+    def duck_bias(self):
+        return self.genes[DUCK_BIAS]
+    
+    @duck_bias.setter
+    def duck_bias(self, value):
+        self.genes[DUCK_BIAS] = value
+    
+    @property
+    def capped_runs(self):
+        capped = self._capped
+        return capped if isinstance(capped, int) else int(capped[0])
+    
+    @capped_runs.setter
+    def capped_runs(self, value):
+        if isinstance(self._capped, int):
+            self._capped = int(value)
+        else:
+            self._capped[0] = value
+    
+    @property
+    def mutation_rate(self):
+        return self.params.get("mutation_rate", 0.1)
+    
+    @property
+    def mutation_scale(self):
+        return self.params.get("mutation_scale", 0.2)
+    
+    def genome_hash(self):
+        """基因的短哈希，用于在录制和日志中标识个体"""
+        return hashlib.sha1(self.genes.tobytes()).hexdigest()[:16]
+    
+    def __reduce__(self):
+        # 序列化时只保存56字节的基因和截断局数，超参数由接收方的种群重新关联
+        return (_genome_from_bytes, (self.genes.tobytes(), self.capped_runs))
+    
+    def copy(self):
+        """独立的副本（不再引用种群的基因矩阵）"""
+        individual = DinosaurAI(config=self.params, genes=self.genes.copy())
+        individual.capped_runs = self.capped_runs
+        return individual
+    
+    def relu(self, x):
+        """ReLU激活函数"""
+        return max(0, x)
+    
+    def sigmoid(self, x):
+        """Sigmoid激活函数"""
+        return 1 / (1 + np.exp(-x))
+    
+    def predict(self, game_state):
+        """基于游戏状态预测动作"""
+        # 如果没有障碍物，不执行任何动作
+        if not game_state['obstacles']:
+            return {'jump': False, 'duck': False}
+        
+        # 获取最近的障碍物和恐龙状态
+        obstacle = game_state['obstacles'][0]
+        dino = game_state['dino']
+        
+        # 检查恐龙是否在跳跃状态
+        is_jumping = dino.get('jumping', False)
+        has_ducked_in_jump = dino.get('has_ducked_in_jump', False)
+        
+        # 安全获取特征值，确保不为None
+        distance = float(obstacle.get('x', 0) - (dino.get('x', 0) + dino.get('width', 40)))
+        obstacle_width = float(obstacle.get('width', 20))
+        obstacle_height = float(obstacle.get('height', 40))
+        
+        # 处理新的翼龙类型
+        obstacle_type_str = obstacle.get('type', 'CACTUS')
+        if obstacle_type_str in ['PTERODACTYL', 'PTERODACTYL_LOW', 'PTERODACTYL_HIGH']:
+            obstacle_type = 1.0
+        else:
+            obstacle_type = 0.0
+            
+        speed = float(game_state.get('speed', 6))
+        
+        # 特征向量
+        features = np.array([distance, obstacle_width, obstacle_height, obstacle_type, speed])
+        
+        # 验证特征向量
+        if np.any(np.isnan(features)) or np.any(np.isinf(features)):
+            log.warning("invalid_features", features=features.tolist())
+            return {'jump': False, 'duck': False}
+        
+        try:
+            # 计算跳跃和下蹲的决策值
+            genes = self.genes
+            weights = genes[WEIGHTS]
+            jump_value = np.dot(weights, features) + genes[JUMP_BIAS]
+            duck_value = np.dot(weights * -0.5, features) + genes[DUCK_BIAS]  # 下蹲使用不同的权重
+            
+            # 应用激活函数
+            jump_prob = self.sigmoid(jump_value)
+            duck_prob = self.sigmoid(duck_value)
+            
+            # 决策逻辑
+            jump = jump_prob > 0.5 and not is_jumping  # 只有在不跳跃时才能开始跳跃
+            
+            # 改进的决策逻辑：根据翼龙高度做出不同反应
+            duck = False
+            
+            # 获取障碍物类型
+            obstacle_type_str = obstacle.get('type', 'CACTUS')
+            
+            if is_jumping:
+                # 跳跃中下蹲：当距离障碍物较近且需要快速落地时，且本次跳跃还未下蹲过
+                if distance < 120 and duck_prob > 0.5 and not has_ducked_in_jump:
+                    duck = True
+            else:
+                # 地面决策逻辑
+                if obstacle_type_str == 'PTERODACTYL_LOW':
+                    # 低空翼龙：需要跳跃，不下蹲
+                    jump = jump_prob > 0.4  # 降低跳跃阈值，更容易跳跃
+                    duck = False
+                    if log.debug_on:
+                        log.debug("pterodactyl_low_jump", distance=distance, jump_prob=jump_prob)
+                elif obstacle_type_str == 'PTERODACTYL_HIGH':
+                    # 高空翼龙：需要下蹲
+                    distance_threshold = max(0.3, 0.7 - distance / 200)
+                    duck = duck_prob > distance_threshold and not jump
+                    jump = False  # 确保不跳跃
+                    if duck and log.debug_on:
+                        log.debug("pterodactyl_high_duck", distance=distance, duck_prob=duck_prob, threshold=distance_threshold)
+                elif obstacle_type_str == 'PTERODACTYL':
+                    # 旧版翼龙类型，默认下蹲
+                    distance_threshold = max(0.3, 0.8 - distance / 200)
+                    duck = duck_prob > distance_threshold and not jump
+                    if duck and log.debug_on:
+                        log.debug("pterodactyl_duck", distance=distance, duck_prob=duck_prob, threshold=distance_threshold)
+                else:
+                    # 仙人掌：完全禁止下蹲，只能跳跃
+                    duck = False
+                    # 对仙人掌提高跳跃概率
+                    if jump_prob > 0.4:
+                        jump = True
+            
+            return {'jump': jump, 'duck': duck}
+            
+        except Exception as e:
+            log.error("predict_failed", error=str(e), features=features.tolist(), weights=self.weights.tolist())
+            return {'jump': False, 'duck': False}
+
+    def mutate(self):
+        """随机变异"""
+        mutation_rate = self.mutation_rate
+        mutation_scale = self.mutation_scale
+        weights = self.genes[WEIGHTS]
+        
+        # 权重变异
+        mask = np.random.random(weights.shape) < mutation_rate
+        weights += mask * np.random.uniform(-mutation_scale, mutation_scale, weights.shape)
+        
+        # 偏置变异
+        if random.random() < mutation_rate:
+            self.genes[JUMP_BIAS] += np.random.uniform(-mutation_scale, mutation_scale)
+        if random.random() < mutation_rate:
+            self.genes[DUCK_BIAS] += np.random.uniform(-mutation_scale, mutation_scale)
+
+    def to_dict(self):
+        """将个体的基因保存为字典（适应度被截断过时附带截断的局数）"""
+        data = {
+            "weights": self.genes[WEIGHTS].tolist(),
+            "bias": [float(self.genes[JUMP_BIAS]), float(self.genes[DUCK_BIAS])]
+        }
+        if self.capped_runs:
+            data["capped_runs"] = self.capped_runs
+        return data
+
+    @staticmethod
+    def from_dict(data, config=None):
+        """从字典加载个体"""
+        individual = DinosaurAI(weights=data["weights"], bias=data["bias"], config=config)
+        individual.capped_runs = data.get("capped_runs", 0)
+        return individual
+
+
+def _genome_from_bytes(data, capped_runs=0):
+    """反序列化个体（pickle使用）"""
+    individual = DinosaurAI(genes=np.frombuffer(data, dtype=np.float64).copy())
+    individual.capped_runs = capped_runs
+    return individual
+
+
+class Population:
+    """按下标访问的种群：基因是一个(N, GENOME_SIZE)矩阵，截断局数是一个长度为N的整数数组
+
+    population[i]每次返回一个新的DinosaurAI视图，基因和截断局数的修改直接写回种群；
+    切片返回共享同一块缓冲区的Population，与其他种群或个体列表相加得到新的Population（复制）。
+    视图不是同一个对象，比较个体请使用下标。
+    """
+    __slots__ = ("genes", "params", "capped_runs")
+    
+    def __init__(self, genes, config=None, capped_runs=None):
+        self.genes = genes
+        self.params = config if config is not None else DEFAULT_GENETIC_PARAMS
+        self.capped_runs = capped_runs if capped_runs is not None else np.zeros(len(genes), dtype=np.int64)
+    
+    @staticmethod
+    def random(size, config=None):
+        """基因在[-1, 1)内均匀随机的种群（与DinosaurAI的随机初始化相同的分布）"""
+        return Population(np.random.uniform(-1, 1, (size, GENOME_SIZE)), config)
+    
+    @staticmethod
+    def from_individuals(individuals, config=None):
+        """把个体（或种群）的基因和截断局数复制到新的种群"""
+        if isinstance(individuals, Population):
+            return Population(individuals.genes.copy(), config or individuals.params, individuals.capped_runs.copy())
+        individuals = list(individuals)
+        capped_runs = np.array([individual.capped_runs for individual in individuals], dtype=np.int64)
+        return Population(genome_matrix(individuals), config, capped_runs)
+    
+    def __len__(self):
+        return len(self.genes)
+    
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return Population(self.genes[key], self.params, self.capped_runs[key])
+        index = operator.index(key)
+        if index < 0:
+            index += len(self.genes)
+        if not 0 <= index < len(self.genes):
+            raise IndexError("种群下标越界")
+        return DinosaurAI(config=self.params, genes=self.genes[index], capped=self.capped_runs[index:index + 1])
+    
+    def __iter__(self):
+        for index in range(len(self.genes)):
+            yield self[index]
+    
+    def __add__(self, other):
+        if not isinstance(other, Population):
+            other = Population.from_individuals(other, self.params)
+        return Population(np.concatenate([self.genes, other.genes]), self.params,
+                          np.concatenate([self.capped_runs, other.capped_runs]))
+    
+    def __radd__(self, other):
+        return Population.from_individuals(other, self.params) + self
+    
+    def __reduce__(self):
+        # 与单个个体一样不序列化超参数
+        return (Population, (self.genes, None, self.capped_runs))
+
+
+def genome_matrix(population):
+    """把种群的基因打包成(N, GENOME_SIZE)的连续float64矩阵（总是返回新的矩阵）"""
+    if isinstance(population, Population):
+        return population.genes.copy()
+    matrix = np.empty((len(population), GENOME_SIZE))
+    for i, individual in enumerate(population):
+        matrix[i] = individual.genes
+    return matrix
+
+
+def population_from_matrix(matrix, config=None):
+    """用基因矩阵创建种群（不复制，个体视图直接读写矩阵的行）"""
+    return Population(matrix, config)
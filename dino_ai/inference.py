@@ -0,0 +1,465 @@
+"""批量策略推理服务：集中持有一组基因，游戏客户端通过Unix或TCP套接字请求决策，并发请求合并为一次向量化计算
+
+服务持有的基因目录：种群文件中的最佳个体，以及检查点目录中每个检查点的最佳个体（按代数从新到旧）。
+
+协议（小端定长二进制帧）:
+    连接建立后服务端先发送目录：4字节长度 + JSON [{"name", "hash", "fitness"}, ...]，列表下标即基因编号
+    请求 24字节  <IHBB4f  请求编号, 基因编号, 障碍物类型(0仙人掌/1翼龙/2低空翼龙/3高空翼龙),
+                          恐龙状态(0地面/1跳跃中/2跳跃中已下蹲), 距离, 宽度, 高度, 速度
+    响应 8字节   <IB3x    请求编号, 动作(bit0跳跃，bit1下蹲)
+客户端可以连续发送多个请求，同一连接内的响应按请求顺序返回。没有障碍物时客户端直接返回不动作，不发请求。
+
+服务端每个连接一个读线程，请求按到达顺序进入队列；批处理线程取出第一批请求后最多再等待max_wait_ms、
+凑满max_batch个请求，一次矩阵运算算出整批决策，再按连接写回响应。
+
+用法:
+    python -m dino_ai.inference serve [--population dino_population.json] [--checkpoints checkpoints] [--address 127.0.0.1:9110]
+    python -m dino_ai.inference loadtest [--clients 16] [--requests 2000]   本机回环压测，输出吞吐量和尾延迟
+
+配置（config["inference"]，均为可选）:
+    address      监听地址，"host:port" 或 "unix:/path/to.sock"，默认127.0.0.1:9110
+    max_batch    每批最多合并的请求数，默认256
+    max_wait_ms  凑批时最多等待的毫秒数，默认1
+展示模式下配置 "policy": {"server": 地址, "genome": 基因编号} 即通过推理服务决策。
+"""
+import json
+import os
+import queue
+import random
+import socket
+import struct
+import threading
+import time
+
+import numpy as np
+
+from .checkpoints import find_checkpoint_files, read_checkpoint
+from .genome import DUCK_BIAS, GENOME_SIZE, JUMP_BIAS, WEIGHTS, DinosaurAI
+from .instrumentation import LatencyHistogram
+from .policy_table import ACTIONS, TYPE_INDEX, TYPE_NAMES, decision_codes
+
+DEFAULT_ADDRESS = "127.0.0.1:9110"
+
+DEFAULT_INFERENCE = {
+    "address": DEFAULT_ADDRESS,
+    "max_batch": 256,
+    "max_wait_ms": 1.0,
+}
+
+CATALOGUE_HEADER = struct.Struct("<I")
+REQUEST = struct.Struct("<IHBB4f")
+RESPONSE = struct.Struct("<IB3x")
+# 与REQUEST/RESPONSE布局相同，整批请求可以直接用np.frombuffer解析
+REQUEST_DTYPE = np.dtype([("id", "<u4"), ("genome", "<u2"), ("type", "u1"), ("jump", "u1"), ("features", "<f4", (4,))])
+RESPONSE_DTYPE = np.dtype([("id", "<u4"), ("action", "u1"), ("pad", "V3")])
+
+# 读线程每次recv的最大字节数
+RECV_SIZE = 65536
+
+
+def parse_address(address):
+    """返回(套接字族, 地址)：unix:路径 或 host:port"""
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, address[len("unix:"):]
+    host, _, port = address.rpartition(":")
+    return socket.AF_INET, (host or "127.0.0.1", int(port))
+
+
+def encode_state(game_state):
+    """游戏状态 -> (类型, 恐龙状态, 距离, 宽度, 高度, 速度)，没有障碍物时返回None"""
+    obstacles = game_state['obstacles']
+    if not obstacles:
+        return None
+    obstacle = obstacles[0]
+    dino = game_state['dino']
+    jump_state = (2 if dino.get('has_ducked_in_jump', False) else 1) if dino.get('jumping', False) else 0
+    return (
+        TYPE_INDEX.get(obstacle.get('type'), 0),
+        jump_state,
+        obstacle.get('x', 0) - (dino.get('x', 0) + dino.get('width', 40)),
+        obstacle.get('width', 20),
+        obstacle.get('height', 40),
+        game_state.get('speed', 6)
+    )
+
+
+def decide(genes, requests):
+    """整批请求的动作代码：genes为基因矩阵(n, GENOME_SIZE)，requests为REQUEST_DTYPE数组"""
+    valid = requests["genome"] < len(genes)
+    selected = genes[np.where(valid, requests["genome"], 0)]
+    features = requests["features"].astype(np.float64)
+    weights = selected[:, WEIGHTS]
+    # 请求中的特征顺序为 距离/宽度/高度/速度，类型特征单独计算
+    linear = (np.einsum('ij,ij->i', weights[:, [0, 1, 2, 4]], features)
+              + weights[:, 3] * (requests["type"] > 0))
+    jump_prob = 1 / (1 + np.exp(-(linear + selected[:, JUMP_BIAS])))
+    duck_prob = 1 / (1 + np.exp(-(-0.5 * linear + selected[:, DUCK_BIAS])))
+    codes = decision_codes(jump_prob, duck_prob, features[:, 0], requests["type"], requests["jump"])
+    return np.where(valid, codes, 0).astype(np.uint8)
+
+
+def load_genomes(population_file="dino_population.json", checkpoint_dir="checkpoints"):
+    """收集种群文件和所有检查点中的最佳个体，返回(目录, 基因矩阵)"""
+    catalogue, rows = [], []
+
+    def add(name, data, fitness):
+        if data:
+            individual = DinosaurAI.from_dict(data)
+            catalogue.append({"name": name, "hash": individual.genome_hash(), "fitness": fitness})
+            rows.append(individual.genes)
+
+    if os.path.isfile(population_file):
+        with open(population_file, "r") as f:
+            data = json.load(f)
+        add(os.path.basename(population_file), data.get("best_individual"), data.get("best_fitness"))
+
+    if os.path.isdir(checkpoint_dir):
+        entries = []
+        for file in find_checkpoint_files(checkpoint_dir):
+            try:
+                entries.append((file, read_checkpoint(os.path.join(checkpoint_dir, file))))
+            except (OSError, ValueError):
+                continue
+        entries.sort(key=lambda entry: entry[1].get("generation", 0), reverse=True)
+        for file, data in entries:
+            add(file, data.get("best_individual"), data.get("best_fitness"))
+
+    return catalogue, np.array(rows, dtype=np.float64).reshape(-1, GENOME_SIZE)
+
+
+class InferenceServer:
+    """在后台线程中提供批量推理"""
+
+    def __init__(self, catalogue, genes, address=DEFAULT_ADDRESS, max_batch=256, max_wait_ms=1.0):
+        self.catalogue = catalogue
+        self.genes = np.asarray(genes, dtype=np.float64).reshape(-1, GENOME_SIZE)
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue = queue.SimpleQueue()
+        self.latency = LatencyHistogram()
+        self.requests = 0
+        self.batches = 0
+        self.max_batch_seen = 0
+        self.closed = False
+
+        self.family, target = parse_address(address)
+        if self.family == socket.AF_UNIX and os.path.exists(target):
+            os.remove(target)
+        self.listener = socket.socket(self.family, socket.SOCK_STREAM)
+        if self.family == socket.AF_INET:
+            self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind(target)
+        self.listener.listen(128)
+        # 定期醒来检查是否已关闭
+        self.listener.settimeout(0.5)
+        self.started = time.perf_counter()
+
+        self.threads = [
+            threading.Thread(target=self._accept_loop, name="dino-inference-accept", daemon=True),
+            threading.Thread(target=self._batch_loop, name="dino-inference-batch", daemon=True),
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    @property
+    def address(self):
+        if self.family == socket.AF_UNIX:
+            return "unix:" + self.listener.getsockname()
+        host, port = self.listener.getsockname()[:2]
+        return f"{host}:{port}"
+
+    def _accept_loop(self):
+        while not self.closed:
+            try:
+                conn, _ = self.listener.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            conn.settimeout(None)
+            if self.family == socket.AF_INET:
+                conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self._read_loop, args=(conn,), name="dino-inference-conn", daemon=True).start()
+
+    def _read_loop(self, conn):
+        """发送目录后把收到的完整请求帧放入队列"""
+        payload = json.dumps(self.catalogue).encode("utf-8")
+        pending = b""
+        try:
+            conn.sendall(CATALOGUE_HEADER.pack(len(payload)) + payload)
+            while not self.closed:
+                data = conn.recv(RECV_SIZE)
+                if not data:
+                    break
+                pending += data
+                usable = len(pending) - len(pending) % REQUEST.size
+                if usable:
+                    self.queue.put((conn, pending[:usable], time.perf_counter()))
+                    pending = pending[usable:]
+        except OSError:
+            pass
+        finally:
+            conn.close()
+
+    def _batch_loop(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            items = [item]
+            count = len(item[1]) // REQUEST.size
+            deadline = time.perf_counter() + self.max_wait
+            stop = False
+            while count < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                try:
+                    item = self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                items.append(item)
+                count += len(item[1]) // REQUEST.size
+            self._process(items)
+            if stop:
+                return
+
+    def _process(self, items):
+        """一次计算整批决策，并按连接合并写回响应"""
+        requests = np.frombuffer(b"".join(payload for _, payload, _ in items), dtype=REQUEST_DTYPE)
+        responses = np.zeros(len(requests), dtype=RESPONSE_DTYPE)
+        responses["id"] = requests["id"]
+        responses["action"] = decide(self.genes, requests)
+        data = responses.tobytes()
+
+        replies = {}
+        offset = 0
+        for conn, payload, _ in items:
+            end = offset + len(payload) // REQUEST.size * RESPONSE.size
+            replies.setdefault(conn, []).append(data[offset:end])
+            offset = end
+        for conn, parts in replies.items():
+            try:
+                conn.sendall(b"".join(parts))
+            except OSError:
+                pass
+
+        now = time.perf_counter()
+        for _, payload, arrived in items:
+            for _ in range(len(payload) // REQUEST.size):
+                self.latency.record(now - arrived)
+        self.requests += len(requests)
+        self.batches += 1
+        self.max_batch_seen = max(self.max_batch_seen, len(requests))
+
+    def stats(self):
+        """吞吐量、批大小和服务端延迟（收到请求到写回响应）"""
+        elapsed = time.perf_counter() - self.started
+        return {
+            "genomes": len(self.genes),
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch": self.requests / self.batches if self.batches else 0.0,
+            "max_batch": self.max_batch_seen,
+            "throughput": self.requests / elapsed if elapsed > 0 else 0.0,
+            "p50_ms": self.latency.percentile(50),
+            "p99_ms": self.latency.percentile(99),
+            "max_ms": self.latency.max
+        }
+
+    def close(self):
+        self.closed = True
+        self.queue.put(None)
+        for thread in self.threads:
+            thread.join(timeout=2)
+        if self.family == socket.AF_UNIX:
+            path = self.listener.getsockname()
+            self.listener.close()
+            if os.path.exists(path):
+                os.remove(path)
+        else:
+            self.listener.close()
+
+
+class InferenceClient:
+    """推理服务客户端，predict接口与DinosaurAI.predict相同"""
+
+    def __init__(self, address=DEFAULT_ADDRESS, genome=0, timeout=5):
+        family, target = parse_address(address)
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(target)
+        if family == socket.AF_INET:
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        size, = CATALOGUE_HEADER.unpack(self._recv_exact(CATALOGUE_HEADER.size))
+        self.catalogue = json.loads(self._recv_exact(size).decode("utf-8"))
+        if not 0 <= genome < len(self.catalogue):
+            self.sock.close()
+            raise ValueError(f"基因编号 {genome} 超出范围（服务共有 {len(self.catalogue)} 个基因）")
+        self.genome = genome
+        self.next_id = 0
+
+    def _recv_exact(self, size):
+        data = b""
+        while len(data) < size:
+            chunk = self.sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("推理服务关闭了连接")
+            data += chunk
+        return data
+
+    def request(self, encoded):
+        """发送一个encode_state编码后的状态，返回动作代码"""
+        request_id = self.next_id
+        self.next_id = (self.next_id + 1) & 0xFFFFFFFF
+        self.sock.sendall(REQUEST.pack(request_id, self.genome, *encoded))
+        response_id, action = RESPONSE.unpack(self._recv_exact(RESPONSE.size))
+        if response_id != request_id:
+            raise ConnectionError(f"响应编号不匹配: {response_id} != {request_id}")
+        return action
+
+    def predict(self, game_state):
+        encoded = encode_state(game_state)
+        return ACTIONS[0] if encoded is None else ACTIONS[self.request(encoded)]
+
+    def close(self):
+        self.sock.close()
+
+
+def start_inference_server(config, population_file="dino_population.json", checkpoint_dir="checkpoints"):
+    """加载基因目录并按config["inference"]启动推理服务，没有可用基因时返回None"""
+    settings = dict(DEFAULT_INFERENCE)
+    settings.update(config.get("inference", {}))
+    catalogue, genes = load_genomes(population_file, checkpoint_dir)
+    if not catalogue:
+        return None
+    return InferenceServer(catalogue, genes, settings["address"], settings["max_batch"], settings["max_wait_ms"])
+
+
+def _synthetic_states(count, rng):
+    """压测用的随机游戏状态"""
+    states = []
+    for _ in range(count):
+        jumping = rng.random() < 0.3
+        states.append({
+            'dino': {'x': 50, 'width': 40, 'jumping': jumping, 'has_ducked_in_jump': jumping and rng.random() < 0.3},
+            'obstacles': [{
+                'x': 90 + rng.uniform(-60, 600),
+                'width': rng.uniform(10, 75),
+                'height': rng.uniform(10, 75),
+                'type': rng.choice(TYPE_NAMES)
+            }],
+            'speed': rng.uniform(6, 13)
+        })
+    return states
+
+
+def load_test(clients=16, requests=2000, genome_count=8, max_batch=256, max_wait_ms=1.0, address="127.0.0.1:0"):
+    """本机回环压测：clients个客户端线程各发送requests个请求（每个客户端同时只有一个在途请求）
+
+    返回客户端观测的吞吐量和延迟分位数、服务端的平均批大小，以及服务端决策与DinosaurAI.predict的一致率。
+    """
+    rng = random.Random(0)
+    individuals = [DinosaurAI() for _ in range(genome_count)]
+    catalogue = [{"name": f"random_{i}", "hash": ind.genome_hash(), "fitness": None} for i, ind in enumerate(individuals)]
+    server = InferenceServer(catalogue, [ind.genes for ind in individuals], address, max_batch, max_wait_ms)
+    states = _synthetic_states(1000, rng)
+    encoded = [encode_state(state) for state in states]
+    latencies = [[] for _ in range(clients)]
+    agreement = [0] * clients
+    barrier = threading.Barrier(clients + 1, timeout=30)
+
+    def run(index):
+        client = InferenceClient(server.address, index % genome_count)
+        individual = individuals[index % genome_count]
+        barrier.wait()
+        timings = latencies[index]
+        for i in range(requests):
+            start = time.perf_counter()
+            action = client.request(encoded[i % len(encoded)])
+            timings.append(time.perf_counter() - start)
+            # 检查前一部分请求的结果与本地predict一致
+            if i < len(states) and ACTIONS[action] == individual.predict(states[i]):
+                agreement[index] += 1
+        client.close()
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(clients)]
+    try:
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        server_stats = server.stats()
+    finally:
+        server.close()
+
+    ordered = np.sort(np.concatenate([np.asarray(timings) for timings in latencies])) * 1000
+    checked = clients * min(requests, len(states))
+    return {
+        "clients": clients,
+        "requests": len(ordered),
+        "throughput": len(ordered) / elapsed,
+        "p50_ms": float(np.percentile(ordered, 50)),
+        "p95_ms": float(np.percentile(ordered, 95)),
+        "p99_ms": float(np.percentile(ordered, 99)),
+        "max_ms": float(ordered[-1]),
+        "mean_batch": server_stats["mean_batch"],
+        "agreement": sum(agreement) / checked if checked else 1.0
+    }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="批量策略推理服务")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    serve_parser = subparsers.add_parser("serve", help="加载种群和检查点中的最佳个体并提供推理服务")
+    serve_parser.add_argument("--population", default="dino_population.json")
+    serve_parser.add_argument("--checkpoints", default="checkpoints")
+    serve_parser.add_argument("--address", default=DEFAULT_ADDRESS, help="host:port 或 unix:/path/to.sock")
+    serve_parser.add_argument("--max-batch", type=int, default=DEFAULT_INFERENCE["max_batch"])
+    serve_parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_INFERENCE["max_wait_ms"])
+    serve_parser.add_argument("--stats-interval", type=float, default=10, help="打印统计的间隔（秒）")
+    load_parser = subparsers.add_parser("loadtest", help="本机回环压测")
+    load_parser.add_argument("--clients", type=int, default=16)
+    load_parser.add_argument("--requests", type=int, default=2000, help="每个客户端的请求数")
+    load_parser.add_argument("--max-batch", type=int, default=DEFAULT_INFERENCE["max_batch"])
+    load_parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_INFERENCE["max_wait_ms"])
+    load_parser.add_argument("--address", default="127.0.0.1:0", help="压测监听地址，默认随机端口")
+    args = parser.parse_args()
+
+    if args.command == "loadtest":
+        result = load_test(args.clients, args.requests, max_batch=args.max_batch,
+                           max_wait_ms=args.max_wait_ms, address=args.address)
+        print(f"🚀 {result['clients']} 个客户端，共 {result['requests']} 个请求")
+        print(f"   吞吐量: {result['throughput']:.0f} 请求/秒，平均批大小: {result['mean_batch']:.1f}")
+        print(f"   延迟: p50 {result['p50_ms']:.3f} ms，p95 {result['p95_ms']:.3f} ms，"
+              f"p99 {result['p99_ms']:.3f} ms，最大 {result['max_ms']:.3f} ms")
+        print(f"   与predict的一致率: {result['agreement'] * 100:.2f}%")
+        return
+
+    config = {"inference": {"address": args.address, "max_batch": args.max_batch, "max_wait_ms": args.max_wait_ms}}
+    server = start_inference_server(config, args.population, args.checkpoints)
+    if server is None:
+        raise SystemExit(f"{args.population} 和 {args.checkpoints} 中没有可用的最佳个体")
+    print(f"🧠 推理服务: {server.address}，{len(server.catalogue)} 个基因")
+    for index, entry in enumerate(server.catalogue):
+        print(f"   [{index}] {entry['name']} - 适应度: {entry['fitness']} - {entry['hash']}")
+    try:
+        while True:
+            time.sleep(args.stats_interval)
+            stats = server.stats()
+            print(f"📊 {stats['requests']} 个请求，{stats['throughput']:.0f} 请求/秒，平均批大小 {stats['mean_batch']:.1f}，"
+                  f"p50 {stats['p50_ms']:g} ms，p99 {stats['p99_ms']:g} ms")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""控制循环各阶段的延迟统计（固定分桶直方图，常开且开销极低）"""
+from bisect import bisect_left
+from contextlib import contextmanager
+from time import perf_counter
+
+# 直方图分桶上界（毫秒），最后一个桶收集所有更慢的样本
+BUCKET_BOUNDS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class LatencyHistogram:
+    """固定分桶的延迟直方图"""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        """记录一次耗时（秒）"""
+        ms = seconds * 1000
+        self.counts[bisect_left(BUCKET_BOUNDS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def merge(self, other):
+        """合并另一个直方图"""
+        for i, c in enumerate(other.counts):
+            self.counts[i] += c
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, p):
+        """返回第p百分位所在桶的上界（毫秒），溢出桶返回最大值"""
+        if self.count == 0:
+            return 0.0
+        target = self.count * p / 100
+        cumulative = 0
+        for i, c in enumerate(self.counts):
+            cumulative += c
+            if cumulative >= target:
+                return min(BUCKET_BOUNDS_MS[i], self.max) if i < len(BUCKET_BOUNDS_MS) else self.max
+        return self.max
+
+    def summary(self):
+        """导出为可JSON序列化的摘要，保留分桶以便跨代合并"""
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max,
+            "buckets": list(self.counts)
+        }
+
+    @staticmethod
+    def from_summary(data):
+        """从summary()的结果还原直方图"""
+        histogram = LatencyHistogram()
+        histogram.counts = list(data["buckets"])
+        histogram.count = data["count"]
+        histogram.total = data["mean_ms"] * data["count"]
+        histogram.max = data["max_ms"]
+        return histogram
+
+
+class StageTimings:
+    """按阶段名称聚合的延迟直方图集合"""
+
+    def __init__(self):
+        self.histograms = {}
+
+    def record(self, stage, seconds):
+        """记录某阶段的一次耗时（秒）"""
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = LatencyHistogram()
+        histogram.record(seconds)
+
+    @contextmanager
+    def time(self, stage):
+        """计时上下文: with stage_timings.time("predict"): ..."""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, perf_counter() - start)
+
+    def summary(self):
+        """各阶段的摘要字典"""
+        return {stage: histogram.summary() for stage, histogram in self.histograms.items()}
+
+    def merge_summary(self, summary):
+        """合并其他进程导出的summary()结果"""
+        for stage, histogram in merge_stage_summaries([summary]).items():
+            if stage in self.histograms:
+                self.histograms[stage].merge(histogram)
+            else:
+                self.histograms[stage] = histogram
+
+    def reset(self):
+        """清空所有统计（每代开始时调用）"""
+        self.histograms = {}
+
+
+def merge_stage_summaries(summaries):
+    """合并多代的阶段摘要，返回{阶段: LatencyHistogram}"""
+    merged = {}
+    for summary in summaries:
+        for stage, data in summary.items():
+            histogram = LatencyHistogram.from_summary(data)
+            if stage in merged:
+                merged[stage].merge(histogram)
+            else:
+                merged[stage] = histogram
+    return merged
+
+
+# 全局阶段统计，游戏后端和训练循环共用
+stage_timings = StageTimings()
@@ -0,0 +1,140 @@
+"""评估日志：每局结束立即追加一条记录，训练中断后重新开始时跳过已完成的局（仅依赖标准库）
+
+文件为JSON Lines（默认 检查点目录/evaluation_journal.jsonl），每行一条记录:
+    {"generation": 代数, "index": 个体下标, "genome": 基因哈希, "copy": 同一基因在种群中的第几份, "run": 局序号,
+     "score": 得分, "steps": 步数, "capped": 是否被单局预算截断, "descriptor": 行为描述子（启用新颖性搜索时）}
+每条记录写入后立即flush，强制中断最多损失正在进行的一局。
+恢复时按(代数, 基因哈希, 第几份, 局序号)查找，与个体在种群中的位置无关：恢复后的种群与中断时不同
+（顺序变化、从较早的检查点恢复）时，只有基因相同的个体才会使用记录的得分，其他个体重新评估。
+下标只用于查看日志。一代评估完成且下一代种群已保存后，日志中该代及更早的记录不再需要，文件被重写。
+
+串行评估和各并行评估器（多进程、多窗口、分布式）都使用日志：训练循环用completed_runs()查出本代已完成的局，
+交给评估器的completed_runs属性（这些局不再运行），评估器每完成一局调用run_recorder()返回的on_run追加记录。
+多进程评估在一段个体评估完成时才返回结果，强制中断最多损失每个工作进程正在评估的一段。
+
+配置（config["journal"]，均为可选）:
+    enabled  是否启用，默认True
+    path     日志文件路径，默认 检查点目录/evaluation_journal.jsonl
+    fsync    每条记录写入后是否fsync（断电时也不丢记录，但每局多一次磁盘同步），默认False
+"""
+import json
+import os
+
+DEFAULT_JOURNAL_NAME = "evaluation_journal.jsonl"
+
+
+def _key(generation, genome, copy, run):
+    return generation, genome, copy, run
+
+
+class EvaluationJournal:
+    """追加写入的评估日志"""
+
+    def __init__(self, path, fsync=False):
+        self.path = path
+        self.fsync = fsync
+        self.records = {}
+        self.replayed = 0
+        self._load()
+        self._needs_newline = self._ends_without_newline()
+        self.file = open(path, "a", encoding="utf-8")
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    key = _key(record["generation"], record["genome"], record.get("copy", 0), record["run"])
+                except (ValueError, KeyError, TypeError):
+                    # 中断时只写了一半的行
+                    continue
+                self.records[key] = record
+
+    def _ends_without_newline(self):
+        """上次中断时最后一行没有写完，追加前需要先换行"""
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return False
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b"\n"
+
+    def has_generation(self, generation):
+        """日志中是否已有第generation代的记录"""
+        return any(key[0] == generation for key in self.records)
+
+    def lookup(self, generation, genome, run, copy=0):
+        """基因哈希为genome的个体（种群中的第copy份）已完成的一局的记录，没有时返回None"""
+        record = self.records.get(_key(generation, genome, copy, run))
+        if record is not None:
+            self.replayed += 1
+        return record
+
+    def completed_runs(self, generation, population, runs, require_descriptor=False):
+        """本代每个个体中断前已完成的局
+
+        返回(keys, completed)：keys[i]为第i个个体的(基因哈希, 第几份)，completed[i]为{局序号: 记录}。
+        require_descriptor为True（启用新颖性搜索）时，没有行为描述子的记录视为未完成。
+        """
+        keys = []
+        completed = []
+        copies = {}
+        for individual in population:
+            genome = individual.genome_hash()
+            copy = copies.get(genome, 0)
+            copies[genome] = copy + 1
+            keys.append((genome, copy))
+            records = {}
+            for run in range(runs):
+                record = self.lookup(generation, genome, run, copy)
+                if record is not None and (not require_descriptor or "descriptor" in record):
+                    records[run] = record
+            completed.append(records)
+        return keys, completed
+
+    def run_recorder(self, generation, keys):
+        """评估器完成一局时调用的on_run(下标, 局序号, 得分, 步数, 是否截断, 描述子)，把这一局追加到日志"""
+        def on_run(index, run, score, steps, capped=False, descriptor=None):
+            genome, copy = keys[index]
+            self.append(generation, index, genome, run, score, steps, capped, descriptor, copy)
+        return on_run
+
+    def append(self, generation, index, genome, run, score, steps, capped=False, descriptor=None, copy=0):
+        """记录完成的一局并立即写入文件"""
+        record = {"generation": generation, "index": index, "genome": genome, "copy": copy, "run": run,
+                  "score": score, "steps": steps, "capped": bool(capped)}
+        if descriptor is not None:
+            record["descriptor"] = [float(value) for value in descriptor]
+        line = json.dumps(record) + "\n"
+        if self._needs_newline:
+            line = "\n" + line
+            self._needs_newline = False
+        self.file.write(line)
+        self.file.flush()
+        if self.fsync:
+            os.fsync(self.file.fileno())
+        self.records[_key(generation, genome, copy, run)] = record
+
+    def complete(self, generation):
+        """第generation代已完成且下一代种群已保存：丢弃该代及更早的记录并重写文件"""
+        self.records = {key: record for key, record in self.records.items() if key[0] > generation}
+        self.file.close()
+        with open(self.path, "w", encoding="utf-8") as f:
+            for record in self.records.values():
+                f.write(json.dumps(record) + "\n")
+        self._needs_newline = False
+        self.file = open(self.path, "a", encoding="utf-8")
+
+    def close(self):
+        self.file.close()
+
+
+def create_journal(config):
+    """配置启用时（默认启用）打开评估日志，否则返回None"""
+    journal_config = config.get("journal", {})
+    if not journal_config.get("enabled", True):
+        return None
+    path = journal_config.get("path") or os.path.join(
+        config["training"].get("checkpoint_dir", "checkpoints"), DEFAULT_JOURNAL_NAME)
+    return EvaluationJournal(path, journal_config.get("fsync", False))
@@ -0,0 +1,253 @@
+"""训练过程的实时指标：计数器由训练线程直接累加，后台HTTP线程按Prometheus文本格式导出（仅依赖标准库）
+
+计数器只由训练线程（主线程）写入，HTTP线程只读取，不加锁；导出时的渲染工作全部在HTTP线程中完成，
+训练循环中每局只增加两次整数加法。http.server只在启动指标服务时导入，
+评估路径（包括并行工作进程）只使用计数器，不加载HTTP服务相关模块。
+
+用法:
+    python -m dino_ai.metrics scrape [--url http://127.0.0.1:9109/metrics]   读取并打印正在运行的训练任务的指标
+
+配置（config["metrics"]，均为可选）:
+    enabled   是否启动指标服务，默认False
+    host      监听地址，默认127.0.0.1
+    port      监听端口，默认9109（0表示随机端口）
+"""
+import threading
+from time import perf_counter
+
+from .instrumentation import BUCKET_BOUNDS_MS, LatencyHistogram, StageTimings, stage_timings
+
+DEFAULT_PORT = 9109
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class TrainingMetrics:
+    """训练任务的累计指标"""
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.episodes = 0
+        self.steps = 0
+        self.generation = 0
+        self.fitness = {}
+        self.caches = {}  # 缓存名称 -> [命中次数, 未命中次数]
+        self.writes = {}  # 写入类型 -> LatencyHistogram
+        self.restarts = {}  # 浏览器会话失效原因 -> 重启次数
+        self.stages = StageTimings()  # 已结束各代的阶段延迟
+        self._merged_stages = None  # 已合并进self.stages的stage_timings.histograms
+        self._window = (self.started, 0, 0)  # 本代开始时的(时间, 局数, 步数)
+
+    def add_episode(self, steps):
+        """记录完成的一局"""
+        self.episodes += 1
+        self.steps += steps
+
+    def add_episodes(self, episodes, steps):
+        """合并其他进程完成的局数和步数"""
+        self.episodes += episodes
+        self.steps += steps
+
+    def counts(self):
+        return self.episodes, self.steps
+
+    def cache_lookup(self, name, hit):
+        """记录一次缓存查询"""
+        entry = self.caches.get(name)
+        if entry is None:
+            entry = self.caches[name] = [0, 0]
+        entry[0 if hit else 1] += 1
+
+    def record_write(self, kind, seconds):
+        """记录一次检查点/种群文件的写入耗时"""
+        histogram = self.writes.get(kind)
+        if histogram is None:
+            histogram = self.writes[kind] = LatencyHistogram()
+        histogram.record(seconds)
+
+    def record_restart(self, reason):
+        """记录一次因会话失效的浏览器重启"""
+        self.restarts[reason] = self.restarts.get(reason, 0) + 1
+
+    def end_generation(self, generation, fitness_scores, best_ever):
+        """一代评估结束：更新适应度，并把本代的阶段延迟并入累计值"""
+        n = len(fitness_scores)
+        mean = sum(fitness_scores) / n if n else 0.0
+        self.fitness = {
+            "best": max(fitness_scores) if n else 0.0,
+            "avg": mean,
+            "std": (sum((f - mean) ** 2 for f in fitness_scores) / n) ** 0.5 if n else 0.0,
+            "best_ever": max(best_ever, max(fitness_scores)) if n else best_ever
+        }
+        self.generation = generation
+        self.stages.merge_summary(stage_timings.summary())
+        # 下一代开始时stage_timings才会被清空，在此之前导出时不重复计入
+        self._merged_stages = stage_timings.histograms
+        self._window = (perf_counter(), self.episodes, self.steps)
+
+    def rates(self):
+        """本代（上一代结束以来）的每秒局数和步数"""
+        started, episodes, steps = self._window
+        elapsed = perf_counter() - started
+        if elapsed <= 0:
+            return 0.0, 0.0
+        return (self.episodes - episodes) / elapsed, (self.steps - steps) / elapsed
+
+    def stage_histograms(self):
+        """累计的阶段延迟：已结束各代 + 当前代"""
+        merged = {}
+        for stage, histogram in list(self.stages.histograms.items()):
+            merged[stage] = _copy(histogram)
+        current = stage_timings.histograms
+        if current is not self._merged_stages:
+            for stage, histogram in list(current.items()):
+                if stage in merged:
+                    merged[stage].merge(histogram)
+                else:
+                    merged[stage] = _copy(histogram)
+        return merged
+
+    def render(self):
+        """按Prometheus文本格式导出所有指标"""
+        lines = []
+        episodes_per_sec, steps_per_sec = self.rates()
+
+        _metric(lines, "dino_uptime_seconds", "gauge", "训练任务运行时间",
+                [("", perf_counter() - self.started)])
+        _metric(lines, "dino_generation", "gauge", "已完成的代数", [("", self.generation)])
+        _metric(lines, "dino_episodes_total", "counter", "已完成的游戏局数", [("", self.episodes)])
+        _metric(lines, "dino_steps_total", "counter", "已执行的决策步数", [("", self.steps)])
+        _metric(lines, "dino_episodes_per_second", "gauge", "当前代每秒完成的局数", [("", episodes_per_sec)])
+        _metric(lines, "dino_steps_per_second", "gauge", "当前代每秒决策步数", [("", steps_per_sec)])
+        _metric(lines, "dino_fitness", "gauge", "上一代的适应度统计",
+                [(f'{{stat="{stat}"}}', value) for stat, value in self.fitness.items()])
+
+        caches = list(self.caches.items())
+        _metric(lines, "dino_cache_hits_total", "counter", "缓存命中次数",
+                [(f'{{cache="{name}"}}', hits) for name, (hits, _) in caches])
+        _metric(lines, "dino_cache_misses_total", "counter", "缓存未命中次数",
+                [(f'{{cache="{name}"}}', misses) for name, (_, misses) in caches])
+        _metric(lines, "dino_cache_hit_ratio", "gauge", "缓存命中率",
+                [(f'{{cache="{name}"}}', hits / (hits + misses)) for name, (hits, misses) in caches if hits + misses])
+
+        _metric(lines, "dino_browser_restarts_total", "counter", "浏览器会话失效后的重启次数",
+                [(f'{{reason="{reason}"}}', count) for reason, count in list(self.restarts.items())])
+
+        _histogram(lines, "dino_stage_latency_seconds", "控制循环各阶段的延迟", "stage", self.stage_histograms())
+        _histogram(lines, "dino_checkpoint_write_seconds", "检查点和种群文件的写入延迟", "kind",
+                   {kind: _copy(histogram) for kind, histogram in list(self.writes.items())})
+        return "\n".join(lines) + "\n"
+
+
+def _copy(histogram):
+    copy = LatencyHistogram()
+    copy.merge(histogram)
+    return copy
+
+
+def _metric(lines, name, kind, help_text, samples):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+    for labels, value in samples:
+        lines.append(f"{name}{labels} {value:.6g}" if isinstance(value, float) else f"{name}{labels} {value}")
+
+
+def _histogram(lines, name, help_text, label, histograms):
+    """LatencyHistogram的分桶是毫秒上界，导出为以秒为单位的累计分桶"""
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for key, histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(BUCKET_BOUNDS_MS, histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{label}="{key}",le="{bound / 1000:g}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{label}="{key}",le="+Inf"}} {histogram.count}')
+        lines.append(f'{name}_sum{{{label}="{key}"}} {histogram.total / 1000:.6g}')
+        lines.append(f'{name}_count{{{label}="{key}"}} {histogram.count}')
+
+
+def _handler_class(metrics):
+    """导出metrics的请求处理类（按需导入http.server）"""
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = metrics.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MetricsHandler
+
+
+class MetricsServer:
+    """在后台守护线程中提供/metrics"""
+
+    def __init__(self, metrics, host="127.0.0.1", port=DEFAULT_PORT):
+        from http.server import ThreadingHTTPServer
+
+        self.server = ThreadingHTTPServer((host, port), _handler_class(metrics))
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name="dino-metrics", daemon=True)
+        self.thread.start()
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def start_metrics_server(config):
+    """配置启用时启动指标服务，返回MetricsServer，否则返回None"""
+    metrics_config = config.get("metrics", {})
+    if not metrics_config.get("enabled", False):
+        return None
+    try:
+        server = MetricsServer(training_metrics, metrics_config.get("host", "127.0.0.1"),
+                               metrics_config.get("port", DEFAULT_PORT))
+    except OSError as e:
+        print(f"⚠️ 指标服务启动失败: {e}")
+        return None
+    print(f"📡 训练指标: {server.url}")
+    return server
+
+
+def scrape(url, timeout=5):
+    """读取指标文本"""
+    import urllib.request
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return response.read().decode("utf-8")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="训练任务的实时指标")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    scrape_parser = subparsers.add_parser("scrape", help="读取并打印指标")
+    scrape_parser.add_argument("--url", default=f"http://127.0.0.1:{DEFAULT_PORT}/metrics")
+    args = parser.parse_args()
+
+    for line in scrape(args.url).splitlines():
+        if not line.startswith("#") and "_bucket{" not in line:
+            print(line)
+
+
+# 全局训练指标，训练循环、游戏后端和并行评估共用
+training_metrics = TrainingMetrics()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""新颖性搜索：按行为描述子计算个体的新颖性，并与适应度组合用于选择
+
+行为描述子（每局一个，个体取多局平均，共 DESCRIPTOR_SIZE 维，各维都在0-1之间）:
+    跳跃时机直方图  跳跃时与最近障碍物距离的分布（TIMING_EDGES分桶，归一化为比例）
+    下蹲时机直方图  同上
+    死因            撞上的障碍物类型（仙人掌/低空翼龙/高空翼龙）的one-hot，未撞上时全为0
+    跑出的距离      log(1 + 得分) / log(1 + DISTANCE_SCALE)，超过时截断为1
+
+新颖性 = 描述子与存档及当代其他个体中k个最近邻的平均距离。存档容量有限，满后按水库抽样随机替换。
+有scipy时用cKDTree查询最近邻，否则用分块的向量化暴力搜索。
+
+配置（config["novelty"]，均为可选）:
+    enabled                 是否启用，默认False
+    weight                  选择分数中新颖性的权重（0-1），默认0.3
+    k                       最近邻数量，默认15
+    archive_size            存档容量，默认100000
+    stagnation_generations  最佳适应度连续多少代没有提高视为停滞，默认5
+    stagnation_weight       停滞时使用的新颖性权重，默认0.6
+"""
+import os
+
+import numpy as np
+
+# 跳跃/下蹲时与最近障碍物的距离分桶边界
+TIMING_EDGES = (50, 100, 150, 250)
+TIMING_BINS = len(TIMING_EDGES) + 1
+
+DEATH_TYPES = {'CACTUS': 0, 'CACTUS_SMALL': 0, 'CACTUS_LARGE': 0,
+               'PTERODACTYL_LOW': 1, 'PTERODACTYL': 1, 'PTERODACTYL_HIGH': 2}
+
+DISTANCE_SCALE = 10000
+
+DESCRIPTOR_SIZE = 2 * TIMING_BINS + 3 + 1
+
+# 暴力搜索时每批查询的数量，控制距离矩阵的内存占用
+QUERY_CHUNK = 64
+
+DEFAULT_NOVELTY = {
+    "weight": 0.3,
+    "k": 15,
+    "archive_size": 100000,
+    "stagnation_generations": 5,
+    "stagnation_weight": 0.6,
+}
+
+
+def _nearest_distance(game_state):
+    """恐龙到最近障碍物的距离，没有障碍物时返回None"""
+    obstacles = game_state.get('obstacles') if game_state else None
+    if not obstacles:
+        return None
+    dino = game_state['dino']
+    return obstacles[0].get('x', 0) - (dino.get('x', 0) + dino.get('width', 40))
+
+
+class BehaviorTracker:
+    """在一局中累计行为，结束时给出描述子；只在有动作时做一次分桶，开销可忽略"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.jumps = [0] * TIMING_BINS
+        self.ducks = [0] * TIMING_BINS
+        self.last_state = None
+
+    def record(self, game_state, action):
+        self.last_state = game_state
+        if not (action['jump'] or action['duck']):
+            return
+        distance = _nearest_distance(game_state)
+        if distance is None:
+            return
+        index = sum(distance >= edge for edge in TIMING_EDGES)
+        if action['jump']:
+            self.jumps[index] += 1
+        if action['duck']:
+            self.ducks[index] += 1
+
+    def descriptor(self, score, crashed):
+        """本局的描述子(DESCRIPTOR_SIZE,)"""
+        result = np.zeros(DESCRIPTOR_SIZE)
+        jumps, ducks = sum(self.jumps), sum(self.ducks)
+        if jumps:
+            result[:TIMING_BINS] = np.array(self.jumps) / jumps
+        if ducks:
+            result[TIMING_BINS:2 * TIMING_BINS] = np.array(self.ducks) / ducks
+        if crashed and self.last_state and self.last_state.get('obstacles'):
+            death = DEATH_TYPES.get(self.last_state['obstacles'][0].get('type'), 0)
+            result[2 * TIMING_BINS + death] = 1.0
+        result[-1] = min(1.0, np.log1p(max(0, score)) / np.log1p(DISTANCE_SCALE))
+        return result
+
+
+class NoveltyArchive:
+    """容量有限的行为描述子存档，支持批量k近邻查询"""
+
+    def __init__(self, capacity=100000, dimensions=DESCRIPTOR_SIZE, seed=None):
+        self.capacity = capacity
+        self.points = np.empty((capacity, dimensions))
+        self.size = 0
+        self.seen = 0  # 加入过的描述子总数（水库抽样用）
+        self.rng = np.random.default_rng(seed)
+        self._tree = None
+
+    def add(self, descriptors):
+        """加入一批描述子，存档满后按水库抽样随机替换，保持存档是全部历史的均匀样本"""
+        descriptors = np.asarray(descriptors, dtype=np.float64).reshape(-1, self.points.shape[1])
+        free = min(len(descriptors), self.capacity - self.size)
+        self.points[self.size:self.size + free] = descriptors[:free]
+        self.size += free
+        self.seen += free
+        for descriptor in descriptors[free:]:
+            self.seen += 1
+            slot = self.rng.integers(0, self.seen)
+            if slot < self.capacity:
+                self.points[slot] = descriptor
+        self._tree = None
+
+    def _index(self):
+        """按需构建cKDTree（每代加入新描述子后最多构建一次），没有scipy时返回None"""
+        if self._tree is None:
+            try:
+                from scipy.spatial import cKDTree
+            except ImportError:
+                return None
+            self._tree = cKDTree(self.points[:self.size])
+        return self._tree
+
+    def nearest(self, queries, k):
+        """每个查询点到存档中k个最近邻的距离(len(queries), min(k, size))，升序"""
+        queries = np.asarray(queries, dtype=np.float64)
+        k = min(k, self.size)
+        if k == 0:
+            return np.zeros((len(queries), 0))
+        tree = self._index()
+        if tree is not None:
+            distances, _ = tree.query(queries, k=k)
+            return distances.reshape(len(queries), k)
+
+        points = self.points[:self.size]
+        point_norms = np.einsum('ij,ij->i', points, points)
+        result = np.empty((len(queries), k))
+        for start in range(0, len(queries), QUERY_CHUNK):
+            chunk = queries[start:start + QUERY_CHUNK]
+            squared = point_norms[None, :] - 2 * chunk @ points.T + np.einsum('ij,ij->i', chunk, chunk)[:, None]
+            nearest = np.partition(squared, k - 1, axis=1)[:, :k] if k < self.size else squared
+            result[start:start + QUERY_CHUNK] = np.sqrt(np.maximum(np.sort(nearest, axis=1), 0))
+        return result
+
+    def save(self, path):
+        # seen与存档点一起保存，恢复后水库抽样的替换概率与中断前一致
+        np.savez(path, points=self.points[:self.size], seen=self.seen)
+
+    def load(self, path):
+        data = np.load(path)
+        if isinstance(data, np.ndarray):
+            # 旧版本的.npy存档只有存档点，加入过的总数按存档点数计
+            points, seen = data, len(data)
+        else:
+            points, seen = data["points"], int(data["seen"])
+        points = points[:self.capacity]
+        self.points[:len(points)] = points
+        self.size = len(points)
+        self.seen = max(seen, self.size)
+        self._tree = None
+
+
+class NoveltySearch:
+    """计算当代个体的新颖性，并与适应度组合成选择分数"""
+
+    def __init__(self, config):
+        settings = dict(DEFAULT_NOVELTY)
+        settings.update(config.get("novelty", {}))
+        self.weight = settings["weight"]
+        self.k = settings["k"]
+        self.stagnation_generations = settings["stagnation_generations"]
+        self.stagnation_weight = settings["stagnation_weight"]
+        self.archive = NoveltyArchive(settings["archive_size"])
+        self.stagnant_for = 0
+        self.last_summary = None
+
+    def novelty(self, descriptors):
+        """每个个体与存档及当代其他个体中k个最近邻的平均距离"""
+        descriptors = np.asarray(descriptors, dtype=np.float64)
+        n = len(descriptors)
+        within = np.linalg.norm(descriptors[:, None, :] - descriptors[None, :, :], axis=2)
+        np.fill_diagonal(within, np.inf)
+        candidates = np.concatenate([self.archive.nearest(descriptors, self.k), within], axis=1)
+        k = min(self.k, candidates.shape[1] - 1) if n > 1 else min(self.k, self.archive.size)
+        if k <= 0:
+            return np.zeros(n)
+        nearest = np.partition(candidates, k - 1, axis=1)[:, :k]
+        return nearest.mean(axis=1)
+
+    def selection_scores(self, fitness_scores, descriptors, improved):
+        """返回用于选择的组合分数，并把本代描述子加入存档
+
+        适应度和新颖性分别按本代最大值归一化后加权求和；最佳适应度连续停滞时提高新颖性权重。
+        """
+        self.stagnant_for = 0 if improved else self.stagnant_for + 1
+        weight = self.stagnation_weight if self.stagnant_for >= self.stagnation_generations else self.weight
+
+        fitness = np.asarray(fitness_scores, dtype=np.float64)
+        novelty = self.novelty(descriptors)
+        self.archive.add(descriptors)
+
+        fitness_range = fitness.max() - fitness.min()
+        normalized_fitness = (fitness - fitness.min()) / fitness_range if fitness_range > 0 else np.zeros_like(fitness)
+        normalized_novelty = novelty / novelty.max() if novelty.max() > 0 else novelty
+        self.last_summary = {
+            "weight": weight,
+            "stagnant_for": self.stagnant_for,
+            "mean_novelty": float(novelty.mean()),
+            "max_novelty": float(novelty.max()),
+            "archive_size": self.archive.size
+        }
+        return ((1 - weight) * normalized_fitness + weight * normalized_novelty).tolist()
+
+    def archive_path(self, directory):
+        return os.path.join(directory, "novelty_archive.npz")
+
+
+def create_novelty(config):
+    """配置启用时创建NoveltySearch，否则返回None"""
+    if not config.get("novelty", {}).get("enabled", False):
+        return None
+    return NoveltySearch(config)
+
+
+def average_descriptors(descriptors):
+    """一个个体多局描述子的平均值"""
+    return np.mean(descriptors, axis=0) if descriptors else np.zeros(DESCRIPTOR_SIZE)
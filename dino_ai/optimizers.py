@@ -0,0 +1,297 @@
+"""优化引擎（ask/tell接口）：训练循环用ask()取得待评估的种群，评估后用tell()返回适应度
+
+    GeneticEngine  锦标赛选择 + 均匀交叉 + 均匀变异 + 多样化精英保留（原GeneticAlgorithm的进化方式）
+    CMAESEngine    向量化的CMA-ES：整代一次矩阵采样，按加权重组更新均值、步长和协方差矩阵
+
+引擎只负责产生下一批候选个体；最佳个体、训练历史、检查点和报告由GeneticAlgorithm统一管理，
+引擎自身的状态通过state_dict()/load_state_dict()写入检查点。
+
+配置（config["optimizer"]，均为可选）:
+    engine    "ga"（默认）或 "cmaes"
+    sigma     CMA-ES初始步长，默认0.5
+    seed      CMA-ES随机种子，默认不固定
+"""
+import random
+
+import numpy as np
+
+from .genome import GENOME_SIZE, DinosaurAI, Population, genome_matrix, population_from_matrix
+
+
+class GeneticEngine:
+    """遗传算法引擎"""
+
+    name = "ga"
+
+    def __init__(self, config):
+        self.genetic_config = config["genetic"]
+        self.population_size = config["training"]["population_size"]
+        self.tournament_size = config["genetic"]["tournament_size"]
+        self.elite_count = config["genetic"]["elite_count"]
+        self.elite_diversity_threshold = config["genetic"].get("elite_diversity_threshold", 0.1)
+        self.population = Population.random(self.population_size, self.genetic_config)
+        self.last_elite_count = 0
+        self.parents = []
+
+    @property
+    def protected(self):
+        """种群开头的精英个体数（不参与代理模型筛选）"""
+        return self.last_elite_count
+
+    def ask(self):
+        """本代待评估的个体"""
+        return self.population
+
+    def tell(self, fitness_scores, selection_scores=None):
+        """用本代适应度产生下一代；selection_scores（如组合了新颖性的分数）只用于锦标赛选择"""
+        # 选择操作
+        selected = self.select(fitness_scores if selection_scores is None else selection_scores)
+        self.parents = selected
+
+        # 创建新一代
+        new_population = []
+
+        # 增强的精英保留策略 - 保留多样化的精英个体
+        elites = self.select_diverse_elites(fitness_scores)
+        new_population.extend(elites)
+        self.last_elite_count = len(elites)
+
+        # 通过交叉和变异生成其余个体
+        while len(new_population) < self.population_size:
+            # 随机选择两个父母
+            parent1, parent2 = random.sample(selected, 2)
+            # 生成子代
+            child = self.crossover(parent1, parent2)
+            # 变异
+            child.mutate()
+            # 添加到新种群
+            new_population.append(child)
+
+        # 精英和子代的基因复制到新的种群矩阵
+        self.population = Population.from_individuals(new_population, self.genetic_config)
+
+    def propose(self, count):
+        """从本代的父代额外产生count个子代（供代理模型筛选），还没有父代时产生随机个体"""
+        if len(self.parents) < 2:
+            return [DinosaurAI(config=self.genetic_config) for _ in range(count)]
+        children = []
+        for _ in range(count):
+            child = self.crossover(*random.sample(self.parents, 2))
+            child.mutate()
+            children.append(child)
+        return children
+
+    def select(self, fitness_scores):
+        """选择操作 - 锦标赛选择"""
+        selected = []
+        for _ in range(self.population_size // 2):
+            # 随机选择tournament_size个个体进行锦标赛（按下标抽取，只为胜者创建个体视图）
+            tournament = random.sample(list(zip(fitness_scores, range(len(self.population)))), self.tournament_size)
+            # 选择适应度最高的个体
+            winner = max(tournament, key=lambda x: x[0])
+            selected.append(self.population[winner[1]])
+        return selected
+
+    def crossover(self, parent1, parent2):
+        """交叉操作 - 均匀交叉"""
+        child = DinosaurAI(config=self.genetic_config)
+        # 对每个权重，有50%的概率从父亲1继承，50%的概率从父亲2继承
+        for i in range(len(parent1.weights)):
+            if random.random() < 0.5:
+                child.weights[i] = parent1.weights[i]
+            else:
+                child.weights[i] = parent2.weights[i]
+
+        # 偏置的交叉
+        if random.random() < 0.5:
+            child.jump_bias = parent1.jump_bias
+        else:
+            child.jump_bias = parent2.jump_bias
+
+        if random.random() < 0.5:
+            child.duck_bias = parent1.duck_bias
+        else:
+            child.duck_bias = parent2.duck_bias
+
+        return child
+
+    def calculate_diversity(self, individual1, individual2):
+        """计算两个个体之间的多样性（权重差异）"""
+        weights1 = individual1.weights.flatten()
+        weights2 = individual2.weights.flatten()
+        return np.linalg.norm(weights1 - weights2)
+
+    def select_diverse_elites(self, fitness_scores):
+        """选择多样化的精英个体"""
+        sorted_indices = np.argsort(fitness_scores)[::-1]
+        # 按种群下标记录精英（个体视图每次访问都是新对象，不能按对象判断是否已选）
+        chosen = []
+        diversity_threshold = self.elite_diversity_threshold
+
+        # 总是保留最佳个体
+        chosen.append(sorted_indices[0])
+
+        # 选择其他精英个体，确保多样性
+        for i in range(1, len(sorted_indices)):
+            candidate = self.population[sorted_indices[i]]
+            is_diverse = True
+
+            # 检查与已选择精英的多样性
+            for index in chosen:
+                if self.calculate_diversity(candidate, self.population[index]) < diversity_threshold:
+                    is_diverse = False
+                    break
+
+            if is_diverse:
+                chosen.append(sorted_indices[i])
+                if len(chosen) >= self.elite_count:
+                    break
+
+        # 如果没有足够的多样化精英，填充剩余位置
+        while len(chosen) < self.elite_count and len(chosen) < len(self.population):
+            for i in range(len(sorted_indices)):
+                if sorted_indices[i] not in chosen:
+                    chosen.append(sorted_indices[i])
+                    break
+
+        return [self.population[index] for index in chosen]
+
+    def summary(self):
+        return {"engine": self.name, "elites": self.last_elite_count}
+
+    def state_dict(self):
+        """遗传算法的状态就是种群本身，由检查点单独保存"""
+        return {}
+
+    def load_state_dict(self, state):
+        pass
+
+
+class CMAESEngine:
+    """(μ/μ_w, λ)-CMA-ES，λ为种群大小，参数取Hansen推荐的默认值"""
+
+    name = "cmaes"
+
+    # 所有个体都是本代的采样，都可以被筛选
+    protected = 0
+
+    def __init__(self, config):
+        optimizer_config = config.get("optimizer", {})
+        self.genetic_config = config["genetic"]
+        self.rng = np.random.default_rng(optimizer_config.get("seed"))
+        n = GENOME_SIZE
+        self.lam = config["training"]["population_size"]
+        self._set_parameters(self.lam)
+        self.chi_n = np.sqrt(n) * (1 - 1 / (4 * n) + 1 / (21 * n ** 2))
+
+        # 分布状态：均值从与随机初始化相同的区间内抽取
+        self.mean = self.rng.uniform(-1, 1, n)
+        self.sigma = optimizer_config.get("sigma", 0.5)
+        self.C = np.eye(n)
+        self.pc = np.zeros(n)
+        self.ps = np.zeros(n)
+        self.updates = 0
+        self._decompose()
+        self.population = self._sample()
+
+    def _set_parameters(self, count):
+        """按实际参与更新的个体数count计算重组权重、μ_eff和学习率"""
+        n = GENOME_SIZE
+        mu = max(1, count // 2)
+        weights = np.log(mu + 0.5) - np.log(np.arange(1, mu + 1))
+        self.weights = weights / weights.sum()
+        self.mu = mu
+        self.mueff = 1 / np.sum(self.weights ** 2)
+        self.cc = (4 + self.mueff / n) / (n + 4 + 2 * self.mueff / n)
+        self.cs = (self.mueff + 2) / (n + self.mueff + 5)
+        self.c1 = 2 / ((n + 1.3) ** 2 + self.mueff)
+        self.cmu = min(1 - self.c1, 2 * (self.mueff - 2 + 1 / self.mueff) / ((n + 2) ** 2 + self.mueff))
+        self.damps = 1 + 2 * max(0, np.sqrt((self.mueff - 1) / (n + 1)) - 1) + self.cs
+
+    def _decompose(self):
+        """C = B diag(D²) Bᵀ"""
+        self.C = (self.C + self.C.T) / 2
+        eigenvalues, self.B = np.linalg.eigh(self.C)
+        self.D = np.sqrt(np.maximum(eigenvalues, 1e-20))
+
+    def _sample(self, count=None):
+        """一次矩阵运算采样整代：x = m + σ·B·diag(D)·z"""
+        z = self.rng.standard_normal((count or self.lam, GENOME_SIZE))
+        matrix = self.mean + self.sigma * (z * self.D) @ self.B.T
+        return population_from_matrix(matrix, self.genetic_config)
+
+    def ask(self):
+        return self.population
+
+    def propose(self, count):
+        """从当前分布额外采样count个候选（供代理模型筛选）"""
+        return self._sample(count) if count > 0 else []
+
+    def tell(self, fitness_scores, selection_scores=None):
+        """按分数排序后更新分布并采样下一代"""
+        scores = np.asarray(fitness_scores if selection_scores is None else selection_scores, dtype=np.float64)
+        # 从当前种群的基因重新计算步向量，种群被检查点替换后也成立
+        x = genome_matrix(self.population)
+        # 代理模型筛选或从种群文件加载后，实际评估的个体数可能与λ不同，权重和学习率按实际个数计算
+        if max(1, len(scores) // 2) != self.mu:
+            self._set_parameters(len(scores))
+        weights = self.weights
+        order = np.argsort(-scores)[:len(weights)]
+        ys = (x[order] - self.mean) / self.sigma
+        y_w = weights @ ys
+        self.mean = self.mean + self.sigma * y_w
+
+        # 步长进化路径（在C^(-1/2)变换后的空间中）
+        inv_sqrt_c = self.B @ np.diag(1 / self.D) @ self.B.T
+        self.ps = (1 - self.cs) * self.ps + np.sqrt(self.cs * (2 - self.cs) * self.mueff) * inv_sqrt_c @ y_w
+        self.updates += 1
+        ps_norm = np.linalg.norm(self.ps)
+        hsig = ps_norm / np.sqrt(1 - (1 - self.cs) ** (2 * self.updates)) / self.chi_n < 1.4 + 2 / (GENOME_SIZE + 1)
+
+        # 协方差进化路径、秩1与秩μ更新
+        self.pc = (1 - self.cc) * self.pc + hsig * np.sqrt(self.cc * (2 - self.cc) * self.mueff) * y_w
+        rank_mu = (ys.T * weights) @ ys
+        self.C = ((1 - self.c1 - self.cmu) * self.C
+                  + self.c1 * (np.outer(self.pc, self.pc) + (1 - hsig) * self.cc * (2 - self.cc) * self.C)
+                  + self.cmu * rank_mu)
+        self.sigma *= np.exp((self.cs / self.damps) * (ps_norm / self.chi_n - 1))
+
+        self._decompose()
+        self.population = self._sample()
+
+    def summary(self):
+        return {"engine": self.name, "sigma": float(self.sigma),
+                "condition": float((self.D.max() / self.D.min()) ** 2)}
+
+    def state_dict(self):
+        """分布状态（均值、步长、协方差和进化路径），写入检查点"""
+        return {
+            "mean": self.mean.tolist(),
+            "sigma": float(self.sigma),
+            "C": self.C.tolist(),
+            "pc": self.pc.tolist(),
+            "ps": self.ps.tolist(),
+            "updates": self.updates
+        }
+
+    def load_state_dict(self, state):
+        if not state:
+            return
+        self.mean = np.array(state["mean"])
+        self.sigma = state["sigma"]
+        self.C = np.array(state["C"])
+        self.pc = np.array(state["pc"])
+        self.ps = np.array(state["ps"])
+        self.updates = state["updates"]
+        self._decompose()
+
+
+ENGINES = {
+    GeneticEngine.name: GeneticEngine,
+    CMAESEngine.name: CMAESEngine,
+}
+
+
+def create_engine(config):
+    """按config["optimizer"]["engine"]创建优化引擎（默认遗传算法）"""
+    return ENGINES[config.get("optimizer", {}).get("engine", "ga")](config)
@@ -0,0 +1,238 @@
+"""多进程并行评估：种群基因矩阵和适应度向量放在共享内存中
+
+工作进程启动时只连接一次共享内存，之后每代只需要发送下标区间，
+分发一代的开销与种群大小无关。
+
+配置（config["parallel"]，均为可选）:
+    workers           工作进程数，0表示不使用并行评估（默认）
+    chunks_per_worker 每个工作进程平均分到的任务块数，默认4
+    start_method      multiprocessing启动方式（fork/spawn/forkserver），默认使用系统默认值
+"""
+import multiprocessing
+import os
+import queue
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .genome import GENOME_SIZE, population_from_matrix
+from .instrumentation import stage_timings
+from .metrics import training_metrics
+from .novelty import DESCRIPTOR_SIZE, BehaviorTracker, average_descriptors
+from .scheduler import create_scheduler, deadline_stats
+
+
+class SharedPopulation:
+    """共享内存中的种群基因矩阵(capacity, GENOME_SIZE)和适应度向量(capacity,)"""
+
+    def __init__(self, capacity, create=True, genes_name=None, fitness_name=None):
+        self.capacity = capacity
+        if create:
+            self._genes_shm = shared_memory.SharedMemory(create=True, size=capacity * GENOME_SIZE * 8)
+            self._fitness_shm = shared_memory.SharedMemory(create=True, size=capacity * 8)
+        else:
+            self._genes_shm = _attach(genes_name)
+            self._fitness_shm = _attach(fitness_name)
+        self._owner = create
+        self.genes = np.ndarray((capacity, GENOME_SIZE), dtype=np.float64, buffer=self._genes_shm.buf)
+        self.fitness = np.ndarray((capacity,), dtype=np.float64, buffer=self._fitness_shm.buf)
+
+    @property
+    def names(self):
+        return self._genes_shm.name, self._fitness_shm.name
+
+    def load(self, population):
+        """把种群基因写入共享矩阵"""
+        if len(population) > self.capacity:
+            raise ValueError(f"种群大小 {len(population)} 超过共享内存容量 {self.capacity}")
+        for i, individual in enumerate(population):
+            self.genes[i] = individual.genes
+
+    def close(self):
+        # 先释放numpy视图，否则共享内存无法关闭
+        self.genes = None
+        self.fitness = None
+        self._genes_shm.close()
+        self._fitness_shm.close()
+        if self._owner:
+            self._genes_shm.unlink()
+            self._fitness_shm.unlink()
+
+
+def _attach(name):
+    """连接已有的共享内存段，并避免子进程退出时被resource_tracker误删"""
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+    return shm
+
+
+def _worker_main(names, capacity, config, tasks, results):
+    """工作进程：连接共享内存，循环处理(代数, 起点, 终点, 单局得分上限, 已完成的局)任务"""
+    from .backend import create_game
+    from .evaluation import MAX_STEPS, run_episode
+
+    shared = SharedPopulation(capacity, create=False, genes_name=names[0], fitness_name=names[1])
+    genetic_config = config["genetic"]
+    runs_per_individual = config["training"]["runs_per_individual"]
+    realtime = not config["game"].get("simulation_mode", False)
+    scheduler = create_scheduler(config)
+    tracker = BehaviorTracker() if config.get("novelty", {}).get("enabled", False) else None
+    game = None
+
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            generation, start, stop, max_score, completed = task
+            if game is None:
+                game = create_game(config)
+
+            stage_timings.reset()
+            deadline_stats.reset()
+            episodes, steps = training_metrics.counts()
+            descriptors = [] if tracker else None
+            capped_counts = []
+            runs = []  # 本任务新完成的局: (个体下标, 局序号, 得分, 步数, 是否截断, 描述子)
+            # 个体基因直接是共享矩阵行的视图，无需反序列化
+            for offset, individual in enumerate(population_from_matrix(shared.genes[start:stop], genetic_config)):
+                scores = []
+                behaviors = []
+                capped_runs = 0
+                done = completed[offset] if completed else {}
+                for run in range(runs_per_individual):
+                    record = done.get(run)
+                    if record is not None:
+                        # 评估日志中中断前已完成的局
+                        scores.append(record["score"])
+                        capped_runs += record.get("capped", False)
+                        if tracker:
+                            behaviors.append(np.array(record["descriptor"]))
+                        continue
+                    score, step_count = run_episode(game, individual, MAX_STEPS, realtime, scheduler=scheduler,
+                                                    behavior=tracker, max_score=max_score)
+                    scores.append(score)
+                    capped = max_score is not None and score >= max_score
+                    capped_runs += capped
+                    if tracker:
+                        behaviors.append(tracker.descriptor(score, step_count < MAX_STEPS and not capped))
+                    runs.append((start + offset, run, score, step_count, capped, behaviors[-1] if tracker else None))
+                shared.fitness[start + offset] = sum(scores) / len(scores)
+                capped_counts.append(capped_runs)
+                if tracker:
+                    descriptors.append(average_descriptors(behaviors))
+            counts = (training_metrics.episodes - episodes, training_metrics.steps - steps)
+            results.put((generation, start, stop, os.getpid(), stage_timings.summary(), deadline_stats.summary(), counts,
+                         descriptors, capped_counts, runs))
+    finally:
+        if game is not None:
+            game.close()
+        shared.close()
+
+
+class ParallelEvaluator:
+    """由长期运行的工作进程并行评估整个种群"""
+
+    def __init__(self, config, capacity=None):
+        parallel = config.get("parallel", {})
+        self.workers = parallel.get("workers", 0)
+        self.chunks_per_worker = max(1, parallel.get("chunks_per_worker", 4))
+        self.capacity = capacity or config["training"]["population_size"]
+        self.label = f"{self.workers} 个工作进程"
+        self.generation = 0
+        self.descriptors = None  # 启用新颖性搜索时为每个个体的行为描述子
+        self.max_score = None  # 单局得分上限（budget.EpisodeBudget），None表示不设上限
+        self.capped = None  # 每个个体达到得分上限的局数
+        self.completed_runs = None  # 评估日志中每个个体已完成的局 {局序号: 记录}，这些局不再运行
+        self.on_run = None  # 每完成一局在训练进程中调用 on_run(下标, 局序号, 得分, 步数, 是否截断, 描述子)
+
+        context = multiprocessing.get_context(parallel.get("start_method"))
+        self.shared = SharedPopulation(self.capacity)
+        self.tasks = context.Queue()
+        self.results = context.Queue()
+        self.processes = [
+            context.Process(target=_worker_main, args=(self.shared.names, self.capacity, config, self.tasks, self.results),
+                            name=f"dino-eval-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for process in self.processes:
+            process.start()
+        print(f"⚙️  已启动 {self.workers} 个并行评估进程（共享内存容量 {self.capacity} 个个体）")
+
+    def evaluate(self, population):
+        """评估种群，返回与population对应的适应度列表"""
+        self.generation += 1
+        n = len(population)
+        self.shared.load(population)
+        self.shared.fitness[:n] = np.nan
+
+        self.descriptors = None
+        self.capped = [0] * n
+        chunk = max(1, -(-n // (self.workers * self.chunks_per_worker)))
+        pending = 0
+        for start in range(0, n, chunk):
+            stop = min(start + chunk, n)
+            completed = self.completed_runs[start:stop] if self.completed_runs else None
+            self.tasks.put((self.generation, start, stop, self.max_score, completed))
+            pending += 1
+
+        while pending:
+            try:
+                generation, start, stop, pid, summary, deadlines, counts, descriptors, capped, runs = self.results.get(
+                    timeout=1.0)
+            except queue.Empty:
+                dead = [p.name for p in self.processes if not p.is_alive()]
+                if dead:
+                    raise RuntimeError(f"并行评估进程意外退出: {', '.join(dead)}")
+                continue
+            if generation != self.generation:
+                continue
+            stage_timings.merge_summary(summary)
+            deadline_stats.merge_summary(deadlines)
+            training_metrics.add_episodes(*counts)
+            self.capped[start:stop] = capped
+            if self.on_run:
+                for run in runs:
+                    self.on_run(*run)
+            if descriptors is not None:
+                if self.descriptors is None:
+                    self.descriptors = np.zeros((n, DESCRIPTOR_SIZE))
+                self.descriptors[start:stop] = descriptors
+            pending -= 1
+
+        return self.shared.fitness[:n].tolist()
+
+    def close(self):
+        """停止工作进程并释放共享内存"""
+        for _ in self.processes:
+            self.tasks.put(None)
+        for process in self.processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        self.shared.close()
+
+
+def uses_worker_processes(config):
+    """由多进程或分布式工作进程评估时，工作进程各自创建游戏，训练进程不需要自己的游戏"""
+    return (config.get("distributed", {}).get("enabled", False)
+            or config.get("parallel", {}).get("workers", 0) > 0)
+
+
+def create_evaluator(config, game=None):
+    """启用分布式评估时创建DistributedEvaluator，配置了并行工作进程时创建ParallelEvaluator，
+    Chrome模式下配置了多个游戏窗口时创建MultiTabEvaluator，否则返回None"""
+    if config.get("distributed", {}).get("enabled", False):
+        from .distributed import DistributedEvaluator
+        return DistributedEvaluator(config)
+    if config.get("parallel", {}).get("workers", 0) > 0:
+        return ParallelEvaluator(config)
+    if (game is not None and not config["game"].get("simulation_mode", False)
+            and config.get("browser", {}).get("tabs", 1) > 1):
+        from .tabs import MultiTabEvaluator
+        return MultiTabEvaluator(config, game)
+    return None
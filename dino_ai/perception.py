@@ -0,0 +1,222 @@
+"""基于像素的游戏状态感知：不依赖Runner.instance_内部结构，直接从游戏画布识别恐龙和障碍物
+
+流程:
+    1. 一次execute_script在页面端截取画布感兴趣区域(ROI)，降采样为每像素一字节的"深色程度"
+       （alpha × (255 - 灰度)），以base64返回原始缓冲区
+    2. Python端向量化阈值化，去掉地平线所在的行，用OpenCV连通域分析得到外接矩形
+    3. 按水平间距合并同一组仙人掌，识别恐龙并按位置分类障碍物；速度由相邻帧障碍物位移估计
+输出与DinoGame.get_game_state相同格式的状态字典，坐标为画布逻辑坐标。
+
+云朵为浅灰色，深色程度低于阈值会被过滤；分数位于ROI上方不参与检测。
+
+配置（config["perception"]，均为可选）:
+    backend     "js"（默认，读取Runner内部状态）或 "pixels"（本模块）
+    roi         感兴趣区域 [x, y, 宽, 高]（画布逻辑坐标），默认 [0, 20, 600, 122]
+    downsample  降采样倍数，默认2
+    threshold   深色程度阈值(0-255)，默认80
+    min_area    连通域最小面积（降采样后的像素数），默认4
+    merge_gap   合并为同一障碍物的最大水平间距（逻辑像素），默认6
+    dino_x      恐龙的x坐标，默认50
+    ground_y    地面高度（站立时恐龙和仙人掌的底边），默认140
+"""
+import base64
+from time import perf_counter
+
+import cv2
+import numpy as np
+
+from .instrumentation import stage_timings
+
+# 页面端截取画布ROI，返回降采样后的深色程度缓冲区
+GRAB_JS = """
+var roi = arguments[0], downsample = arguments[1];
+var canvas = document.querySelector('.runner-canvas') || document.querySelector('canvas');
+if (!canvas) { return null; }
+var scale = canvas.width / (canvas.clientWidth || canvas.width);
+var sx = Math.round(roi[0] * scale), sy = Math.round(roi[1] * scale);
+var sw = Math.min(Math.round(roi[2] * scale), canvas.width - sx);
+var sh = Math.min(Math.round(roi[3] * scale), canvas.height - sy);
+var pixels = canvas.getContext('2d').getImageData(sx, sy, sw, sh).data;
+var step = Math.max(1, Math.round(downsample * scale));
+var cols = Math.floor(sw / step), rows = Math.floor(sh / step);
+var bytes = new Uint8Array(rows * cols), k = 0;
+for (var r = 0; r < rows; r++) {
+    var offset = r * step * sw;
+    for (var c = 0; c < cols; c++) {
+        var i = (offset + c * step) * 4;
+        var gray = (pixels[i] * 77 + pixels[i + 1] * 150 + pixels[i + 2] * 29) >> 8;
+        bytes[k++] = (pixels[i + 3] * (255 - gray)) >> 8;
+    }
+}
+var text = '';
+for (var j = 0; j < bytes.length; j += 8192) {
+    text += String.fromCharCode.apply(null, bytes.subarray(j, j + 8192));
+}
+return {rows: rows, cols: cols, data: btoa(text)};
+"""
+
+DEFAULT_PERCEPTION = {
+    "roi": [0, 20, 600, 122],
+    "downsample": 2,
+    "threshold": 80,
+    "min_area": 4,
+    "merge_gap": 6,
+    "dino_x": 50,
+    "ground_y": 140,
+}
+
+# Chrome恐龙游戏站立时的尺寸和地面位置（未检测到恐龙时使用）
+DEFAULT_DINO = {"width": 44, "height": 47}
+
+# 每帧障碍物移动 速度 像素，游戏按60FPS推进
+FRAMES_PER_SECOND = 60
+
+# 地平线行：该行深色像素比例超过此值时整行清零
+HORIZON_ROW_FILL = 0.5
+
+
+class PixelPerception:
+    """从画布像素识别游戏状态"""
+
+    def __init__(self, config):
+        settings = dict(DEFAULT_PERCEPTION)
+        settings.update(config.get("perception", {}))
+        self.roi = [float(v) for v in settings["roi"]]
+        self.downsample = settings["downsample"]
+        self.threshold = settings["threshold"]
+        self.min_area = settings["min_area"]
+        self.merge_gap = settings["merge_gap"]
+        self.dino_x = settings["dino_x"]
+        self.ground_y = settings["ground_y"]
+        self.reset()
+
+    def reset(self):
+        """新的一局开始时清空速度和距离估计"""
+        self.speed = 6.0
+        self.distance = 0.0
+        self._previous = None  # (时间, 最近障碍物x, 类型)
+        self._last_time = None
+
+    def grab(self, driver):
+        """截取ROI，返回(rows, cols)的uint8深色程度矩阵，画布不存在时返回None"""
+        result = driver.execute_script(GRAB_JS, self.roi, self.downsample)
+        if not result:
+            return None
+        buffer = np.frombuffer(base64.b64decode(result["data"]), dtype=np.uint8)
+        return buffer.reshape(result["rows"], result["cols"])
+
+    def detect(self, frame):
+        """识别恐龙和障碍物，返回(恐龙外接矩形或None, 障碍物矩形数组(N, 4))，均为逻辑坐标[x, y, 宽, 高]"""
+        mask = (frame > self.threshold).astype(np.uint8)
+        # 地平线横贯整个画面，会把地面上的物体连成一片，先按行清除
+        mask[mask.mean(axis=1) > HORIZON_ROW_FILL] = 0
+
+        count, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        stats = stats[1:]
+        stats = stats[stats[:, cv2.CC_STAT_AREA] >= self.min_area]
+        if len(stats) == 0:
+            return None, np.zeros((0, 4))
+
+        # 降采样坐标 -> 画布逻辑坐标
+        boxes = stats[:, :4].astype(np.float64) * self.downsample
+        boxes[:, 0] += self.roi[0]
+        boxes[:, 1] += self.roi[1]
+
+        # 恐龙：左边缘靠近dino_x的最大连通域
+        near_dino = np.abs(boxes[:, 0] - self.dino_x) <= 15
+        dino = None
+        if near_dino.any():
+            candidates = np.nonzero(near_dino)[0]
+            index = candidates[np.argmax(stats[candidates, cv2.CC_STAT_AREA])]
+            dino = boxes[index]
+            boxes = np.delete(boxes, index, axis=0)
+
+        return dino, self._merge(boxes)
+
+    def _merge(self, boxes):
+        """按水平间距把相邻的连通域合并为同一个障碍物（如一组仙人掌、翼龙翅膀）"""
+        if len(boxes) <= 1:
+            return boxes
+        boxes = boxes[np.argsort(boxes[:, 0])]
+        left = boxes[:, 0]
+        right = left + boxes[:, 2]
+        top = boxes[:, 1]
+        bottom = top + boxes[:, 3]
+        reach = np.maximum.accumulate(right)
+        starts = np.concatenate(([0], np.nonzero(left[1:] > reach[:-1] + self.merge_gap)[0] + 1))
+        merged_left = np.minimum.reduceat(left, starts)
+        merged_right = np.maximum.reduceat(right, starts)
+        merged_top = np.minimum.reduceat(top, starts)
+        merged_bottom = np.maximum.reduceat(bottom, starts)
+        return np.stack([merged_left, merged_top, merged_right - merged_left, merged_bottom - merged_top], axis=1)
+
+    def _obstacle_type(self, box):
+        """底边离开地面的是翼龙，再按高度与Runner路径相同的规则区分高低空"""
+        if box[1] + box[3] < self.ground_y - 6:
+            return 'PTERODACTYL_LOW' if box[1] >= 65 else 'PTERODACTYL_HIGH'
+        return 'CACTUS'
+
+    def _update_speed(self, now, obstacles):
+        """用最近障碍物相邻两帧的位移估计速度，并累计距离得到分数"""
+        if self._last_time is not None:
+            self.distance += self.speed * FRAMES_PER_SECOND * (now - self._last_time)
+        self._last_time = now
+
+        nearest = obstacles[0] if obstacles else None
+        if nearest and self._previous:
+            previous_time, previous_x, previous_type = self._previous
+            dt = now - previous_time
+            moved = previous_x - nearest['x']
+            if dt > 0 and moved > 0 and previous_type == nearest['type']:
+                measured = moved / dt / FRAMES_PER_SECOND
+                self.speed = 0.7 * self.speed + 0.3 * measured
+        self._previous = (now, nearest['x'], nearest['type']) if nearest else None
+
+    def _default_dino(self):
+        """站在地面上的默认恐龙"""
+        return {'x': self.dino_x, 'y': self.ground_y - DEFAULT_DINO["height"],
+                'width': DEFAULT_DINO["width"], 'height': DEFAULT_DINO["height"],
+                'jumping': False, 'ducking': False}
+
+    def default_state(self):
+        """截图失败时的状态：恐龙在地面、没有障碍物，速度和分数沿用最近的估计（与JS路径出错时的格式相同）"""
+        return {
+            'dino': self._default_dino(),
+            'obstacles': [],
+            'speed': self.speed,
+            'score': int(self.distance / 10)
+        }
+
+    def read(self, driver):
+        """读取一帧，返回与DinoGame.get_game_state相同格式的状态字典"""
+        start = perf_counter()
+        frame = self.grab(driver)
+        grabbed = perf_counter()
+        stage_timings.record('perception.grab', grabbed - start)
+        if frame is None:
+            return self.default_state()
+
+        dino_box, boxes = self.detect(frame)
+        if dino_box is None:
+            dino = self._default_dino()
+        else:
+            x, y, width, height = (float(v) for v in dino_box)
+            dino = {'x': x, 'y': y, 'width': width, 'height': height,
+                    'jumping': y + height < self.ground_y - 4,
+                    'ducking': height < DEFAULT_DINO["height"] * 0.8 and width > DEFAULT_DINO["width"]}
+
+        # 只保留左边缘仍在画面内（x > 0）的障碍物，按距离排序（与Runner路径的过滤条件一致，第一个是最近的）
+        obstacles = [
+            {'x': float(box[0]), 'y': float(box[1]), 'width': float(box[2]), 'height': float(box[3]),
+             'type': self._obstacle_type(box)}
+            for box in boxes if box[0] > 0
+        ]
+        self._update_speed(grabbed, obstacles)
+        stage_timings.record('perception.detect', perf_counter() - grabbed)
+
+        return {
+            'dino': dino,
+            'obstacles': obstacles,
+            'speed': self.speed,
+            'score': int(self.distance / 10)
+        }
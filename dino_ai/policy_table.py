@@ -0,0 +1,316 @@
+"""把个体的决策编译成量化状态上的查找表：展示和浏览器内游玩时每帧只需一次数组下标计算
+
+状态按以下维度量化（AXES，[下界, 上界) 和步长，超出范围的值归入两端的格子）:
+    distance  与最近障碍物的距离
+    width     障碍物宽度
+    height    障碍物高度
+    speed     游戏速度
+    type      障碍物类型（仙人掌 / PTERODACTYL / PTERODACTYL_LOW / PTERODACTYL_HIGH）
+    jump      恐龙状态（地面 / 跳跃中 / 跳跃中已下蹲过）
+每个格子用格子中心的状态向量化地计算DinosaurAI.predict的决策，存为一个uint8（bit0跳跃，bit1下蹲）。
+导出时在模拟器采集的真实状态和随机状态上检查与predict的一致率。
+
+用法:
+    python -m dino_ai.policy_table export [种群文件] [--output best_policy.npz] [--samples 50000] [--min-agreement 0.98]
+
+展示模式下配置 "policy": {"table": "best_policy.npz"} 即使用查找表决策；
+Chrome模式下再加 "in_browser": true，查找表会安装到页面中，由页面每帧自行决策，不再有WebDriver往返。
+"""
+import base64
+import json
+import random
+
+import numpy as np
+
+from .genome import DUCK_BIAS, JUMP_BIAS, WEIGHTS, DinosaurAI
+
+# 量化维度：(名称, 下界, 上界, 步长)
+AXES = (
+    ("distance", -60.0, 600.0, 4.0),
+    ("width", 0.0, 80.0, 8.0),
+    ("height", 0.0, 80.0, 8.0),
+    ("speed", 6.0, 14.0, 0.5),
+)
+
+TYPE_INDEX = {'PTERODACTYL': 1, 'PTERODACTYL_LOW': 2, 'PTERODACTYL_HIGH': 3}
+TYPE_NAMES = ('CACTUS', 'PTERODACTYL', 'PTERODACTYL_LOW', 'PTERODACTYL_HIGH')
+JUMP_STATES = 3
+
+# 预先构造的动作字典，查表时直接返回（调用方只读，不要修改）
+ACTIONS = (
+    {'jump': False, 'duck': False},
+    {'jump': True, 'duck': False},
+    {'jump': False, 'duck': True},
+    {'jump': True, 'duck': True},
+)
+
+DEFAULT_OUTPUT = "best_policy.npz"
+
+
+def _axis_bins(low, high, step):
+    return int(round((high - low) / step))
+
+
+def _axis_centres(low, high, step):
+    return low + (np.arange(_axis_bins(low, high, step)) + 0.5) * step
+
+
+def _sigmoid(x):
+    return 1 / (1 + np.exp(-x))
+
+
+def decision_codes(jump_prob, duck_prob, distance, type_index, jump_state):
+    """按DinosaurAI.predict的规则把概率转换为动作代码（bit0跳跃，bit1下蹲），各参数按numpy规则广播"""
+    type_index = np.asarray(type_index)
+    ground_jump = jump_prob > 0.5
+    cactus_or_low = (type_index == 0) | (type_index == TYPE_INDEX['PTERODACTYL_LOW'])
+    high = type_index == TYPE_INDEX['PTERODACTYL_HIGH']
+    pterodactyl = type_index == TYPE_INDEX['PTERODACTYL']
+
+    # 地面：仙人掌和低空翼龙降低跳跃阈值；高空翼龙只下蹲；翼龙按距离调整下蹲阈值
+    jump = np.where(cactus_or_low, jump_prob > 0.4, ground_jump & ~high)
+    duck = ~ground_jump & ((high & (duck_prob > np.maximum(0.3, 0.7 - distance / 200)))
+                           | (pterodactyl & (duck_prob > np.maximum(0.3, 0.8 - distance / 200))))
+    ground = jump * 1 + duck * 2
+    # 跳跃中：只可能在距离较近时下蹲快速落地（本次跳跃还未下蹲过）
+    airborne = ((distance < 120) & (duck_prob > 0.5)) * 2
+    return np.where(jump_state == 0, ground, np.where(jump_state == 1, airborne, 0)).astype(np.uint8)
+
+
+def compile_table(individual):
+    """在所有格子中心向量化地计算个体的决策，返回形状为 (distance, width, height, speed, type, jump) 的uint8数组"""
+    distance, width, height, speed = np.meshgrid(*(_axis_centres(low, high, step) for _, low, high, step in AXES),
+                                                 indexing="ij", sparse=True)
+    genes = individual.genes
+    weights = genes[WEIGHTS]
+    # 线性部分与类型无关的项，类型特征只影响第4个权重
+    base = weights[0] * distance + weights[1] * width + weights[2] * height + weights[4] * speed
+    shape = base.shape + (len(TYPE_NAMES), JUMP_STATES)
+    table = np.zeros(shape, dtype=np.uint8)
+
+    for type_index in range(len(TYPE_NAMES)):
+        linear = base + weights[3] * (1.0 if type_index > 0 else 0.0)
+        jump_prob = _sigmoid(linear + genes[JUMP_BIAS])
+        duck_prob = _sigmoid(-0.5 * linear + genes[DUCK_BIAS])
+        for jump_state in range(JUMP_STATES):
+            table[..., type_index, jump_state] = decision_codes(jump_prob, duck_prob, distance, type_index, jump_state)
+    return table
+
+
+class DecisionTable:
+    """查找表决策，接口与DinosaurAI.predict相同"""
+
+    def __init__(self, table, genome_hash=None, agreement=None):
+        self.table = np.ascontiguousarray(table, dtype=np.uint8)
+        # 展平为bytes：下标取值得到小整数（缓存对象），比numpy标量下标快且不分配内存
+        self.flat = self.table.tobytes()
+        self.strides = [s // self.table.itemsize for s in self.table.strides]
+        self.axes = [(low, 1 / step, _axis_bins(low, high, step) - 1) for _, low, high, step in AXES]
+        self.genome_hash = genome_hash
+        self.agreement = agreement
+
+    def index(self, game_state):
+        """状态在展平表中的下标，没有障碍物时返回None"""
+        obstacles = game_state['obstacles']
+        if not obstacles:
+            return None
+        obstacle = obstacles[0]
+        dino = game_state['dino']
+        values = (
+            obstacle.get('x', 0) - (dino.get('x', 0) + dino.get('width', 40)),
+            obstacle.get('width', 20),
+            obstacle.get('height', 40),
+            game_state.get('speed', 6),
+        )
+        index = 0
+        for value, (low, inverse_step, last), stride in zip(values, self.axes, self.strides):
+            k = int((value - low) * inverse_step)
+            index += stride * (0 if k < 0 else last if k > last else k)
+        jump_state = (2 if dino.get('has_ducked_in_jump', False) else 1) if dino.get('jumping', False) else 0
+        return index + self.strides[4] * TYPE_INDEX.get(obstacle.get('type'), 0) + jump_state
+
+    def predict(self, game_state):
+        index = self.index(game_state)
+        return ACTIONS[0] if index is None else ACTIONS[self.flat[index]]
+
+    def save(self, path):
+        np.savez_compressed(path, table=self.table, axes=np.array([axis[1:] for axis in AXES]),
+                            meta=np.array(json.dumps({"genome": self.genome_hash, "agreement": self.agreement})))
+
+    @staticmethod
+    def load(path):
+        data = np.load(path)
+        if not np.allclose(data["axes"], [axis[1:] for axis in AXES]):
+            raise ValueError(f"{path} 的量化范围与当前版本不一致，请重新导出")
+        meta = json.loads(str(data["meta"]))
+        return DecisionTable(data["table"], meta.get("genome"), meta.get("agreement"))
+
+    def page_payload(self):
+        """安装到页面所需的参数：各维度的(下界, 1/步长, 最后一格)、步长和base64编码的表"""
+        return {
+            "axes": [list(axis) for axis in self.axes],
+            "strides": self.strides,
+            "types": TYPE_INDEX,
+            "table": base64.b64encode(self.table.tobytes()).decode("ascii")
+        }
+
+
+def _random_states(count, rng):
+    """量化范围内（及稍微超出）的随机状态"""
+    states = []
+    for _ in range(count):
+        jumping = rng.random() < 0.3
+        states.append({
+            'dino': {'x': 50, 'width': 40, 'jumping': jumping, 'has_ducked_in_jump': jumping and rng.random() < 0.3},
+            'obstacles': [{
+                'x': 90 + rng.uniform(-80, 620),
+                'width': rng.uniform(0, 90),
+                'height': rng.uniform(0, 90),
+                'type': rng.choice(TYPE_NAMES)
+            }],
+            'speed': rng.uniform(5, 15)
+        })
+    return states
+
+
+def _simulator_states(config, count):
+    """模拟器中带障碍物的真实状态"""
+    import contextlib
+    import io
+
+    from .simulator import SimulatedDinoGame
+
+    game = SimulatedDinoGame(config)
+    states = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        game.start_game()
+        while len(states) < count:
+            state = game.get_game_state()
+            if game.is_game_over():
+                game.restart()
+            if state["obstacles"]:
+                states.append(json.loads(json.dumps(state)))
+    return states
+
+
+def verify(individual, table, states):
+    """查找表与predict在给定状态上的一致率"""
+    if not states:
+        return 1.0
+    agree = sum(table.predict(state) == individual.predict(state) for state in states)
+    return agree / len(states)
+
+
+def export(individual, output=DEFAULT_OUTPUT, samples=50000, config=None):
+    """编译并验证个体的查找表，保存到output，返回(DecisionTable, 一致率字典)"""
+    table = DecisionTable(compile_table(individual), individual.genome_hash())
+    rng = random.Random(0)
+    agreement = {"random": verify(individual, table, _random_states(samples, rng))}
+    if config is not None:
+        agreement["simulator"] = verify(individual, table, _simulator_states(config, samples))
+    table.agreement = agreement
+    table.save(output)
+    return table, agreement
+
+
+# 页面端的自动游玩：每个动画帧按查找表决策（需要先注入OBSTACLES_JS）
+INSTALL_JS = """
+var payload = arguments[0];
+var raw = atob(payload.table), table = new Uint8Array(raw.length);
+for (var i = 0; i < raw.length; i++) { table[i] = raw.charCodeAt(i); }
+window.__dinoPolicy = {table: table, axes: payload.axes, strides: payload.strides, types: payload.types, frames: 0,
+                       duckedInJump: false};
+function dinoBin(value, axis) {
+    var k = Math.floor((value - axis[0]) * axis[1]);
+    return k < 0 ? 0 : (k > axis[2] ? axis[2] : k);
+}
+function dinoKeepDucking(obstacles, rex) {
+    // 与run_episode一致：附近还有高空翼龙时继续下蹲
+    var right = rex.xPos + (rex.config ? rex.config.WIDTH : 40);
+    for (var i = 0; i < obstacles.length; i++) {
+        var distance = obstacles[i].x - right;
+        if (obstacles[i].type === 'PTERODACTYL_HIGH' && distance > -50 && distance < 150) { return true; }
+    }
+    return false;
+}
+function dinoPolicyFrame() {
+    var policy = window.__dinoPolicy;
+    if (!policy) { window.__dinoPolicyRunning = false; return; }
+    var runner = Runner.instance_;
+    if (runner && runner.playing && !runner.crashed) {
+        var rex = runner.tRex, obstacles = dinoObstacles(runner), code = 0;
+        // 与模拟器的has_ducked_in_jump一致：本次跳跃中已下蹲过时跳跃状态为2，落地后清除
+        if (!rex.jumping) { policy.duckedInJump = false; }
+        if (obstacles.length) {
+            var o = obstacles[0], width = rex.config ? rex.config.WIDTH : 40;
+            var values = [o.x - (rex.xPos + width), o.width, o.height, runner.currentSpeed || 6];
+            var index = 0;
+            for (var a = 0; a < 4; a++) { index += policy.strides[a] * dinoBin(values[a], policy.axes[a]); }
+            index += policy.strides[4] * (policy.types[o.type] || 0) + (rex.jumping ? (policy.duckedInJump ? 2 : 1) : 0);
+            code = policy.table[index];
+        }
+        if ((code & 1) && !rex.jumping) {
+            rex.startJump(runner.currentSpeed);
+            policy.duckedInJump = false;
+        }
+        if (code & 2) {
+            if (rex.jumping) { policy.duckedInJump = true; }
+            rex.setDuck(true);
+        } else if (rex.ducking && !dinoKeepDucking(obstacles, rex)) {
+            rex.setDuck(false);
+        }
+        policy.frames += 1;
+    }
+    requestAnimationFrame(dinoPolicyFrame);
+}
+if (!window.__dinoPolicyRunning) {
+    window.__dinoPolicyRunning = true;
+    requestAnimationFrame(dinoPolicyFrame);
+}
+return true;
+"""
+
+UNINSTALL_JS = "window.__dinoPolicy = null;"
+
+
+def install_in_page(driver, table):
+    """把查找表安装到游戏页面，由页面在每个动画帧自行决策"""
+    from .browser import OBSTACLES_JS
+    driver.execute_script(OBSTACLES_JS + "window.dinoObstacles = dinoObstacles;")
+    driver.execute_script(INSTALL_JS, table.page_payload())
+
+
+def uninstall_from_page(driver):
+    driver.execute_script(UNINSTALL_JS)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="把最佳个体编译为决策查找表")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser("export", help="编译、验证并保存查找表")
+    export_parser.add_argument("population", nargs="?", default="dino_population.json", help="种群文件（使用其中的最佳个体）")
+    export_parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    export_parser.add_argument("--samples", type=int, default=50000, help="每种验证状态的数量")
+    export_parser.add_argument("--min-agreement", type=float, default=0.98, help="一致率低于此值时返回非零退出码")
+    args = parser.parse_args()
+
+    with open(args.population, "r") as f:
+        data = json.load(f)
+    if not data.get("best_individual"):
+        raise SystemExit(f"{args.population} 中没有最佳个体")
+    individual = DinosaurAI.from_dict(data["best_individual"])
+
+    config = {"game": {"delay": 0.01, "simulation_mode": True}}
+    table, agreement = export(individual, args.output, args.samples, config)
+    print(f"📦 查找表已保存到 {args.output}（{table.table.size / 2 ** 20:.1f} MB，{table.table.size} 个格子）")
+    for name, rate in agreement.items():
+        print(f"   与predict的一致率（{name}状态）: {rate * 100:.2f}%")
+    if min(agreement.values()) < args.min_agreement:
+        print(f"⚠️ 一致率低于 {args.min_agreement * 100:.1f}%")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""按代性能剖析：CPU剖析（确定性或采样）和tracemalloc内存快照
+
+配置（config["profiling"]，均为可选）:
+    enabled      是否启用，默认False
+    mode         "sampling"（低开销，可长期开启）或 "deterministic"（cProfile）
+    interval     每隔几代剖析一次，默认1
+    sample_hz    采样频率（每秒采样次数），默认100
+    memory       是否记录tracemalloc快照，默认False
+    trace_frames tracemalloc保留的调用栈深度，默认1
+    top_n        内存差异报告保留的条目数，默认20
+    max_profiles 保留最近多少代的剖析文件，默认10（0表示不清理）
+    output_dir   输出目录，默认为检查点目录下的profiles
+
+采样模式的开销主要取决于sample_hz。tracemalloc会拖慢每一次分配，因此只在被剖析的代中开启
+（interval跳过的代不跟踪），内存报告统计的是该代中分配且仍未释放的内存，并与上一次剖析的代比较。
+"""
+import cProfile
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+# 剖析文件名: gen_<代数>.prof / gen_<代数>_stacks.txt / gen_<代数>_alloc.txt
+PROFILE_FILE_PATTERN = re.compile(r"^gen_(\d+)(?:\.prof|_stacks\.txt|_alloc\.txt)$")
+
+
+class SamplingProfiler:
+    """后台线程定期采样目标线程的调用栈，输出折叠栈格式（可直接生成火焰图）"""
+
+    def __init__(self, sample_hz=100, thread_id=None):
+        self.interval = 1.0 / sample_hz
+        self.thread_id = thread_id or threading.main_thread().ident
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="dino-sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def write(self, path):
+        """按折叠栈格式写出: 调用栈 次数"""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+
+class GenerationProfiler:
+    """在训练循环的每一代前后开启/关闭剖析并写出报告"""
+
+    def __init__(self, config):
+        profiling = config.get("profiling", {})
+        self.enabled = profiling.get("enabled", False)
+        self.mode = profiling.get("mode", "sampling")
+        self.interval = max(1, profiling.get("interval", 1))
+        self.sample_hz = profiling.get("sample_hz", 100)
+        self.memory = profiling.get("memory", False)
+        self.trace_frames = profiling.get("trace_frames", 1)
+        self.top_n = profiling.get("top_n", 20)
+        self.max_profiles = profiling.get("max_profiles", 10)
+        checkpoint_dir = config["training"].get("checkpoint_dir", "checkpoints")
+        self.output_dir = profiling.get("output_dir", os.path.join(checkpoint_dir, "profiles"))
+
+        self._generation = None
+        self._cpu_profiler = None
+        self._start_time = None
+        self._previous_snapshot = None
+        self._tracing = False  # 本代的tracemalloc是否由剖析器开启
+
+        if self.enabled:
+            os.makedirs(self.output_dir, exist_ok=True)
+            print(f"🔬 性能剖析已启用: 模式={self.mode}, 每{self.interval}代一次, 输出目录={self.output_dir}")
+
+    def start_generation(self, generation):
+        """一代开始前调用"""
+        if not self.enabled or generation % self.interval != 0:
+            self._generation = None
+            return
+        self._generation = generation
+        self._start_time = time.perf_counter()
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start(self.trace_frames)
+            self._tracing = True
+        if self.mode == "deterministic":
+            self._cpu_profiler = cProfile.Profile()
+            self._cpu_profiler.enable()
+        else:
+            self._cpu_profiler = SamplingProfiler(self.sample_hz)
+            self._cpu_profiler.start()
+
+    def end_generation(self):
+        """一代结束后调用，写出剖析文件，返回可记入训练历史的摘要（未剖析时返回None）"""
+        if self._generation is None:
+            return None
+        generation = self._generation
+        self._generation = None
+        elapsed = time.perf_counter() - self._start_time
+
+        prefix = os.path.join(self.output_dir, f"gen_{generation}")
+        summary = {"mode": self.mode, "profiled_time": elapsed}
+
+        if self.mode == "deterministic":
+            self._cpu_profiler.disable()
+            summary["cpu_profile"] = prefix + ".prof"
+            self._cpu_profiler.dump_stats(summary["cpu_profile"])
+        else:
+            self._cpu_profiler.stop()
+            summary["cpu_profile"] = self._cpu_profiler.write(prefix + "_stacks.txt")
+            summary["samples"] = self._cpu_profiler.samples
+        self._cpu_profiler = None
+
+        if self.memory and tracemalloc.is_tracing():
+            summary.update(self._write_memory_report(prefix + "_alloc.txt"))
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+        self._remove_old_profiles()
+        return summary
+
+    def _remove_old_profiles(self):
+        """只保留最近max_profiles代的剖析文件"""
+        if self.max_profiles <= 0:
+            return
+        files = {}
+        for name in os.listdir(self.output_dir):
+            match = PROFILE_FILE_PATTERN.match(name)
+            if match:
+                files.setdefault(int(match.group(1)), []).append(name)
+        for generation in sorted(files)[:-self.max_profiles]:
+            for name in files[generation]:
+                try:
+                    os.remove(os.path.join(self.output_dir, name))
+                except OSError as e:
+                    print(f"删除旧剖析文件失败: {e}")
+
+    def _write_memory_report(self, path):
+        """写出与上一次快照相比增长最多的分配位置"""
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        current, peak = tracemalloc.get_traced_memory()
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"当前跟踪内存: {current / 1024 / 1024:.2f} MB, 峰值: {peak / 1024 / 1024:.2f} MB\n")
+            if self._previous_snapshot is None:
+                f.write(f"\n内存占用最多的 {self.top_n} 处:\n")
+                for stat in snapshot.statistics("lineno")[:self.top_n]:
+                    f.write(f"{stat}\n")
+            else:
+                f.write(f"\n与上一次快照相比变化最大的 {self.top_n} 处:\n")
+                for stat in snapshot.compare_to(self._previous_snapshot, "lineno")[:self.top_n]:
+                    f.write(f"{stat}\n")
+        self._previous_snapshot = snapshot
+
+        return {"memory_report": path, "traced_current_mb": current / 1024 / 1024, "traced_peak_mb": peak / 1024 / 1024}
+
+    def close(self):
+        """结束剖析（训练结束或中断时调用）"""
+        if self._generation is not None:
+            self.end_generation()
@@ -0,0 +1,345 @@
+"""基于录制赛道的离线评估：从Chrome录制中重建障碍物赛道，用模拟器物理批量评估基因
+
+赛道只由录制决定（障碍物出现时间、类型、尺寸和速度曲线），与个体的动作无关，
+因此同一时刻所有个体看到的特征完全相同，可以对整批基因做矩阵运算。
+跑完整条录制赛道的个体（存活）在离线得分上与死在录制结束处的个体相同，筛选时按存活率优先排序。
+
+训练中预筛选（与代理模型相同的方式，在花浏览器时间之前）:
+    启用后每代由优化引擎多产生oversample倍的候选子代，在录制赛道上离线评估，
+    按 (存活赛道比例, 平均离线得分) 选出 evaluate_fraction × 种群大小 个送去真实评估（精英不参与筛选）。
+    代理模型已可用时由代理模型筛选，本筛选不再执行。
+
+配置（config["replay"]，均为可选）:
+    enabled            是否在训练中预筛选，默认False
+    trace              录制文件路径，默认使用config["trace"]["path"]或traces/episodes.trace
+    min_frames         参与评估的一局至少需要的帧数，默认50
+    oversample         候选子代数是需要的子代数的多少倍，默认2
+    evaluate_fraction  每代真实评估的个体数占种群大小的比例，默认0.5
+物理参数与模拟器相同（配置了game.physics_profile时使用校准后的参数）。
+
+用法:
+    python -m dino_ai.replay <录制文件> [种群或检查点JSON]
+"""
+import os
+
+import numpy as np
+
+from .genome import DUCK_BIAS, GENOME_SIZE, JUMP_BIAS, WEIGHTS
+from .simulator import DEFAULT_PHYSICS, load_physics_profile
+from .trace import OBSTACLE_TYPE_CODES, episode_frames, load_trace, read_index
+
+PTERODACTYL = OBSTACLE_TYPE_CODES["PTERODACTYL"]
+PTERODACTYL_LOW = OBSTACLE_TYPE_CODES["PTERODACTYL_LOW"]
+PTERODACTYL_HIGH = OBSTACLE_TYPE_CODES["PTERODACTYL_HIGH"]
+PTERODACTYL_CODES = (PTERODACTYL, PTERODACTYL_LOW, PTERODACTYL_HIGH)
+
+# 无法从录制中估计时使用的像素速度倍数（Chrome恐龙游戏按60FPS推进，每帧移动speed像素）
+DEFAULT_PIXELS_PER_SPEED_SECOND = 60.0
+
+# 判定新障碍物时允许的位置误差（像素）
+SPAWN_TOLERANCE = 10.0
+
+DEFAULT_REPLAY = {
+    "trace": None,
+    "min_frames": 50,
+    "oversample": 2,
+    "evaluate_fraction": 0.5,
+}
+
+
+class ObstacleCourse:
+    """从一局录制中重建的障碍物赛道"""
+
+    def __init__(self, frames, entry=None):
+        self.entry = entry or {}
+        self.times = np.asarray(frames["time"], dtype=np.float64)
+        self.speeds = np.asarray(frames["speed"], dtype=np.float64)
+        self.scores = np.asarray(frames["score"], dtype=np.float64)
+        self.duration = float(self.times[-1]) if len(self.times) else 0.0
+        self.frame_interval = float(np.median(np.diff(self.times))) if len(self.times) > 1 else 0.0
+
+        # 恐龙几何（取站在地面上的帧）
+        grounded = (frames["dino_flags"] & 1) == 0
+        reference = frames[grounded] if grounded.any() else frames
+        self.dino_x = float(np.median(reference["dino_x"]))
+        self.dino_ground_y = float(np.median(reference["dino_y"]))
+        self.dino_width = float(np.median(reference["dino_width"]))
+        self.dino_height = float(np.median(reference["dino_height"]))
+
+        # 速度曲线 -> 累计移动距离曲线D(t)，障碍物x(t) = spawn_x - (D(t) - D(spawn_time))
+        self.pixels_per_speed_second = _estimate_pixel_rate(frames)
+        rate = self.speeds * self.pixels_per_speed_second
+        steps = np.diff(self.times) * (rate[1:] + rate[:-1]) / 2
+        self.distance = np.concatenate(([0.0], np.cumsum(steps)))
+
+        self._extract_spawns(frames)
+
+    def _extract_spawns(self, frames):
+        """比上一帧所有障碍物都更靠右的障碍物视为新出现的障碍物"""
+        spawn_time, spawn_x, y, width, height, kind = [], [], [], [], [], []
+        previous_max_x = -np.inf
+        previous_distance = 0.0
+        for i in range(len(frames)):
+            frame = frames[i]
+            count = int(frame["obstacle_count"])
+            moved = self.distance[i] - previous_distance
+            current_max_x = -np.inf
+            for j in range(count):
+                x = float(frame["obstacle_x"][j])
+                current_max_x = max(current_max_x, x)
+                if x > previous_max_x - moved + SPAWN_TOLERANCE:
+                    spawn_time.append(self.times[i])
+                    spawn_x.append(x)
+                    y.append(float(frame["obstacle_y"][j]))
+                    width.append(float(frame["obstacle_width"][j]))
+                    height.append(float(frame["obstacle_height"][j]))
+                    kind.append(int(frame["obstacle_type"][j]))
+            previous_max_x = current_max_x
+            previous_distance = self.distance[i]
+
+        self.spawn_time = np.array(spawn_time)
+        self.spawn_x = np.array(spawn_x)
+        self.spawn_distance = np.interp(self.spawn_time, self.times, self.distance) if spawn_time else np.zeros(0)
+        self.obstacle_y = np.array(y)
+        self.obstacle_width = np.array(width)
+        self.obstacle_height = np.array(height)
+        self.obstacle_type = np.array(kind, dtype=np.int64)
+
+    @property
+    def obstacle_count(self):
+        return len(self.spawn_time)
+
+    def obstacle_positions(self, t):
+        """t时刻各障碍物的x坐标（尚未出现的为nan）"""
+        x = self.spawn_x - (np.interp(t, self.times, self.distance) - self.spawn_distance)
+        return np.where(self.spawn_time <= t, x, np.nan)
+
+    def score_at(self, t):
+        return np.interp(t, self.times, self.scores)
+
+    def speed_at(self, t):
+        return np.interp(t, self.times, self.speeds)
+
+
+def _estimate_pixel_rate(frames):
+    """用相邻两帧最近障碍物的位移估计 像素/秒 与 speed 的比例"""
+    count = frames["obstacle_count"]
+    same = (count[1:] > 0) & (count[1:] == count[:-1]) & (frames["obstacle_type"][1:, 0] == frames["obstacle_type"][:-1, 0])
+    dt = np.diff(frames["time"]).astype(np.float64)
+    displacement = (frames["obstacle_x"][:-1, 0] - frames["obstacle_x"][1:, 0]).astype(np.float64)
+    speed = frames["speed"][1:].astype(np.float64)
+    valid = same & (dt > 0) & (displacement > 0) & (speed > 0)
+    if valid.sum() < 5:
+        return DEFAULT_PIXELS_PER_SPEED_SECOND
+    return float(np.median(displacement[valid] / (dt[valid] * speed[valid])))
+
+
+def extract_courses(trace_path, min_frames=50):
+    """从录制文件中重建所有帧数足够的赛道"""
+    frames = load_trace(trace_path)
+    courses = []
+    for entry in read_index(trace_path):
+        if entry["frames"] >= min_frames:
+            courses.append(ObstacleCourse(np.array(episode_frames(frames, entry)), entry))
+    return courses
+
+
+def _sigmoid(x):
+    return 1 / (1 + np.exp(-x))
+
+
+class ReplayEvaluator:
+    """在录制赛道上用模拟器物理批量评估基因矩阵"""
+
+    def __init__(self, courses, physics=None, dt=None):
+        self.courses = courses
+        self.physics = dict(DEFAULT_PHYSICS)
+        self.physics.update(physics or {})
+        self.dt = dt  # 每个决策步的时长，默认使用录制中的帧间隔
+
+    def evaluate_course(self, course, genes):
+        """返回(得分(G,), 是否跑完赛道(G,))"""
+        genes = np.atleast_2d(np.asarray(genes, dtype=np.float64))
+        count = len(genes)
+        physics = self.physics
+        weights = genes[:, WEIGHTS]
+        jump_bias = genes[:, JUMP_BIAS]
+        duck_bias = genes[:, DUCK_BIAS]
+
+        jump_height = np.zeros(count)
+        ducking = np.zeros(count, dtype=bool)
+        ducked_in_jump = np.zeros(count, dtype=bool)
+        alive = np.ones(count, dtype=bool)
+        death_time = np.full(count, course.duration)
+
+        dt = self.dt or course.frame_interval or 0.01
+        dino_right = course.dino_x + course.dino_width
+
+        for t in np.arange(0.0, course.duration, dt):
+            x = course.obstacle_positions(t)
+            onscreen = np.nonzero(x > 0)[0]
+            near = np.nonzero(x > -course.obstacle_width)[0]
+
+            # 与单帧predict一致的决策（所有个体共享同一组特征）
+            jump = np.zeros(count, dtype=bool)
+            duck = np.zeros(count, dtype=bool)
+            keep_ducking = False
+            if len(onscreen):
+                first = onscreen[np.argmin(x[onscreen])]
+                kind = course.obstacle_type[first]
+                distance = x[first] - dino_right
+                features = np.array([distance, course.obstacle_width[first], course.obstacle_height[first],
+                                     1.0 if kind in PTERODACTYL_CODES else 0.0, course.speed_at(t)])
+                jump_prob = _sigmoid(weights @ features + jump_bias)
+                duck_prob = _sigmoid((weights * -0.5) @ features + duck_bias)
+                jumping = jump_height > 0
+
+                jump = (jump_prob > 0.5) & ~jumping
+                if kind == PTERODACTYL_LOW:
+                    grounded_jump, grounded_duck = jump_prob > 0.4, np.zeros(count, dtype=bool)
+                elif kind == PTERODACTYL_HIGH:
+                    grounded_duck = (duck_prob > max(0.3, 0.7 - distance / 200)) & ~jump
+                    grounded_jump = np.zeros(count, dtype=bool)
+                elif kind == PTERODACTYL:
+                    grounded_duck = (duck_prob > max(0.3, 0.8 - distance / 200)) & ~jump
+                    grounded_jump = jump
+                else:
+                    grounded_jump, grounded_duck = jump | (jump_prob > 0.4), np.zeros(count, dtype=bool)
+                air_duck = (distance < 120) & (duck_prob > 0.5) & ~ducked_in_jump
+                jump = np.where(jumping, jump, grounded_jump)
+                duck = np.where(jumping, air_duck, grounded_duck)
+
+                for i in onscreen:
+                    if course.obstacle_type[i] == PTERODACTYL_HIGH and -50 < x[i] - dino_right < 150:
+                        keep_ducking = True
+                        break
+
+            # 执行动作（与SimulatedDinoGame一致）
+            start_jump = jump & (jump_height == 0) & alive
+            jump_height[start_jump] = physics["jump_velocity"]
+            ducked_in_jump[start_jump] = False
+            ducking = np.where(duck, True, ducking if keep_ducking else False)
+            ducked_in_jump |= duck & (jump_height > 0)
+
+            # 更新恐龙位置
+            airborne = jump_height > 0
+            dino_y = np.where(airborne, course.dino_ground_y - jump_height * physics["jump_pixel_scale"], course.dino_ground_y)
+            gravity = np.where(ducking, physics["duck_gravity"], physics["gravity"])
+            jump_height = np.where(airborne, np.maximum(jump_height - gravity, 0), 0)
+
+            # 碰撞检测
+            box_width = course.dino_width * np.where(ducking, physics["duck_width_scale"], 1)
+            box_height = course.dino_height * np.where(ducking, physics["duck_height_scale"], 1)
+            hit = np.zeros(count, dtype=bool)
+            for i in near:
+                hit |= ((course.dino_x < x[i] + course.obstacle_width[i]) & (course.dino_x + box_width > x[i])
+                        & (dino_y < course.obstacle_y[i] + course.obstacle_height[i])
+                        & (dino_y + box_height > course.obstacle_y[i]))
+            newly_dead = hit & alive
+            death_time[newly_dead] = t
+            alive &= ~hit
+            if not alive.any():
+                break
+
+        return course.score_at(death_time), alive
+
+    def evaluate_survival(self, genes):
+        """在所有赛道上评估，返回(平均得分(G,), 跑完赛道的比例(G,))"""
+        genes = np.atleast_2d(np.asarray(genes, dtype=np.float64))
+        if not self.courses:
+            raise ValueError("没有可用的录制赛道")
+        totals = np.zeros(len(genes))
+        survived = np.zeros(len(genes))
+        for course in self.courses:
+            scores, alive = self.evaluate_course(course, genes)
+            totals += scores
+            survived += alive
+        return totals / len(self.courses), survived / len(self.courses)
+
+    def evaluate(self, genes):
+        """在所有赛道上评估，返回平均得分(G,)"""
+        return self.evaluate_survival(genes)[0]
+
+    def screen(self, population, keep):
+        """从种群中筛选出最有希望的keep个个体：先按跑完赛道的比例，再按离线得分，
+        返回(个体列表, 离线得分, 跑完赛道的比例)"""
+        from .genome import genome_matrix
+        scores, survived = self.evaluate_survival(genome_matrix(population))
+        order = np.lexsort((-scores, -survived))[:keep]
+        return [population[i] for i in order], scores[order], survived[order]
+
+
+class ReplayScreen:
+    """训练中的离线预筛选（接口与surrogate.SurrogateModel的筛选部分相同）"""
+
+    def __init__(self, evaluator, settings):
+        self.evaluator = evaluator
+        self.oversample = settings["oversample"]
+        self.evaluate_fraction = settings["evaluate_fraction"]
+        self.last_summary = None
+
+    def screen(self, candidates, keep):
+        """从候选个体中选出keep个，记录本次筛选的摘要"""
+        if keep >= len(candidates):
+            return list(candidates)
+        chosen, scores, survived = self.evaluator.screen(candidates, keep)
+        self.last_summary = {
+            "candidates": len(candidates),
+            "evaluated": keep,
+            "courses": len(self.evaluator.courses),
+            "survivors": int(np.count_nonzero(survived == 1)),
+            "best_replay_score": float(scores[0]),
+        }
+        return chosen
+
+
+def create_replay_screen(config):
+    """配置启用时从录制文件重建赛道并创建ReplayScreen；未启用或没有可用赛道时返回None"""
+    replay_config = config.get("replay", {})
+    if not replay_config.get("enabled", False):
+        return None
+    settings = dict(DEFAULT_REPLAY)
+    settings.update(replay_config)
+    trace_path = settings["trace"] or config.get("trace", {}).get("path", os.path.join("traces", "episodes.trace"))
+    if not os.path.exists(trace_path):
+        print(f"⚠️ 录制文件 {trace_path} 不存在，不使用录制赛道预筛选")
+        return None
+    courses = extract_courses(trace_path, settings["min_frames"])
+    if not courses:
+        print(f"⚠️ {trace_path} 中没有帧数足够的录制，不使用录制赛道预筛选")
+        return None
+    profile_path = config["game"].get("physics_profile")
+    physics = load_physics_profile(profile_path)["physics"] if profile_path else None
+    print(f"🛤️ 录制赛道预筛选: {len(courses)} 条赛道，每代候选 {settings['oversample']} 倍")
+    return ReplayScreen(ReplayEvaluator(courses, physics), settings)
+
+
+def main():
+    import json
+    import sys
+    import time
+
+    if len(sys.argv) < 2:
+        print("用法: python -m dino_ai.replay <录制文件> [种群或检查点JSON]")
+        return
+
+    courses = extract_courses(sys.argv[1])
+    print(f"重建了 {len(courses)} 条赛道，共 {sum(c.obstacle_count for c in courses)} 个障碍物")
+    if len(sys.argv) < 3 or not courses:
+        return
+
+    with open(sys.argv[2], "r") as f:
+        data = json.load(f)
+    genes = np.array([ind["weights"] + ind["bias"] for ind in data["population"]])
+    assert genes.shape[1] == GENOME_SIZE
+
+    start = time.perf_counter()
+    scores, survived = ReplayEvaluator(courses).evaluate_survival(genes)
+    elapsed = time.perf_counter() - start
+    print(f"离线评估 {len(genes)} 个个体用时 {elapsed:.2f} 秒")
+    for rank, i in enumerate(np.lexsort((-scores, -survived))[:10], 1):
+        print(f"{rank}. 个体 {i} - 离线得分: {scores[i]:.1f} - 跑完赛道: {survived[i]*100:.0f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""固定频率的控制循环调度：按单调时钟对齐决策时刻，并统计迟到帧和错过的决策周期
+
+配置（config["game"]，可选）:
+    decision_hz   目标决策频率（次/秒），默认为 1 / delay
+"""
+from time import perf_counter, sleep
+
+
+class FixedRateScheduler:
+    """以固定周期推进截止时刻，等待时间 = 截止时刻 - 当前时刻（已扣除本帧的工作耗时）
+
+    本帧工作超过截止时刻时记为迟到帧；不补做错过的周期，而是对齐到下一个未来的截止时刻，
+    避免追赶时出现连续的突发决策。被跳过的周期计为错过的截止时间。
+    """
+
+    def __init__(self, period):
+        self.period = max(0.0, period)
+        self.start()
+
+    @property
+    def target_hz(self):
+        return 1 / self.period if self.period > 0 else 0.0
+
+    def start(self):
+        """开始新的一局（重置计数和截止时刻）"""
+        self.frames = 0
+        self.late_frames = 0
+        self.missed_deadlines = 0
+        self.total_late = 0.0
+        self.max_late = 0.0
+        self._start = perf_counter()
+        self._deadline = self._start + self.period
+
+    def wait(self):
+        """一帧的工作完成后调用：等待到本帧的截止时刻"""
+        self.frames += 1
+        if self.period <= 0:
+            return
+        now = perf_counter()
+        if now <= self._deadline:
+            sleep(self._deadline - now)
+            self._deadline += self.period
+            return
+
+        late = now - self._deadline
+        skipped = int(late // self.period)
+        self.late_frames += 1
+        self.missed_deadlines += skipped
+        self.total_late += late
+        if late > self.max_late:
+            self.max_late = late
+        self._deadline += self.period * (skipped + 1)
+
+    def episode_summary(self):
+        """本局的调度统计（可被DeadlineStats合并）"""
+        return {
+            "episodes": 1,
+            "frames": self.frames,
+            "late_frames": self.late_frames,
+            "missed_deadlines": self.missed_deadlines,
+            "total_late_ms": self.total_late * 1000,
+            "max_late_ms": self.max_late * 1000,
+            "max_episode_late_frames": self.late_frames,
+            "active_seconds": perf_counter() - self._start,
+            "target_hz": self.target_hz
+        }
+
+
+class DeadlineStats:
+    """按代聚合各局的调度统计"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """清空所有统计（每代开始时调用）"""
+        self.totals = None
+
+    def add(self, summary):
+        """合并一局的统计或其他进程导出的summary()结果"""
+        if not summary or not summary.get("episodes"):
+            return
+        if self.totals is None:
+            self.totals = {key: summary[key] for key in _SUMMED + _MAXED}
+            self.totals["target_hz"] = summary["target_hz"]
+            return
+        for key in _SUMMED:
+            self.totals[key] += summary[key]
+        for key in _MAXED:
+            self.totals[key] = max(self.totals[key], summary[key])
+
+    merge_summary = add
+
+    def summary(self):
+        """本代的调度统计摘要，没有实时评估的对局时返回None"""
+        if self.totals is None:
+            return None
+        totals = self.totals
+        result = dict(totals)
+        result.update({
+            "achieved_hz": totals["frames"] / totals["active_seconds"] if totals["active_seconds"] > 0 else 0.0,
+            "late_frame_ratio": totals["late_frames"] / totals["frames"] if totals["frames"] else 0.0,
+            "late_frames_per_episode": totals["late_frames"] / totals["episodes"],
+            "missed_deadlines_per_episode": totals["missed_deadlines"] / totals["episodes"],
+            "mean_late_ms": totals["total_late_ms"] / totals["late_frames"] if totals["late_frames"] else 0.0
+        })
+        return result
+
+
+# 可直接相加与取最大值的统计项
+_SUMMED = ("episodes", "frames", "late_frames", "missed_deadlines", "total_late_ms", "active_seconds")
+_MAXED = ("max_late_ms", "max_episode_late_frames")
+
+
+def merge_deadline_summaries(summaries):
+    """合并多代的调度统计"""
+    stats = DeadlineStats()
+    for summary in summaries:
+        stats.add(summary)
+    return stats.summary()
+
+
+def create_scheduler(config):
+    """按配置的决策频率创建调度器（未配置时按game.delay）"""
+    game_config = config["game"]
+    decision_hz = game_config.get("decision_hz")
+    period = 1 / decision_hz if decision_hz else game_config["delay"]
+    return FixedRateScheduler(period)
+
+
+# 全局调度统计，训练循环和并行工作进程共用
+deadline_stats = DeadlineStats()
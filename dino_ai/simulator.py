@@ -0,0 +1,227 @@
+"""模拟游戏后端（纯Python，无需浏览器）"""
+import json
+import random
+
+# 模拟器物理参数（以模拟步为单位，一步对应game.delay秒的游戏时间）
+# 可以通过config["game"]["physics_profile"]加载由dino_ai.calibration拟合的物理配置覆盖
+DEFAULT_PHYSICS = {
+    "jump_velocity": 10,        # 起跳时的跳跃高度值
+    "jump_pixel_scale": 5,      # 跳跃高度值换算为像素的倍数
+    "gravity": 0.5,             # 每步跳跃高度的减少量
+    "duck_gravity": 1.0,        # 跳跃中下蹲时的减少量（快速落地）
+    "duck_width_scale": 0.6,    # 下蹲时碰撞盒宽度比例
+    "duck_height_scale": 0.5,   # 下蹲时碰撞盒高度比例
+    "ground_y": 130,            # 地面上恐龙和仙人掌的y坐标
+    "dino_x": 50,
+    "dino_width": 40,
+    "dino_height": 50,
+    "spawn_x": 800,             # 新障碍物出现的x坐标（屏幕右侧）
+    "obstacle_step_scale": 1.0, # 障碍物每步移动 速度×该倍数 像素
+    "initial_speed": 6,
+    "max_speed": 13,
+    "speed_increment": 0.01,    # 分数为speed_increment_interval整数倍时的加速量
+    "speed_increment_interval": 100,
+    "acceleration": None,       # 设置后改为按游戏时间连续加速（速度/秒）
+    "score_scale": 1.0,         # 每步得分 = 速度 × 步长 × 该倍数
+    "spawn_gap": [1, 3],        # 相邻障碍物出现的时间间隔范围（秒）
+    "pterodactyl_probability": 0.3,
+    "pterodactyl_y": [100, 130],
+    "cactus_width": [20, 40],
+    "cactus_height": [40, 70],
+    "pterodactyl_width": [20, 40],
+    "pterodactyl_height": [30, 30],
+}
+
+
+def load_physics_profile(path):
+    """读取物理配置文件，profile["physics"]补全为完整的物理参数（未给出的参数使用默认值）"""
+    with open(path, "r") as f:
+        profile = json.load(f)
+    physics = dict(DEFAULT_PHYSICS)
+    physics.update(profile["physics"])
+    profile["physics"] = physics
+    return profile
+
+
+def _sample_range(value_range):
+    """从[最小, 最大]范围中取值：整数范围用randint，上下限相同则不消耗随机数"""
+    low, high = value_range
+    if low == high:
+        return low
+    if isinstance(low, int) and isinstance(high, int):
+        return random.randint(low, high)
+    return random.uniform(low, high)
+
+# 模拟游戏类
+class SimulatedDinoGame:
+    def __init__(self, config):
+        self.config = config
+        self.delay = config["game"]["delay"]
+        self.physics = dict(DEFAULT_PHYSICS)
+        profile_path = config["game"].get("physics_profile")
+        if profile_path:
+            profile = load_physics_profile(profile_path)
+            self.physics = profile["physics"]
+            step_seconds = profile.get("step_seconds")
+            if step_seconds and abs(step_seconds - self.delay) > 1e-6:
+                print(f"⚠️ 物理配置按每步 {step_seconds:.4f} 秒拟合，当前game.delay为 {self.delay}，模拟结果会有偏差")
+        
+        self.is_playing = False
+        self.current_speed = self.physics["initial_speed"]
+        self.score = 0
+        self.game_over = False
+        self.obstacles = []
+        self.next_obstacle_time = 0
+        self.dino_pos = {
+            "x": self.physics["dino_x"],
+            "y": self.physics["ground_y"],
+            "width": self.physics["dino_width"],
+            "height": self.physics["dino_height"]
+        }
+        self.time_elapsed = 0
+        self.jump_height = 0
+        self.is_ducking = False
+        self.has_ducked_in_jump = False  # 跟踪当前跳跃中是否已经下蹲过
+        
+    def start_game(self):
+        """开始游戏"""
+        self.is_playing = True
+        self.score = 0
+        self.current_speed = self.physics["initial_speed"]
+        self.game_over = False
+        self.obstacles = []
+        self.next_obstacle_time = random.uniform(*self.physics["spawn_gap"])
+        self.time_elapsed = 0
+        # 恐龙回到地面站立，上一局结束时的跳跃/下蹲状态不影响新的一局（同一赛道种子的结果可复现）
+        self.dino_pos["y"] = self.physics["ground_y"]
+        self.jump_height = 0
+        self.is_ducking = False
+        self.has_ducked_in_jump = False
+        print("模拟游戏开始")
+    
+    def jump(self):
+        """恐龙跳跃"""
+        if self.jump_height == 0:  # 只有在地面上才能跳跃
+            self.jump_height = self.physics["jump_velocity"]
+            self.has_ducked_in_jump = False  # 重置跳跃中的下蹲标记
+    
+    def duck(self):
+        """恐龙下蹲"""
+        self.is_ducking = True
+        if self.jump_height > 0:  # 如果在跳跃中下蹲，设置标记
+            self.has_ducked_in_jump = True
+    
+    def release_duck(self):
+        """释放下蹲"""
+        self.is_ducking = False
+    
+    def start_duck(self):
+        """开始持续下蹲"""
+        if not self.is_ducking:
+            self.duck()
+    
+    def stop_duck(self):
+        """停止持续下蹲"""
+        if self.is_ducking:
+            self.release_duck()
+    
+    def get_score(self):
+        """获取当前分数"""
+        return int(self.score)
+    
+    def is_game_over(self):
+        """检查游戏是否结束"""
+        return self.game_over
+    
+    def restart(self):
+        """重新开始游戏"""
+        self.start_game()
+    
+    def update_game_state(self):
+        """更新游戏状态"""
+        # 更新时间和分数
+        self.time_elapsed += self.delay
+        self.score += self.current_speed * self.delay * self.physics["score_scale"]
+        
+        # 更新恐龙位置（跳跃动画）
+        if self.jump_height > 0:
+            self.dino_pos["y"] = self.physics["ground_y"] - (self.jump_height * self.physics["jump_pixel_scale"])  # 跳跃高度
+            # 如果在跳跃中下蹲，增加下降速度实现快速落地
+            gravity = self.physics["duck_gravity"] if self.is_ducking else self.physics["gravity"]
+            self.jump_height -= gravity  # 重力（下蹲时重力加倍）
+            if self.jump_height <= 0:
+                self.jump_height = 0
+                self.dino_pos["y"] = self.physics["ground_y"]  # 回到地面
+        
+        # 更新障碍物
+        # 生成新障碍物
+        if self.time_elapsed >= self.next_obstacle_time:
+            physics = self.physics
+            obstacle_type = "CACTUS" if random.random() < 1 - physics["pterodactyl_probability"] else "PTERODACTYL"
+            y_pos = physics["ground_y"] if obstacle_type == "CACTUS" else random.choice(physics["pterodactyl_y"])
+            width = _sample_range(physics["cactus_width"] if obstacle_type == "CACTUS" else physics["pterodactyl_width"])
+            height = _sample_range(physics["cactus_height"] if obstacle_type == "CACTUS" else physics["pterodactyl_height"])
+            
+            self.obstacles.append({
+                "x": physics["spawn_x"],  # 屏幕右侧
+                "y": y_pos,
+                "width": width,
+                "height": height,
+                "type": obstacle_type
+            })
+            
+            # 设置下一个障碍物出现的时间
+            self.next_obstacle_time = self.time_elapsed + random.uniform(*physics["spawn_gap"])
+        
+        # 移动障碍物
+        step_distance = self.current_speed * self.physics["obstacle_step_scale"]
+        for obstacle in self.obstacles:
+            obstacle["x"] -= step_distance
+        
+        # 移除屏幕外的障碍物
+        self.obstacles = [obs for obs in self.obstacles if obs["x"] > -obs["width"]]
+        
+        # 检测碰撞
+        if not self.game_over:
+            dino_hitbox = {
+                "x": self.dino_pos["x"],
+                "y": self.dino_pos["y"],
+                "width": self.dino_pos["width"] * (self.physics["duck_width_scale"] if self.is_ducking else 1),
+                "height": self.dino_pos["height"] * (self.physics["duck_height_scale"] if self.is_ducking else 1)
+            }
+            
+            for obstacle in self.obstacles:
+                if (dino_hitbox["x"] < obstacle["x"] + obstacle["width"] and
+                    dino_hitbox["x"] + dino_hitbox["width"] > obstacle["x"] and
+                    dino_hitbox["y"] < obstacle["y"] + obstacle["height"] and
+                    dino_hitbox["y"] + dino_hitbox["height"] > obstacle["y"]):
+                    self.game_over = True
+                    break
+        
+        # 随着分数增加，增加速度
+        if self.physics["acceleration"] is not None:
+            self.current_speed = min(self.current_speed + self.physics["acceleration"] * self.delay, self.physics["max_speed"])
+        elif int(self.score) % self.physics["speed_increment_interval"] == 0 and int(self.score) > 0:
+            self.current_speed = min(self.current_speed + self.physics["speed_increment"], self.physics["max_speed"])
+    
+    def get_game_state(self):
+        """获取游戏状态"""
+        # 更新游戏状态
+        self.update_game_state()
+        
+        # 添加恐龙状态信息
+        dino_state = self.dino_pos.copy()
+        dino_state['jumping'] = self.jump_height > 0
+        dino_state['ducking'] = self.is_ducking
+        dino_state['has_ducked_in_jump'] = self.has_ducked_in_jump
+        
+        return {
+            'dino': dino_state,
+            'obstacles': self.obstacles,
+            'speed': self.current_speed,
+            'score': self.get_score()
+        }
+    
+    def close(self):
+        """关闭游戏"""
+        print("模拟游戏关闭")
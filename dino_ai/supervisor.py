@@ -0,0 +1,284 @@
+"""浏览器会话监护：检测崩溃的Chrome/WebDriver会话和卡住的脚本调用，重启浏览器并重试受影响的一局
+
+DinoGame内部会吞掉WebDriver异常（is_game_over出错时返回False，get_game_state返回默认状态），
+浏览器崩溃后一局会一直跑到最大步数并记0分，之后每个个体都以同样方式失败。SupervisedGame包装DinoGame:
+    调用超时  看门狗线程发现单次游戏调用超过call_timeout秒没有返回时结束ChromeDriver进程，
+              卡住的WebDriver请求随即出错；同时把WebDriver的脚本超时设为script_timeout
+    健康检查  每隔health_interval秒在is_game_over中检查ChromeDriver进程并执行一次探测脚本
+              （在辅助线程中执行，script_timeout秒内没有返回视为失效）
+    恢复      会话失效时游戏调用抛出SessionLost，run_episode丢弃这一局，重启浏览器后重新开始，
+              每局最多重试max_episode_retries次；多窗口评估（tabs.MultiTabEvaluator）通过call()
+              执行每个决策周期，重启后重新打开游戏窗口，正在进行的各局放回队列重新开始
+重启次数按原因计入训练指标 dino_browser_restarts_total。
+强制结束会话时先结束ChromeDriver启动的Chrome进程树（子进程在前），再结束ChromeDriver；
+连接的预热浏览器卡住时结束浏览器池中对应的Chrome，之后不再租用该槽位。
+
+配置（config["supervisor"]，均为可选，只用于Chrome模式）:
+    enabled              是否启用，默认True
+    call_timeout         单次游戏调用的超时（秒），默认20（需大于restart中的等待时间）
+    script_timeout       WebDriver脚本超时和健康检查超时（秒），默认5
+    health_interval      健康检查间隔（秒），默认2
+    max_episode_retries  一局因会话失效最多重试的次数，默认3
+"""
+import os
+import signal
+import threading
+from time import perf_counter
+
+from .eventlog import log
+from .instrumentation import stage_timings
+from .metrics import training_metrics
+
+DEFAULT_SUPERVISOR = {
+    "call_timeout": 20.0,
+    "script_timeout": 5.0,
+    "health_interval": 2.0,
+    "max_episode_retries": 3,
+}
+
+HEALTH_SCRIPT = "return document.readyState;"
+
+# 看门狗检查进行中调用的间隔（秒）
+WATCHDOG_INTERVAL = 1.0
+
+
+class SessionLost(Exception):
+    """浏览器会话已失效，kind为失效原因的类别（process_exit / health_check / call_timeout）"""
+
+    def __init__(self, kind, detail):
+        super().__init__(detail)
+        self.kind = kind
+
+
+def retry_on_session_lost(game, play, on_recover=None):
+    """调用play()进行一局；浏览器会话失效时重启浏览器并从头重试，最多game.max_episode_retries次
+
+    传入on_recover时在浏览器重启后、重试前调用on_recover(error)（如重新打开游戏窗口）。
+    """
+    attempt = 0
+    while True:
+        try:
+            return play()
+        except SessionLost as e:
+            attempt += 1
+            if attempt > game.max_episode_retries:
+                raise
+            game.recover(e)
+            if on_recover:
+                on_recover(e)
+
+
+def _descendants(pid):
+    """pid的所有后代进程（从/proc读取，子进程在孙进程之前），不支持/proc的系统上返回空列表"""
+    children = {}
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return []
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                # 进程名可能包含空格和括号，父进程号在最后一个右括号之后的第二个字段
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    result = []
+    pending = [pid]
+    while pending:
+        for child in children.get(pending.pop(), []):
+            result.append(child)
+            pending.append(child)
+    return result
+
+
+def _call_with_timeout(func, timeout):
+    """在辅助线程中调用func，超过timeout秒抛出TimeoutError（卡住的线程留在后台）"""
+    result = {}
+
+    def target():
+        try:
+            result["value"] = func()
+        except Exception as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=target, name="dino-supervisor-call", daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        raise TimeoutError(f"{timeout} 秒内没有返回")
+    if "error" in result:
+        raise result["error"]
+    return result.get("value")
+
+
+class SupervisedGame:
+    """包装DinoGame：检测失效会话，在run_episode重试前重启浏览器；其他属性直接转发给当前的DinoGame"""
+
+    def __init__(self, config, factory):
+        settings = dict(DEFAULT_SUPERVISOR)
+        settings.update(config.get("supervisor", {}))
+        self.config = config
+        self.factory = factory
+        self.call_timeout = settings["call_timeout"]
+        self.script_timeout = settings["script_timeout"]
+        self.health_interval = settings["health_interval"]
+        self.max_episode_retries = settings["max_episode_retries"]
+        self.restarts = 0
+        self._call_started = None  # 进行中的游戏调用的开始时间，没有调用时为None
+        self._lost = None  # 已发现但还未恢复的SessionLost
+        self._launch()
+        self._stop = threading.Event()
+        threading.Thread(target=self._watchdog, name="dino-supervisor", daemon=True).start()
+
+    def __getattr__(self, name):
+        # 只有在实例属性中找不到时才会调用；初始化完成前不转发，避免递归
+        if name == "game":
+            raise AttributeError(name)
+        return getattr(self.game, name)
+
+    def _launch(self):
+        self.game = self.factory(self.config)
+        try:
+            self.game.driver.set_script_timeout(self.script_timeout)
+        except Exception as e:
+            log.warning("script_timeout_failed", error=str(e))
+        self._lost = None
+        self._last_check = perf_counter()
+
+    def _driver_process(self):
+        service = getattr(self.game.driver, "service", None)
+        return getattr(service, "process", None)
+
+    def _guarded(self, name):
+        """调用DinoGame的方法并登记开始时间，会话已失效时抛出SessionLost"""
+        if self._lost:
+            raise self._lost
+        self._call_started = perf_counter()
+        try:
+            result = getattr(self.game, name)()
+        finally:
+            self._call_started = None
+        if self._lost:
+            raise self._lost
+        return result
+
+    def call(self, func):
+        """在看门狗下调用func(driver)（供多窗口评估等直接使用WebDriver的代码），
+        调用出错时检查会话，会话失效则抛出SessionLost，否则抛出原来的异常"""
+        if self._lost:
+            raise self._lost
+        self._call_started = perf_counter()
+        try:
+            result = func(self.game.driver)
+        except SessionLost:
+            raise
+        except Exception:
+            self._call_started = None
+            self.check_health()
+            raise
+        finally:
+            self._call_started = None
+        if self._lost:
+            raise self._lost
+        now = perf_counter()
+        if now - self._last_check >= self.health_interval:
+            self._last_check = now
+            self.check_health()
+        return result
+
+    def restart(self):
+        return self._guarded("restart")
+
+    def get_game_state(self):
+        return self._guarded("get_game_state")
+
+    def get_score(self):
+        return self._guarded("get_score")
+
+    def jump(self):
+        return self._guarded("jump")
+
+    def start_duck(self):
+        return self._guarded("start_duck")
+
+    def stop_duck(self):
+        return self._guarded("stop_duck")
+
+    def start_game(self):
+        return self._guarded("start_game")
+
+    def is_game_over(self):
+        game_over = self._guarded("is_game_over")
+        now = perf_counter()
+        if now - self._last_check >= self.health_interval:
+            self._last_check = now
+            self.check_health()
+        return game_over
+
+    def check_health(self):
+        """检查ChromeDriver进程并执行探测脚本，会话失效时抛出SessionLost"""
+        if self._lost:
+            raise self._lost
+        process = self._driver_process()
+        if process is not None and process.poll() is not None:
+            self._lost = SessionLost("process_exit", f"ChromeDriver进程已退出（返回码 {process.returncode}）")
+        else:
+            start = perf_counter()
+            try:
+                _call_with_timeout(lambda: self.game.driver.execute_script(HEALTH_SCRIPT), self.script_timeout)
+            except Exception as e:
+                self._lost = SessionLost("health_check", f"健康检查失败: {e}")
+            stage_timings.record("browser.health", perf_counter() - start)
+        if self._lost:
+            raise self._lost
+
+    def _watchdog(self):
+        while not self._stop.wait(WATCHDOG_INTERVAL):
+            started = self._call_started
+            if started is None or self._lost or perf_counter() - started <= self.call_timeout:
+                continue
+            self._lost = SessionLost("call_timeout", f"游戏调用超过 {self.call_timeout} 秒没有返回")
+            log.error("browser_call_hung", seconds=perf_counter() - started)
+            self._kill_driver()
+
+    def _kill_driver(self):
+        """结束ChromeDriver及其启动的Chrome进程树，让卡住的WebDriver请求立即出错，也不留下孤儿浏览器"""
+        process = self._driver_process()
+        if process is not None:
+            # 从最深的后代开始结束，Chrome的子进程不会被重新挂到init下继续运行
+            for pid in reversed(_descendants(process.pid)):
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except OSError:
+                    pass
+            try:
+                process.kill()
+            except OSError:
+                pass
+        pool_slot = getattr(self.game, "pool_slot", None)
+        if pool_slot:
+            # 预热浏览器不是ChromeDriver的子进程，按浏览器池记录的进程结束
+            from .browser_pool import _terminate
+            _terminate(pool_slot["pid"])
+
+    def recover(self, error):
+        """关闭失效的会话并启动新的浏览器"""
+        self.restarts += 1
+        training_metrics.record_restart(error.kind)
+        log.warning("browser_session_lost", kind=error.kind, detail=str(error), restarts=self.restarts)
+        print(f"\n♻️ 浏览器会话失效（{error}），正在重启浏览器（第 {self.restarts} 次）...")
+        try:
+            _call_with_timeout(self.game.close, self.script_timeout)
+        except Exception as e:
+            log.warning("browser_close_failed", error=str(e))
+            self._kill_driver()
+        start = perf_counter()
+        self._launch()
+        stage_timings.record("browser.relaunch", perf_counter() - start)
+
+    def close(self):
+        self._stop.set()
+        self.game.close()
@@ -0,0 +1,175 @@
+"""代理适应度模型：用已评估过的(基因, 适应度)预筛选子代，只把最有希望或最不确定的个体送去真实评估
+
+模型是基因空间上的RBF核回归（Nadaraya-Watson）：
+    预测均值  = 核加权的适应度平均
+    不确定度  = 核加权的适应度标准差 + 先验标准差 / sqrt(1 + 有效样本数)
+远离所有已评估基因的候选，有效样本数小、不确定度高。数据按评估顺序追加，超过容量时丢弃最旧的样本。
+
+每代由优化引擎多产生oversample倍的候选子代，按预测均值选出最有希望的个体，
+再按不确定度补充一部分探索个体，送去评估的子代数为 evaluate_fraction × 种群大小。
+真实评估后检查预测与实际适应度的秩相关，低于min_correlation时下一代不做筛选。
+
+配置（config["surrogate"]，均为可选）:
+    enabled            是否启用，默认False
+    oversample         候选子代数是需要的子代数的多少倍，默认3
+    evaluate_fraction  每代真实评估的个体数占种群大小的比例，默认0.5
+    explore_fraction   按不确定度挑选的个体比例，默认0.25
+    min_samples        开始筛选前至少需要的已评估样本数，默认50
+    capacity           保留的样本数上限，默认5000
+    bandwidth          核带宽，默认按样本间距离的中位数自动选择
+    min_correlation    继续筛选所需的最小秩相关，默认0.2
+"""
+import os
+
+import numpy as np
+
+from .genome import GENOME_SIZE, genome_matrix
+
+DEFAULT_SURROGATE = {
+    "oversample": 3,
+    "evaluate_fraction": 0.5,
+    "explore_fraction": 0.25,
+    "min_samples": 50,
+    "capacity": 5000,
+    "bandwidth": None,
+    "min_correlation": 0.2,
+}
+
+# 自动选择带宽时用于估计距离中位数的样本数
+BANDWIDTH_SAMPLE = 500
+
+
+def _rank_correlation(a, b):
+    """Spearman秩相关（不处理并列）"""
+    if len(a) < 3:
+        return None
+    ranks_a = np.argsort(np.argsort(a))
+    ranks_b = np.argsort(np.argsort(b))
+    if ranks_a.std() == 0 or ranks_b.std() == 0:
+        return None
+    return float(np.corrcoef(ranks_a, ranks_b)[0, 1])
+
+
+class SurrogateModel:
+    """基因 -> 适应度的核回归模型"""
+
+    def __init__(self, config):
+        settings = dict(DEFAULT_SURROGATE)
+        settings.update(config.get("surrogate", {}))
+        self.oversample = settings["oversample"]
+        self.evaluate_fraction = settings["evaluate_fraction"]
+        self.explore_fraction = settings["explore_fraction"]
+        self.min_samples = settings["min_samples"]
+        self.capacity = settings["capacity"]
+        self.fixed_bandwidth = settings["bandwidth"]
+        self.min_correlation = settings["min_correlation"]
+
+        self.genes = np.empty((0, GENOME_SIZE))
+        self.fitness = np.empty(0)
+        self.bandwidth = None
+        self.trusted = True
+        self.pending = None  # 本代被筛选个体的(基因, 预测适应度)，评估后用于检查预测质量
+        self.last_summary = None
+
+    @property
+    def ready(self):
+        return len(self.fitness) >= self.min_samples and self.trusted
+
+    def add(self, genes, fitness_scores):
+        """加入一批真实评估结果"""
+        genes = np.asarray(genes, dtype=np.float64).reshape(-1, GENOME_SIZE)
+        fitness = np.asarray(fitness_scores, dtype=np.float64)
+        self.genes = np.concatenate([self.genes, genes])[-self.capacity:]
+        self.fitness = np.concatenate([self.fitness, fitness])[-self.capacity:]
+        self.bandwidth = None
+
+    def _bandwidth(self):
+        if self.fixed_bandwidth:
+            return self.fixed_bandwidth
+        if self.bandwidth is None:
+            sample = self.genes[-BANDWIDTH_SAMPLE:]
+            distances = np.linalg.norm(sample[:, None, :] - sample[None, :, :], axis=2)
+            median = np.median(distances[np.triu_indices(len(sample), 1)]) if len(sample) > 1 else 1.0
+            # 中位数距离的一半：近邻主导预测，同时不会只剩单个样本
+            self.bandwidth = max(median / 2, 1e-6)
+        return self.bandwidth
+
+    def predict(self, genes):
+        """返回(预测均值, 不确定度)，各为(len(genes),)"""
+        genes = np.asarray(genes, dtype=np.float64).reshape(-1, GENOME_SIZE)
+        squared = (np.einsum('ij,ij->i', genes, genes)[:, None] - 2 * genes @ self.genes.T
+                   + np.einsum('ij,ij->i', self.genes, self.genes)[None, :])
+        kernel = np.exp(-np.maximum(squared, 0) / (2 * self._bandwidth() ** 2))
+        total = kernel.sum(axis=1)
+        safe_total = np.maximum(total, 1e-12)
+        prior_mean = self.fitness.mean()
+        prior_std = self.fitness.std()
+
+        mean = np.where(total > 1e-12, kernel @ self.fitness / safe_total, prior_mean)
+        variance = np.where(total > 1e-12, kernel @ (self.fitness ** 2) / safe_total - mean ** 2, prior_std ** 2)
+        effective = total ** 2 / np.maximum(np.einsum('ij,ij->i', kernel, kernel), 1e-12)
+        uncertainty = np.sqrt(np.maximum(variance, 0)) + prior_std / np.sqrt(1 + effective)
+        return mean, uncertainty
+
+    def screen(self, candidates, keep):
+        """从候选个体中选出keep个：大部分按预测均值，其余按不确定度"""
+        if keep >= len(candidates):
+            return list(candidates)
+        genes = genome_matrix(candidates)
+        mean, uncertainty = self.predict(genes)
+
+        explore = int(round(keep * self.explore_fraction))
+        exploit = keep - explore
+        chosen = list(np.argsort(-mean)[:exploit])
+        remaining = np.setdiff1d(np.arange(len(candidates)), chosen)
+        chosen += list(remaining[np.argsort(-uncertainty[remaining])[:explore]])
+
+        self.pending = (genes[chosen], mean[chosen])
+        self.last_summary = {
+            "candidates": len(candidates),
+            "evaluated": keep,
+            "explore": explore,
+            "predicted_best": float(mean.max()),
+            "mean_uncertainty": float(uncertainty.mean()),
+            "samples": len(self.fitness)
+        }
+        return [candidates[i] for i in chosen]
+
+    def observe(self, genes, fitness_scores):
+        """本代评估完成：检查被筛选个体的预测质量，并把结果加入训练数据"""
+        genes = np.asarray(genes, dtype=np.float64).reshape(-1, GENOME_SIZE)
+        fitness = np.asarray(fitness_scores, dtype=np.float64)
+        if self.pending is not None:
+            screened_genes, predicted = self.pending
+            actual = {row.tobytes(): f for row, f in zip(genes, fitness)}
+            pairs = [(p, actual[row.tobytes()]) for row, p in zip(screened_genes, predicted) if row.tobytes() in actual]
+            correlation = _rank_correlation(*zip(*pairs)) if len(pairs) >= 3 else None
+            self.trusted = correlation is None or correlation >= self.min_correlation
+            if self.last_summary is not None:
+                self.last_summary["rank_correlation"] = correlation
+                self.last_summary["trusted"] = self.trusted
+            self.pending = None
+        else:
+            # 未筛选的一代用于恢复信任
+            self.trusted = True
+            self.last_summary = None
+        self.add(genes, fitness)
+
+    def data_path(self, directory):
+        return os.path.join(directory, "surrogate_data.npz")
+
+    def save(self, path):
+        np.savez(path, genes=self.genes, fitness=self.fitness)
+
+    def load(self, path):
+        data = np.load(path)
+        self.genes = data["genes"][-self.capacity:]
+        self.fitness = data["fitness"][-self.capacity:]
+        self.bandwidth = None
+
+
+def create_surrogate(config):
+    """配置启用时创建SurrogateModel，否则返回None"""
+    if not config.get("surrogate", {}).get("enabled", False):
+        return None
+    return SurrogateModel(config)
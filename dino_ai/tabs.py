@@ -0,0 +1,419 @@
+"""单个Chrome会话内的多窗口并发评估
+
+主页面用window.open打开若干个同源的游戏窗口，每个窗口有自己的Runner实例。
+所有窗口的动作和状态在主页面中一次execute_script批量完成，每个决策周期只需一次WebDriver往返，
+多局游戏共享同一个浏览器进程，比多个Chrome进程节省大量内存。
+game为SupervisedGame时每个决策周期在看门狗下执行；浏览器会话失效时重启浏览器、重新打开窗口，
+正在进行的各局不计分，放回队列从头开始（每局最多重试supervisor.max_episode_retries次）。
+窗口以popup方式打开而不是普通标签页：隐藏的标签页会暂停requestAnimationFrame，
+而被遮挡的窗口在--disable-backgrounding-occluded-windows下仍然正常运行。
+
+配置（config["browser"]，可选）:
+    tabs    同时运行的游戏窗口数，大于1时训练使用多窗口评估（仅Chrome模式）
+
+调优:
+    python -m dino_ai.tabs tune [--max-tabs 8] [--seconds 10] [--template 模板名]
+    逐个增加窗口数，测量每个窗口的实际决策频率和浏览器内存，给出每GB内存可同时运行的游戏数。
+"""
+import time
+from collections import deque
+from time import perf_counter
+
+from .browser import OBSTACLES_JS, SCORE_JS
+from .evaluation import MAX_STEPS, should_keep_ducking
+from .instrumentation import stage_timings
+from .metrics import training_metrics
+from .novelty import BehaviorTracker, average_descriptors
+from .scheduler import create_scheduler, deadline_stats
+from .supervisor import retry_on_session_lost
+
+# 动作编码（每个窗口一个整数，-1表示该窗口本周期空闲）
+CODE_JUMP = 1
+CODE_DUCK = 2
+CODE_RELEASE_DUCK = 4
+CODE_RESTART = 8
+CODE_IDLE = -1
+
+# 在主页面安装一次的辅助函数（窗口按键、障碍物、分数）
+HELPERS_JS = OBSTACLES_JS + SCORE_JS + """
+function dinoPress(tab, keyCode) {
+    ['keydown', 'keyup'].forEach(function (type) {
+        var event = new tab.KeyboardEvent(type, {bubbles: true});
+        Object.defineProperty(event, 'keyCode', {get: function () { return keyCode; }});
+        Object.defineProperty(event, 'which', {get: function () { return keyCode; }});
+        tab.document.dispatchEvent(event);
+    });
+}
+window.__dinoHelpers = {obstacles: dinoObstacles, score: dinoScore, press: dinoPress};
+window.__dinoTabs = window.__dinoTabs || [];
+return true;
+"""
+
+OPEN_TABS_JS = """
+var url = arguments[0], count = arguments[1], features = arguments[2];
+while (window.__dinoTabs.length < count) {
+    var tab = window.open(url, 'dino-tab-' + window.__dinoTabs.length, features);
+    if (!tab) { return -1; }
+    window.__dinoTabs.push(tab);
+}
+return window.__dinoTabs.length;
+"""
+
+READY_TABS_JS = """
+var ready = 0;
+(window.__dinoTabs || []).forEach(function (tab) {
+    try { if (!tab.closed && tab.Runner && tab.Runner.instance_) { ready += 1; } } catch (e) {}
+});
+return ready;
+"""
+
+CLOSE_TABS_JS = """
+(window.__dinoTabs || []).forEach(function (tab) { try { tab.close(); } catch (e) {} });
+window.__dinoTabs = [];
+"""
+
+# 一次往返：按编码对每个窗口执行动作，再读取所有窗口的状态
+STEP_JS = """
+var codes = arguments[0], helpers = window.__dinoHelpers, tabs = window.__dinoTabs || [];
+if (!helpers) { return null; }
+var states = [];
+for (var i = 0; i < tabs.length; i++) {
+    var tab = tabs[i], code = codes[i], runner = null;
+    try { runner = tab.closed ? null : (tab.Runner && tab.Runner.instance_); } catch (e) {}
+    if (!runner || code < 0) { states.push(null); continue; }
+    if (code & 8) {
+        if (runner.activated) { runner.restart(); } else { helpers.press(tab, 32); }
+    }
+    if (code & 1) { runner.tRex.startJump(runner.currentSpeed); }
+    if (code & 2) { runner.tRex.setDuck(true); } else if (code & 4) { runner.tRex.setDuck(false); }
+    var rex = runner.tRex;
+    states.push({
+        crashed: !!runner.crashed,
+        speed: runner.currentSpeed || 6,
+        score: runner.crashed ? helpers.score(runner, tab.document) : Math.floor((runner.distanceRan || 0) / 10),
+        dino: {
+            x: rex.xPos, y: rex.yPos,
+            width: rex.config ? rex.config.WIDTH : 40,
+            height: rex.config ? rex.config.HEIGHT : 50,
+            jumping: rex.jumping, ducking: rex.ducking
+        },
+        obstacles: runner.horizon && runner.horizon.obstacles ? helpers.obstacles(runner) : []
+    });
+}
+return states;
+"""
+
+# 等待新窗口加载出Runner实例的最长时间（秒）
+TAB_READY_TIMEOUT = 20
+
+
+def open_tabs(driver, count, width=800, height=600, timeout=TAB_READY_TIMEOUT):
+    """在主页面中打开（补足到）count个游戏窗口，返回就绪的窗口数"""
+    driver.execute_script(HELPERS_JS)
+    opened = driver.execute_script(OPEN_TABS_JS, driver.current_url, count, f"popup,width={width},height={height}")
+    if opened < 0:
+        raise RuntimeError("无法打开游戏窗口，请确认浏览器没有拦截弹出窗口")
+    deadline = perf_counter() + timeout
+    ready = driver.execute_script(READY_TABS_JS)
+    while ready < count and perf_counter() < deadline:
+        time.sleep(0.2)
+        ready = driver.execute_script(READY_TABS_JS)
+    return ready
+
+
+def close_tabs(driver):
+    driver.execute_script(CLOSE_TABS_JS)
+
+
+def step_tabs(driver, codes):
+    """执行一个决策周期，返回每个窗口的状态（空闲或不可用的窗口为None）"""
+    states = driver.execute_script(STEP_JS, codes)
+    if states is None:
+        # 主页面刷新后辅助函数丢失，重新安装
+        driver.execute_script(HELPERS_JS)
+        states = driver.execute_script(STEP_JS, codes)
+    return states
+
+
+def action_code(action, game_state):
+    """把个体的决策转换为动作编码（与run_episode的持续下蹲逻辑一致）"""
+    code = CODE_JUMP if action['jump'] else 0
+    if action['duck']:
+        code |= CODE_DUCK
+    elif not should_keep_ducking(game_state):
+        code |= CODE_RELEASE_DUCK
+    return code
+
+
+def _state_for_predict(state):
+    """窗口状态转换为与DinoGame.get_game_state相同的结构"""
+    return {
+        'dino': state['dino'],
+        'obstacles': [
+            {'x': float(o['x']), 'y': float(o['y']), 'width': float(o['width']),
+             'height': float(o['height']), 'type': str(o['type'])}
+            for o in state['obstacles'] if o.get('x') is not None and o.get('y') is not None
+        ],
+        'speed': state['speed'],
+        'score': state['score']
+    }
+
+
+class MultiTabEvaluator:
+    """在同一个Chrome会话的多个游戏窗口中并发评估种群"""
+
+    def __init__(self, config, game):
+        self.game = game
+        self.tabs = config.get("browser", {}).get("tabs", 2)
+        self.workers = self.tabs
+        self.label = f"{self.tabs} 个游戏窗口"
+        self.runs_per_individual = config["training"]["runs_per_individual"]
+        self.scheduler = create_scheduler(config)
+        self.max_steps = MAX_STEPS
+        self.max_score = None  # 单局得分上限（budget.EpisodeBudget），None表示不设上限
+        self.capped = None  # 每个个体达到得分上限的局数
+        self.tab_hz = None
+        self.track_behavior = config.get("novelty", {}).get("enabled", False)
+        self.descriptors = None  # 启用新颖性搜索时为每个个体的行为描述子
+        self.completed_runs = None  # 评估日志中每个个体已完成的局 {局序号: 记录}，这些局不再运行
+        self.on_run = None  # 每完成一局调用 on_run(下标, 局序号, 得分, 步数, 是否截断, 描述子)
+        self.window_size = (config["game"].get("window_width", 800), config["game"].get("window_height", 600))
+
+        self._open()
+        print(f"🗂️  已在同一浏览器中打开 {self.tabs} 个游戏窗口")
+
+    @property
+    def driver(self):
+        # 每次都从游戏对象读取：SupervisedGame重启浏览器后driver会更换
+        return self.game.driver
+
+    def _open(self):
+        ready = open_tabs(self.driver, self.tabs, *self.window_size)
+        if ready < self.tabs:
+            raise RuntimeError(f"只有 {ready}/{self.tabs} 个游戏窗口加载成功")
+
+    def _step(self, codes):
+        """执行一个决策周期；game为SupervisedGame时在看门狗下执行，会话失效时抛出SessionLost"""
+        if hasattr(self.game, "call"):
+            return self.game.call(lambda driver: step_tabs(driver, codes))
+        return step_tabs(self.driver, codes)
+
+    def evaluate(self, population):
+        """评估种群，返回与population对应的适应度列表"""
+        scores = [[] for _ in population]
+        behaviors = [[] for _ in population]
+        self.capped = [0] * len(population)
+        # 队列中每局为 (个体下标, 局序号, 因会话失效已重试的次数)；评估日志中已完成的局直接使用记录
+        pending = deque()
+        for index in range(len(population)):
+            done = self.completed_runs[index] if self.completed_runs else {}
+            for run in range(self.runs_per_individual):
+                record = done.get(run)
+                if record is None:
+                    pending.append((index, run, 0))
+                    continue
+                scores[index].append(record["score"])
+                self.capped[index] += record.get("capped", False)
+                if self.track_behavior:
+                    behaviors[index].append(record["descriptor"])
+        trackers = [BehaviorTracker() for _ in range(self.tabs)] if self.track_behavior else None
+        assigned = [None] * self.tabs  # 每个窗口: [个体下标, 局序号, 步数, 已重试次数] 或 None
+        dead = set()
+        codes = [CODE_IDLE] * self.tabs
+        tab_steps = 0
+
+        def requeue_in_flight(error):
+            """浏览器已重启：重新打开游戏窗口，正在进行的各局不计分，放回队列从头开始"""
+            for tab in range(self.tabs):
+                if assigned[tab] is None:
+                    continue
+                index, run, _, retries = assigned[tab]
+                if retries >= self.game.max_episode_retries:
+                    raise error
+                pending.appendleft((index, run, retries + 1))
+                assigned[tab] = None
+            dead.clear()
+            codes[:] = [CODE_IDLE] * self.tabs
+            self._open()
+            # 重启浏览器的耗时不计为迟到帧
+            deadline_stats.add(self.scheduler.episode_summary())
+            self.scheduler.start()
+
+        self.scheduler.start()
+        start = perf_counter()
+        while pending or any(a is not None for a in assigned):
+            # 空闲窗口领取下一局并在本周期重启
+            for tab in range(self.tabs):
+                if assigned[tab] is None and tab not in dead and pending:
+                    index, run, retries = pending.popleft()
+                    assigned[tab] = [index, run, 0, retries]
+                    codes[tab] = CODE_RESTART
+                    if trackers:
+                        trackers[tab].reset()
+
+            stage_start = perf_counter()
+            states = retry_on_session_lost(self.game, lambda: self._step(codes), requeue_in_flight)
+            stage_end = perf_counter()
+            stage_timings.record('tabs.step', stage_end - stage_start)
+
+            codes[:] = [CODE_IDLE] * self.tabs
+            states = list(states or [])[:self.tabs] + [None] * max(0, self.tabs - len(states or []))
+            for tab, state in enumerate(states):
+                if assigned[tab] is None:
+                    continue
+                index, run, steps, retries = assigned[tab]
+                if state is None:
+                    # 窗口失效：本局放回队列，不再使用该窗口
+                    pending.appendleft((index, run, retries))
+                    assigned[tab] = None
+                    dead.add(tab)
+                    continue
+                capped = self.max_score is not None and state['score'] >= self.max_score
+                if (state['crashed'] and steps > 0) or steps >= self.max_steps or capped:
+                    score = min(state['score'], self.max_score) if capped else state['score']
+                    scores[index].append(score)
+                    self.capped[index] += capped
+                    training_metrics.add_episode(steps)
+                    descriptor = None
+                    if trackers:
+                        descriptor = trackers[tab].descriptor(state['score'], state['crashed'] and not capped)
+                        behaviors[index].append(descriptor)
+                    if self.on_run:
+                        self.on_run(index, run, score, steps, capped, descriptor)
+                    assigned[tab] = None
+                    continue
+                game_state = _state_for_predict(state)
+                action = population[index].predict(game_state)
+                codes[tab] = action_code(action, game_state)
+                if trackers:
+                    trackers[tab].record(game_state, action)
+                assigned[tab][2] = steps + 1
+                tab_steps += 1
+            stage_timings.record('predict', perf_counter() - stage_end)
+
+            if len(dead) == self.tabs:
+                raise RuntimeError("所有游戏窗口都已失效")
+            self.scheduler.wait()
+
+        elapsed = perf_counter() - start
+        deadline_stats.add(self.scheduler.episode_summary())
+        self.tab_hz = tab_steps / elapsed / max(1, self.tabs - len(dead)) if elapsed > 0 else 0.0
+        print(f"🗂️  每个窗口平均决策频率: {self.tab_hz:.1f} Hz")
+        if trackers:
+            self.descriptors = [average_descriptors(b) for b in behaviors]
+        return [sum(s) / len(s) if s else 0.0 for s in scores]
+
+    def close(self):
+        try:
+            close_tabs(self.driver)
+        except Exception as e:
+            print(f"关闭游戏窗口失败: {e}")
+
+
+def browser_memory_mb(driver):
+    """浏览器占用的内存(MB)和统计方式：有psutil时统计整个Chrome进程树的RSS，否则统计各窗口的JS堆"""
+    try:
+        import psutil
+        root = psutil.Process(driver.service.process.pid)
+        children = root.children(recursive=True)
+        if children:
+            return sum(p.memory_info().rss for p in [root] + children) / 2 ** 20, "rss"
+    except Exception:
+        pass
+    heap = driver.execute_script("""
+        var total = 0;
+        [window].concat(window.__dinoTabs || []).forEach(function (w) {
+            try { total += w.performance.memory.usedJSHeapSize; } catch (e) {}
+        });
+        return total;
+    """)
+    return (heap or 0) / 2 ** 20, "js_heap"
+
+
+def tune(config, max_tabs=8, seconds=10):
+    """逐个增加窗口数，测量每个窗口的决策频率和内存，返回结果列表"""
+    from .backend import create_game
+    from .genome import DinosaurAI
+
+    game = create_game(config)
+    scheduler = create_scheduler(config)
+    width, height = config["game"].get("window_width", 800), config["game"].get("window_height", 600)
+    results = []
+    try:
+        for count in range(1, max_tabs + 1):
+            if open_tabs(game.driver, count, width, height) < count:
+                print(f"⚠️ 无法打开第 {count} 个游戏窗口，停止调优")
+                break
+            players = [DinosaurAI(config=config["genetic"]) for _ in range(count)]
+            codes = [CODE_RESTART] * count
+            steps = 0
+            scheduler.start()
+            end = perf_counter() + seconds
+            start = perf_counter()
+            while perf_counter() < end:
+                states = step_tabs(game.driver, codes)
+                codes = []
+                for player, state in zip(players, states):
+                    if state is None or state['crashed']:
+                        codes.append(CODE_RESTART)
+                        continue
+                    game_state = _state_for_predict(state)
+                    codes.append(action_code(player.predict(game_state), game_state))
+                    steps += 1
+                scheduler.wait()
+            elapsed = perf_counter() - start
+            memory, method = browser_memory_mb(game.driver)
+            row = {
+                "tabs": count,
+                "tab_hz": steps / elapsed / count,
+                "late_frame_ratio": scheduler.late_frames / max(1, scheduler.frames),
+                "memory_mb": memory,
+                "memory_method": method,
+                "games_per_gb": count / (memory / 1024) if memory else 0.0
+            }
+            results.append(row)
+            print(f"   {count:>3} 个窗口 - 每窗口 {row['tab_hz']:.1f} Hz - 迟到帧 {row['late_frame_ratio']*100:.1f}% - "
+                  f"内存 {memory:.0f} MB ({method}) - 每GB {row['games_per_gb']:.1f} 局")
+    finally:
+        try:
+            close_tabs(game.driver)
+        finally:
+            game.close()
+    return results
+
+
+def recommend(results, target_hz, tolerance=0.9):
+    """在每窗口频率不低于目标频率×tolerance的设置中，选每GB内存同时运行局数最多的窗口数"""
+    acceptable = [row for row in results if row["tab_hz"] >= target_hz * tolerance]
+    if not acceptable:
+        return None
+    return max(acceptable, key=lambda row: (row["games_per_gb"], row["tabs"]))
+
+
+def main():
+    import argparse
+
+    from .config import load_config_templates
+
+    parser = argparse.ArgumentParser(description="多窗口评估调优")
+    parser.add_argument("command", choices=["tune"])
+    parser.add_argument("--max-tabs", type=int, default=8, help="最多测试的窗口数")
+    parser.add_argument("--seconds", type=float, default=10, help="每种窗口数的测试时长")
+    parser.add_argument("--template", default="快速测试", help="使用的配置模板")
+    args = parser.parse_args()
+
+    config = load_config_templates()[args.template]["config"]
+    config["game"]["simulation_mode"] = False
+    print(f"🔧 测试 1~{args.max_tabs} 个游戏窗口，每种 {args.seconds:.0f} 秒")
+    results = tune(config, args.max_tabs, args.seconds)
+
+    target_hz = create_scheduler(config).target_hz
+    best = recommend(results, target_hz)
+    if best:
+        print(f"✅ 推荐 \"browser\": {{\"tabs\": {best['tabs']}}}（每窗口 {best['tab_hz']:.1f} Hz，目标 {target_hz:.1f} Hz）")
+    else:
+        print(f"⚠️ 没有窗口数能达到目标频率 {target_hz:.1f} Hz，请降低game.decision_hz或增大game.delay")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""游戏过程录制：定长二进制记录 + 追加写入的JSON Lines索引，可通过内存映射读回为NumPy数组
+
+文件格式:
+    TRACE_MAGIC(8字节) + 头部长度(uint32小端) + JSON头部 + 连续的TRACE_DTYPE记录
+索引文件(<trace>.idx.jsonl)每局一行，记录起始记录号、帧数、得分等信息。
+每局结束只追加一行并flush，录制开销与已录制的局数无关；读取时逐行流式解析。
+
+配置（config["trace"]，均为可选）:
+    enabled   是否录制，默认False
+    path      录制文件路径，默认traces/episodes.trace
+"""
+import json
+import os
+import struct
+import time
+
+import numpy as np
+
+TRACE_MAGIC = b"DINOTRC1"
+TRACE_VERSION = 1
+
+# 每帧最多保存的障碍物数量（按游戏返回顺序，第一个是最近的）
+MAX_OBSTACLES = 3
+
+OBSTACLE_TYPES = ["CACTUS", "PTERODACTYL", "PTERODACTYL_LOW", "PTERODACTYL_HIGH"]
+OBSTACLE_TYPE_CODES = {name: code for code, name in enumerate(OBSTACLE_TYPES)}
+UNKNOWN_OBSTACLE_TYPE = 255
+
+# 恐龙状态标志位
+FLAG_JUMPING = 1
+FLAG_DUCKING = 2
+FLAG_DUCKED_IN_JUMP = 4
+
+# 动作标志位
+ACTION_JUMP = 1
+ACTION_DUCK = 2
+
+TRACE_DTYPE = np.dtype([
+    ("time", "<f4"),            # 距本局开始的秒数
+    ("step", "<u4"),
+    ("dino_x", "<f4"),
+    ("dino_y", "<f4"),
+    ("dino_width", "<f4"),
+    ("dino_height", "<f4"),
+    ("dino_flags", "u1"),
+    ("action", "u1"),
+    ("obstacle_count", "u1"),
+    ("speed", "<f4"),
+    ("score", "<i4"),
+    ("obstacle_x", "<f4", (MAX_OBSTACLES,)),
+    ("obstacle_y", "<f4", (MAX_OBSTACLES,)),
+    ("obstacle_width", "<f4", (MAX_OBSTACLES,)),
+    ("obstacle_height", "<f4", (MAX_OBSTACLES,)),
+    ("obstacle_type", "u1", (MAX_OBSTACLES,)),
+])
+
+
+def index_path(trace_path):
+    return trace_path + ".idx.jsonl"
+
+
+def _header_bytes():
+    header = json.dumps({
+        "version": TRACE_VERSION,
+        "record_size": TRACE_DTYPE.itemsize,
+        "max_obstacles": MAX_OBSTACLES,
+        "obstacle_types": OBSTACLE_TYPES
+    }).encode("utf-8")
+    return TRACE_MAGIC + struct.pack("<I", len(header)) + header
+
+
+def _read_header(f):
+    magic = f.read(len(TRACE_MAGIC))
+    if magic != TRACE_MAGIC:
+        raise ValueError("不是有效的录制文件")
+    (length,) = struct.unpack("<I", f.read(4))
+    header = json.loads(f.read(length).decode("utf-8"))
+    if header["record_size"] != TRACE_DTYPE.itemsize:
+        raise ValueError(f"录制文件版本不兼容: {header}")
+    return header, len(TRACE_MAGIC) + 4 + length
+
+
+class TraceRecorder:
+    """逐帧录制游戏状态和动作，按块缓冲写入，每局结束时落盘并更新索引"""
+
+    def __init__(self, path, buffer_frames=1024):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "rb") as f:
+                _, self._data_offset = _read_header(f)
+            self._records_written = (os.path.getsize(path) - self._data_offset) // TRACE_DTYPE.itemsize
+        else:
+            with open(path, "wb") as f:
+                f.write(_header_bytes())
+            self._records_written = 0
+
+        self._file = open(path, "ab")
+        self._buffer = np.zeros(buffer_frames, dtype=TRACE_DTYPE)
+        self._buffered = 0
+        self.episodes = sum(1 for _ in read_index(path))
+        self._index_needs_newline = _ends_without_newline(index_path(path))
+        self._index_file = open(index_path(path), "a", encoding="utf-8")
+
+        self._episode = None
+        self._episode_start_time = 0.0
+        self._episode_start_record = 0
+        self._step = 0
+
+    def start_episode(self, **metadata):
+        """开始录制新的一局，metadata会写入索引（如代数、个体、基因哈希）"""
+        self._episode = metadata
+        self._episode_start_time = time.perf_counter()
+        self._episode_start_record = self._records_written + self._buffered
+        self._step = 0
+
+    def record(self, game_state, action):
+        """录制一帧"""
+        if self._buffered == len(self._buffer):
+            self._flush_buffer()
+        row = self._buffer[self._buffered]
+        self._buffered += 1
+
+        dino = game_state["dino"]
+        row["time"] = time.perf_counter() - self._episode_start_time
+        row["step"] = self._step
+        self._step += 1
+        row["dino_x"] = dino.get("x", 0) or 0
+        row["dino_y"] = dino.get("y", 0) or 0
+        row["dino_width"] = dino.get("width", 40) or 0
+        row["dino_height"] = dino.get("height", 50) or 0
+        row["dino_flags"] = ((FLAG_JUMPING if dino.get("jumping") else 0)
+                             | (FLAG_DUCKING if dino.get("ducking") else 0)
+                             | (FLAG_DUCKED_IN_JUMP if dino.get("has_ducked_in_jump") else 0))
+        row["action"] = ((ACTION_JUMP if action.get("jump") else 0)
+                         | (ACTION_DUCK if action.get("duck") else 0))
+        row["speed"] = game_state.get("speed", 0) or 0
+        row["score"] = game_state.get("score", 0) or 0
+
+        obstacles = game_state.get("obstacles", [])[:MAX_OBSTACLES]
+        row["obstacle_count"] = len(obstacles)
+        for i, obstacle in enumerate(obstacles):
+            row["obstacle_x"][i] = obstacle.get("x", 0)
+            row["obstacle_y"][i] = obstacle.get("y", 0)
+            row["obstacle_width"][i] = obstacle.get("width", 0)
+            row["obstacle_height"][i] = obstacle.get("height", 0)
+            row["obstacle_type"][i] = OBSTACLE_TYPE_CODES.get(obstacle.get("type"), UNKNOWN_OBSTACLE_TYPE)
+        for i in range(len(obstacles), MAX_OBSTACLES):
+            row["obstacle_x"][i] = 0
+            row["obstacle_y"][i] = 0
+            row["obstacle_width"][i] = 0
+            row["obstacle_height"][i] = 0
+            row["obstacle_type"][i] = UNKNOWN_OBSTACLE_TYPE
+
+    def end_episode(self, score, **metadata):
+        """结束当前一局：写出缓冲并追加索引"""
+        if self._episode is None:
+            return
+        self._flush_buffer()
+        entry = dict(self._episode)
+        entry.update(metadata)
+        entry.update({
+            "episode": self.episodes,
+            "start": self._episode_start_record,
+            "frames": self._records_written - self._episode_start_record,
+            "final_score": score,
+            "duration": time.perf_counter() - self._episode_start_time,
+            "timestamp": time.strftime("%Y%m%d_%H%M%S")
+        })
+        self._append_index(entry)
+        self.episodes += 1
+        self._episode = None
+
+    def _flush_buffer(self):
+        if self._buffered:
+            self._file.write(self._buffer[:self._buffered].tobytes())
+            self._file.flush()
+            self._records_written += self._buffered
+            self._buffered = 0
+
+    def _append_index(self, entry):
+        line = json.dumps(entry) + "\n"
+        if self._index_needs_newline:
+            line = "\n" + line
+            self._index_needs_newline = False
+        self._index_file.write(line)
+        self._index_file.flush()
+
+    def close(self):
+        self._flush_buffer()
+        self._file.close()
+        self._index_file.close()
+
+
+def _ends_without_newline(path):
+    """上次中断时索引最后一行没有写完，追加前需要先换行"""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return False
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) != b"\n"
+
+
+def read_index(trace_path):
+    """逐行读取索引条目（生成器），索引不存在时不产生任何条目；中断时只写了一半的行被跳过"""
+    try:
+        f = open(index_path(trace_path), "r", encoding="utf-8")
+    except FileNotFoundError:
+        return
+    with f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def load_trace(trace_path):
+    """以只读内存映射打开录制文件，返回TRACE_DTYPE结构化数组"""
+    with open(trace_path, "rb") as f:
+        _, offset = _read_header(f)
+    count = (os.path.getsize(trace_path) - offset) // TRACE_DTYPE.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=TRACE_DTYPE)
+    return np.memmap(trace_path, dtype=TRACE_DTYPE, mode="r", offset=offset, shape=(count,))
+
+
+def episode_frames(frames, entry):
+    """取出索引条目对应的一局帧数据（内存映射切片，不复制）"""
+    return frames[entry["start"]:entry["start"] + entry["frames"]]
+
+
+def create_recorder(config):
+    """配置启用录制时创建TraceRecorder，否则返回None"""
+    trace_config = config.get("trace", {})
+    if trace_config.get("enabled", False):
+        return TraceRecorder(trace_config.get("path", os.path.join("traces", "episodes.trace")))
+    return None
+
+
+def main():
+    """命令行查看录制文件: python -m dino_ai.trace <录制文件>"""
+    import sys
+    if len(sys.argv) < 2:
+        print("用法: python -m dino_ai.trace <录制文件>")
+        return
+    from collections import deque
+    frames = load_trace(sys.argv[1])
+    episodes = 0
+    recent = deque(maxlen=20)
+    for entry in read_index(sys.argv[1]):
+        episodes += 1
+        recent.append(entry)
+    print(f"共 {episodes} 局，{len(frames)} 帧，每帧 {TRACE_DTYPE.itemsize} 字节")
+    for entry in recent:
+        print(f"第{entry['episode']}局 - 帧数: {entry['frames']} - 得分: {entry['final_score']} - 时长: {entry['duration']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
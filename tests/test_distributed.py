@@ -0,0 +1,11 @@
+"""dino_ai.distributed：本机协调器与两个工作进程的自检"""
+import pytest
+
+pytest.importorskip("numpy")
+
+from dino_ai.distributed import self_test
+
+
+def test_self_test_with_two_workers():
+    # 第二代中途结束一个工作进程，任务重新排队后结果仍须与串行评估一致
+    assert self_test(workers=2, population_size=12)
@@ -0,0 +1,68 @@
+"""dino_ai.inference：请求帧解码、批量决策与DinosaurAI.predict一致"""
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from dino_ai.genome import DinosaurAI
+from dino_ai.inference import (ACTIONS, REQUEST, REQUEST_DTYPE, TYPE_NAMES, InferenceClient, InferenceServer,
+                               decide, encode_state)
+
+
+def _sample_states(count, seed=0):
+    """随机游戏状态；数值取整数，float32帧中没有舍入误差"""
+    rng = random.Random(seed)
+    states = []
+    for _ in range(count):
+        jumping = rng.random() < 0.3
+        states.append({
+            'dino': {'x': 50, 'width': 40, 'jumping': jumping, 'has_ducked_in_jump': jumping and rng.random() < 0.3},
+            'obstacles': [{
+                'x': rng.randint(30, 690),
+                'width': rng.randint(10, 75),
+                'height': rng.randint(10, 75),
+                'type': rng.choice(TYPE_NAMES)
+            }],
+            'speed': rng.randint(6, 13)
+        })
+    return states
+
+
+def test_request_frames_decode_as_dtype():
+    encoded = encode_state(_sample_states(1)[0])
+    frame = REQUEST.pack(7, 3, *encoded)
+    assert REQUEST.size == REQUEST_DTYPE.itemsize
+
+    request = np.frombuffer(frame, dtype=REQUEST_DTYPE)[0]
+    assert (request["id"], request["genome"], request["type"], request["jump"]) == (7, 3, encoded[0], encoded[1])
+    assert request["features"].tolist() == [float(v) for v in encoded[2:]]
+
+
+def test_decide_matches_predict():
+    np.random.seed(0)
+    individuals = [DinosaurAI() for _ in range(4)]
+    genes = np.stack([individual.genes for individual in individuals])
+    states = _sample_states(500)
+
+    frames = b"".join(REQUEST.pack(i, i % len(individuals), *encode_state(state)) for i, state in enumerate(states))
+    codes = decide(genes, np.frombuffer(frames, dtype=REQUEST_DTYPE))
+
+    for i, state in enumerate(states):
+        assert ACTIONS[codes[i]] == individuals[i % len(individuals)].predict(state)
+
+
+def test_server_round_trip_matches_predict():
+    np.random.seed(1)
+    individual = DinosaurAI()
+    catalogue = [{"name": "test", "hash": individual.genome_hash(), "fitness": None}]
+    server = InferenceServer(catalogue, [individual.genes], "127.0.0.1:0")
+    try:
+        client = InferenceClient(server.address)
+        try:
+            for state in _sample_states(50, seed=2):
+                assert client.predict(state) == individual.predict(state)
+        finally:
+            client.close()
+    finally:
+        server.close()
@@ -0,0 +1,80 @@
+"""dino_ai.journal：评估器在一代中途中断后，恢复时不重新运行日志中已完成的局"""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from dino_ai.distributed import DistributedEvaluator, _selftest_config, _serial_fitness
+from dino_ai.genome import Population
+from dino_ai.journal import EvaluationJournal
+from dino_ai.metrics import training_metrics
+
+
+class _Interrupted(Exception):
+    pass
+
+
+def test_resume_skips_journaled_runs(tmp_path):
+    config = _selftest_config(population_size=6, workers=2)
+    runs = config["training"]["runs_per_individual"]
+    np.random.seed(0)
+    population = Population.random(6, config["genetic"])
+    path = str(tmp_path / "journal.jsonl")
+    total = len(population) * runs
+    interrupt_after = total // 2 + 1  # 落在一个个体的两局之间
+
+    # 第一次评估：写入interrupt_after局后模拟强制中断
+    journal = EvaluationJournal(path)
+    keys, completed = journal.completed_runs(1, population, runs)
+    record = journal.run_recorder(1, keys)
+    first = []
+
+    def on_run(index, run, *args):
+        record(index, run, *args)
+        first.append((index, run))
+        if len(first) == interrupt_after:
+            raise _Interrupted()
+
+    evaluator = DistributedEvaluator(config)
+    try:
+        evaluator.completed_runs = completed
+        evaluator.on_run = on_run
+        with pytest.raises(_Interrupted):
+            evaluator.evaluate(population)
+    finally:
+        evaluator.close()
+        journal.close()
+
+    # 重新打开日志恢复：已记录的局不再运行，适应度与不中断的评估一致
+    journal = EvaluationJournal(path)
+    keys, completed = journal.completed_runs(1, population, runs)
+    assert sum(len(done) for done in completed) == interrupt_after
+    second = []
+    episodes_before = training_metrics.episodes
+    evaluator = DistributedEvaluator(config)
+    try:
+        evaluator.completed_runs = completed
+        evaluator.on_run = lambda index, run, *args: second.append((index, run))
+        fitness = evaluator.evaluate(population)
+    finally:
+        evaluator.close()
+        journal.close()
+
+    assert not set(first) & set(second)
+    assert len(second) == total - interrupt_after
+    assert training_metrics.episodes - episodes_before == total - interrupt_after
+    expected = _serial_fitness(config, population, evaluator.course_seed(1))
+    assert fitness == pytest.approx(expected)
+
+
+def test_complete_drops_finished_generations(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = EvaluationJournal(path)
+    journal.append(1, 0, "a", 0, 10.0, 100)
+    journal.append(2, 0, "b", 0, 20.0, 200)
+    journal.complete(1)
+    journal.close()
+
+    journal = EvaluationJournal(path)
+    assert not journal.has_generation(1)
+    assert journal.lookup(2, "b", 0)["score"] == 20.0
+    journal.close()
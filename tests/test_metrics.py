@@ -0,0 +1,35 @@
+"""dino_ai.metrics：在本机随机端口启动指标服务并抓取"""
+import os
+import subprocess
+import sys
+
+from dino_ai.metrics import MetricsServer, TrainingMetrics, scrape
+
+
+def test_scrape_counters_from_localhost():
+    metrics = TrainingMetrics()
+    metrics.add_episode(120)
+    metrics.add_episodes(2, 80)
+    metrics.cache_lookup("policy", True)
+    metrics.record_restart("call_timeout")
+    metrics.end_generation(1, [10.0, 30.0], 25.0)
+
+    server = MetricsServer(metrics, "127.0.0.1", 0)
+    try:
+        lines = scrape(server.url).splitlines()
+    finally:
+        server.close()
+
+    assert "dino_episodes_total 3" in lines
+    assert "dino_steps_total 200" in lines
+    assert "dino_generation 1" in lines
+    assert 'dino_fitness{stat="best"} 30' in lines
+    assert 'dino_cache_hits_total{cache="policy"} 1' in lines
+    assert 'dino_browser_restarts_total{reason="call_timeout"} 1' in lines
+
+
+def test_counters_do_not_load_http_server():
+    code = "import sys, dino_ai.metrics; print('http.server' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert result.stdout.strip() == "False"